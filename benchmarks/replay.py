@@ -0,0 +1,196 @@
+"""
+@file replay.py
+
+@brief Record and replay MQTT streams at a fixed message-rate, used by 'run_benchmarks.py'.
+
+Payloads are either synthetic (sine-values as text, ISS position JSON), sample-blocks from 'test_data/' (vibration, as text or binary) or replayed from a capture-file,
+i.e. one payload per line as recorded by:
+
+    python replay.py record --broker test.mosquitto.org --topic Satellite/Iss --count 500 iss_capture.txt
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from math import sin, pi
+
+import numpy as np
+import paho.mqtt.client as mqtt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.payload import pack_block
+
+
+# ********************************** Payload Generators **************************************
+
+def sine_payloads() -> object:
+    """ Endless sine-wave, one text-float per message (same format as '1/testPoints/sinus'). """
+    for i in itertools.count():
+        yield f"{sin(2 * pi * i / 100):.6f}"
+
+
+def iss_payloads(t0_ms: int=1706038908569) -> object:
+    """ Endless synthetic ISS-trajectory, same JSON format as 'Satellite/Iss'. """
+    for i in itertools.count():
+        lat = 51.6 * sin(2 * pi * i / 5400)
+        lon = ((i * 0.0667) % 360) - 180
+        yield json.dumps({
+            "name": "ISS (ZARYA)",
+            "timestamp": t0_ms + i * 1000,
+            "position": {"x": 0.0, "y": 0.0, "z": 0.0, "lat": lat, "lon": lon, "alt": 420000.0 + 5000 * sin(i / 100),
+                         "speed": 7660.0, "bearing": 42.0},
+            "velocity": {"x": 0.0, "y": 0.0, "z": 0.0},
+        })
+
+
+VIBRATION_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_data", "vibration_test_data_1.csv")
+VIBRATION_BLOCK = 100           # Samples per message - i.e. 100 msg/s = 10 kS/s.
+
+
+def vibration_payloads(path: str=VIBRATION_CSV, block: int=VIBRATION_BLOCK) -> object:
+    """ Endless (looped) vibration-feed, blocks of comma-separated floats from the 'Amplitude' column of a test-data CSV. """
+    with open(path, "r", encoding="utf-8") as f:
+        next(f)     # Header.
+        amplitudes = [line.split(",")[1].strip() for line in f if line.strip()]
+    blocks = [",".join(amplitudes[i:i + block]) for i in range(0, len(amplitudes) - block + 1, block)]
+    return itertools.cycle(blocks)
+
+
+VIBRATION_BIN_BLOCK = 1000      # Samples per binary message - i.e. 10 msg/s = 10 kS/s.
+VIBRATION_BIN_RATE_HZ = 10000   # Nominal sample-rate, for the blocks' t0/dt header.
+
+
+def vibration_bin_payloads(path: str=VIBRATION_CSV, block: int=VIBRATION_BIN_BLOCK) -> object:
+    """ Endless vibration-feed as binary blocks (float32 + t0/dt header, see 'py_dash_boards.payload'). """
+    amplitudes = np.loadtxt(path, delimiter=",", skiprows=1, usecols=1, dtype=np.float32)
+    dt_ns = 1e9 / VIBRATION_BIN_RATE_HZ
+    for i in itertools.count():
+        start = (i * block) % (len(amplitudes) - block + 1)
+        yield pack_block(amplitudes[start:start + block], t0_ns=time.time_ns(), dt_ns=dt_ns)
+
+
+def capture_payloads(path: str) -> object:
+    """ Endless replay (i.e. looped) of a capture-file, one payload per line. """
+    with open(path, "r", encoding="utf-8") as f:
+        payloads = [line.rstrip("\n") for line in f if line.strip()]
+    if not payloads:
+        raise ValueError(f"Capture-file '{path}' is empty!")
+    return itertools.cycle(payloads)
+
+
+PAYLOAD_GENERATORS = {
+    "sine": sine_payloads,
+    "iss": iss_payloads,
+    "vibration": vibration_payloads,
+    "vibration-bin": vibration_bin_payloads,
+}
+
+
+# ********************************** MQTT **************************************
+
+def new_client() -> mqtt.Client:
+    try:
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)     # paho-mqtt >= 2.0
+    except AttributeError:
+        return mqtt.Client()                                    # paho-mqtt 1.x
+
+
+class Replayer:
+    """
+    Publish payloads on a topic at a (approximately) constant rate.
+    Pacing is deadline-based, so the average rate is kept even if single publish-calls are slow.
+    """
+    def __init__(self, broker_address: str, broker_port: int, topic: str, payloads: object, qos: int=0):
+        self.topic = topic
+        self.payloads = payloads
+        self.qos = qos
+        self.client = new_client()
+        self.client.connect(broker_address, broker_port)
+        self.client.loop_start()
+        self.sent = 0
+
+    def publish_for(self, rate: float, duration_s: float) -> int:
+        """
+        Publish at 'rate' messages/sec during 'duration_s' seconds.
+
+        Returns:
+            int: number of messages actually published.
+        """
+        interval = 1.0 / rate
+        t_start = time.perf_counter()
+        t_end = t_start + duration_s
+        next_deadline = t_start
+        sent = 0
+        while True:
+            t_now = time.perf_counter()
+            if t_now >= t_end:
+                break
+            if t_now < next_deadline:
+                time.sleep(min(next_deadline - t_now, t_end - t_now))
+                continue
+            # Catch up in a burst if we fell behind:
+            while next_deadline <= t_now:
+                self.client.publish(self.topic, next(self.payloads), qos=self.qos)
+                next_deadline += interval
+                sent += 1
+        self.sent += sent
+        return sent
+
+    def close(self) -> None:
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def record(broker_address: str, broker_port: int, topic: str, count: int, out_path: str) -> None:
+    """ Record 'count' payloads from a live topic into a capture-file. """
+    received = []
+
+    def on_message(client, userdata, msg):
+        received.append(msg.payload.decode("utf-8"))
+        if count <= len(received):
+            client.disconnect()
+
+    client = new_client()
+    client.on_message = on_message
+    client.connect(broker_address, broker_port)
+    client.subscribe(topic)
+    client.loop_forever()
+    #
+    with open(out_path, "w", encoding="utf-8") as f:
+        for payload in received[:count]:
+            f.write(payload.replace("\n", " ") + "\n")
+    print(f"Recorded {len(received[:count])} messages from '{topic}' into '{out_path}'.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    #
+    rec = sub.add_parser("record", help="Record a live topic into a capture-file.")
+    rec.add_argument("--broker", default="test.mosquitto.org")
+    rec.add_argument("--port", type=int, default=1883)
+    rec.add_argument("--topic", required=True)
+    rec.add_argument("--count", type=int, default=1000)
+    rec.add_argument("out_path")
+    #
+    pub = sub.add_parser("publish", help="Publish a synthetic or captured stream at fixed rate.")
+    pub.add_argument("--broker", default="localhost")
+    pub.add_argument("--port", type=int, default=1883)
+    pub.add_argument("--topic", required=True)
+    pub.add_argument("--payload", choices=sorted(PAYLOAD_GENERATORS), default="sine")
+    pub.add_argument("--capture", help="Capture-file to replay instead of synthetic payloads.")
+    pub.add_argument("--rate", type=float, default=10.0, help="Messages per second.")
+    pub.add_argument("--duration", type=float, default=10.0, help="Seconds.")
+    #
+    args = parser.parse_args()
+    if "record" == args.cmd:
+        record(args.broker, args.port, args.topic, args.count, args.out_path)
+    else:
+        payloads = capture_payloads(args.capture) if args.capture else PAYLOAD_GENERATORS[args.payload]()
+        replayer = Replayer(args.broker, args.port, args.topic, payloads)
+        n_sent = replayer.publish_for(args.rate, args.duration)
+        replayer.close()
+        print(f"Published {n_sent} messages on '{args.topic}'.")
@@ -0,0 +1,359 @@
+"""
+@file run_benchmarks.py
+
+@brief Cross-frontend benchmark: drive each MQTT dashboard example with the same replayed stream at stepped rates.
+
+Per example and rate-step the following is recorded:
+- delivered ratio (messages received by the dashboard / messages published),
+- render latency p50/p99 (MQTT receive -> render complete, from the example's 'py_dash_boards.metrics'),
+- renders per second,
+- CPU-usage and RSS memory growth of the dashboard process.
+
+The max sustainable rate is the highest step where >= 98% of the messages are delivered
+and p99 render latency stays within the latency budget - a step without renders is NOT sustainable ('no renders').
+
+Requires a local MQTT broker (e.g. 'mosquitto'), use '--spawn-broker' to start one for the run.
+Matplotlib is run w. the headless 'Agg'-backend. Web frontends render server-side without a browser,
+or w. a headless browser connected if '--browser' is given (e.g. --browser "chromium --headless=new").
+
+Usage:
+    python run_benchmarks.py --spawn-broker --rates 10,100,1000 --json results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.metrics import bucket_quantile
+
+from replay import Replayer, PAYLOAD_GENERATORS, capture_payloads
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+EXAMPLES = {
+    "matplotlib": {
+        "script": "matplotlib_ex/mplt_mqtt_ex4.py",
+        "topic": "Satellite/Iss",
+        "payload": "iss",
+    },
+    "bokeh": {
+        "script": "bokeh/bokeh_mqtt_stream_ex1.py",
+        "topic": "1/testPoints/sinus",
+        "payload": "sine",
+        "url": "http://localhost:5006/",
+    },
+    "panel_hvplot": {
+        "script": "panel_ex/hvplot_mqtt_linechart_stream.py",
+        "topic": "1/testPoints/sinus",
+        "payload": "sine",
+        "url": "http://localhost:5006/",        # NOTE: chart updates run per session, i.e. use '--browser'!
+    },
+    "panel_holoviews": {
+        "script": "panel_ex/panel_mqtt_holoviews_linechart.py",
+        "topic": "1/testPoints/sinus",
+        "payload": "sine",
+        "serve": True,                  # NOTE: app-code only runs per session, i.e. a browser is REQUIRED!
+        "url": "http://localhost:5006/panel_mqtt_holoviews_linechart",
+    },
+    "taipy": {
+        "script": "taipy_ex/taipy_mqtt_plotter.py",
+        "topic": "1/testPoints/sinus",
+        "payload": "sine",
+        "url": "http://localhost:5000/",
+    },
+}
+
+DELIVERED_RATIO_MIN = 0.98
+
+
+# ********************************** Helpers **************************************
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_prometheus(text: str) -> dict:
+    """
+    Minimal Prometheus text-format parser.
+
+    Returns:
+        dict: {(metric_name, ((label, value), ...)): float}
+    """
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name_labels, value = line.rsplit(" ", 1)
+        if "{" in name_labels:
+            name, label_str = name_labels.split("{", 1)
+            labels = []
+            for item in label_str.rstrip("}").split(","):
+                key, val = item.split("=", 1)
+                labels.append((key, val.strip('"')))
+            labels = tuple(sorted(labels))
+        else:
+            name, labels = name_labels, ()
+        samples[(name, labels)] = float(value)
+    return samples
+
+
+def scrape(port: int) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+        return parse_prometheus(resp.read().decode("utf-8"))
+
+
+def metric_sum(samples: dict, name: str) -> float:
+    return sum(value for (n, _), value in samples.items() if n == name)
+
+
+def stage_quantiles(before: dict, after: dict, stage: str, quantiles: tuple=(0.5, 0.99)) -> tuple:
+    """ Quantiles of the stage-latency histogram, for observations made between two scrapes only. """
+    def buckets_of(samples: dict) -> dict:
+        result = {}
+        for (name, labels), value in samples.items():
+            labels = dict(labels)
+            if "pdb_stage_latency_seconds_bucket" == name and stage == labels.get("stage"):
+                result[labels["le"]] = result.get(labels["le"], 0) + value
+        return result
+    #
+    b0, b1 = buckets_of(before), buckets_of(after)
+    if not b1:
+        return tuple(float("nan") for _ in quantiles)
+    bounds = sorted(float(le) for le in b1 if "+Inf" != le)
+    keys = [le for le in sorted(b1, key=lambda le: float("inf") if "+Inf" == le else float(le))]
+    cumulative = [b1[le] - b0.get(le, 0) for le in keys]
+    counts = [cumulative[0]] + [cumulative[i] - cumulative[i - 1] for i in range(1, len(cumulative))]
+    return tuple(bucket_quantile(tuple(bounds), counts, q) for q in quantiles)
+
+
+class ProcStats:
+    """ CPU-time and RSS of a process - uses 'psutil' if available, else '/proc' (Linux only). """
+    def __init__(self, pid: int):
+        self.pid = pid
+        try:
+            import psutil
+            self._proc = psutil.Process(pid)
+        except ImportError:
+            self._proc = None
+
+    def cpu_seconds(self) -> float:
+        if self._proc is not None:
+            times = self._proc.cpu_times()
+            return times.user + times.system
+        with open(f"/proc/{self.pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def rss_bytes(self) -> int:
+        if self._proc is not None:
+            return self._proc.memory_info().rss
+        with open(f"/proc/{self.pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+
+# ********************************** Benchmark **************************************
+
+def start_example(name: str, spec: dict, broker: str, broker_port: int, metrics_port: int, python_flags: tuple=()) -> subprocess.Popen:
+    script = os.path.join(REPO_ROOT, spec["script"])
+    env = dict(os.environ,
+               PDB_MQTT_BROKER=broker,
+               PDB_MQTT_PORT=str(broker_port),
+               PDB_METRICS_PORT=str(metrics_port),
+               PDB_FRAME_PORT=str(free_port()),           # Headless Matplotlib frame-server.
+               MPLBACKEND="Agg",
+               BROWSER="true")        # NOTE: keeps 'webbrowser.open()' in '.show()'-calls from launching a desktop browser!
+    if spec.get("serve"):
+        cmd = [sys.executable, *python_flags, "-m", "panel", "serve", script, "--port", "5006"]
+    else:
+        cmd = [sys.executable, *python_flags, script]
+    stderr_log = tempfile.TemporaryFile()       # NOTE: a pipe could fill up and block the example!
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(script), env=env, stdout=subprocess.DEVNULL, stderr=stderr_log)
+    proc.stderr_log = stderr_log
+    return proc
+
+
+def wait_for_metrics(port: int, proc: subprocess.Popen, timeout_s: float) -> bool:
+    t_end = time.monotonic() + timeout_s
+    while time.monotonic() < t_end:
+        if proc.poll() is not None:
+            return False
+        try:
+            scrape(port)
+            return True
+        except OSError:
+            time.sleep(0.25)
+    return False
+
+
+def run_example(name: str, spec: dict, args: argparse.Namespace) -> dict:
+    metrics_port = free_port()
+    proc = start_example(name, spec, args.broker, args.port, metrics_port)
+    browser = None
+    result = {"example": name, "script": spec["script"], "steps": [], "max_sustainable_msg_s": 0.0}
+    try:
+        if args.browser and spec.get("url"):
+            time.sleep(args.startup_delay)
+            browser = subprocess.Popen(shlex.split(args.browser) + [spec["url"]], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elif spec.get("serve"):
+            result["error"] = "needs '--browser' (app-code only runs per browser-session)"
+            return result
+        #
+        if not wait_for_metrics(metrics_port, proc, args.startup_timeout):
+            proc.stderr_log.seek(0)
+            stderr = proc.stderr_log.read().decode("utf-8", "replace")[-2000:]
+            result["error"] = f"metrics-endpoint did not come up: {stderr.strip()}"
+            return result
+        #
+        stats = ProcStats(proc.pid)
+        payloads = capture_payloads(args.capture[spec["payload"]]) if spec["payload"] in args.capture else PAYLOAD_GENERATORS[spec["payload"]]()
+        replayer = Replayer(args.broker, args.port, spec["topic"], payloads)
+        replayer.publish_for(min(args.rates), args.warmup)     # Warm-up: JIT-like caches, first renders etc.
+        time.sleep(args.settle)
+        rss_start = stats.rss_bytes()
+        #
+        for rate in args.rates:
+            before = scrape(metrics_port)
+            cpu0, rss0, t0 = stats.cpu_seconds(), stats.rss_bytes(), time.perf_counter()
+            sent = replayer.publish_for(rate, args.duration)
+            time.sleep(args.settle)
+            after = scrape(metrics_port)
+            cpu1, rss1, t1 = stats.cpu_seconds(), stats.rss_bytes(), time.perf_counter()
+            #
+            received = metric_sum(after, "pdb_messages_received_total") - metric_sum(before, "pdb_messages_received_total")
+            renders = metric_sum(after, "pdb_renders_total") - metric_sum(before, "pdb_renders_total")
+            p50, p99 = stage_quantiles(before, after, "render_complete")
+            step = {
+                "rate_msg_s": rate,
+                "sent": sent,
+                "received": int(received),
+                "delivered_ratio": received / sent if sent else 0.0,
+                "render_p50_ms": p50 * 1e3,
+                "render_p99_ms": p99 * 1e3,
+                "renders_per_s": renders / (t1 - t0),
+                "cpu_percent": 100.0 * (cpu1 - cpu0) / (t1 - t0),
+                "rss_mb": rss1 / 2**20,
+                "rss_growth_mb": (rss1 - rss0) / 2**20,
+            }
+            step["status"] = step_status(step, args.latency_budget_ms)
+            step["sustainable"] = "ok" == step["status"]
+            result["steps"].append(step)
+            print(f"  {name:16s} {rate:8.0f} msg/s: delivered={step['delivered_ratio']:.3f} p99={step['render_p99_ms']:.1f} ms cpu={step['cpu_percent']:.0f}% -> {step['status']}")
+            if step["sustainable"]:
+                result["max_sustainable_msg_s"] = rate
+            elif not args.no_early_stop:
+                break
+        result["rss_growth_total_mb"] = (stats.rss_bytes() - rss_start) / 2**20
+        replayer.close()
+    finally:
+        if browser is not None:
+            browser.terminate()
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        proc.stderr_log.close()
+    return result
+
+
+def step_status(step: dict, latency_budget_ms: float) -> str:
+    """ 'ok' (sustainable), 'dropping' (messages lost), 'no renders' (nothing to judge latency by) or 'slow' (over budget). """
+    if step["delivered_ratio"] < DELIVERED_RATIO_MIN:
+        return "dropping"
+    if 0 == step["renders_per_s"] or math.isnan(step["render_p99_ms"]):
+        return "no renders"         # NOTE: a frontend that never renders is NOT sustaining anything.
+    if step["render_p99_ms"] > latency_budget_ms:
+        return "slow"
+    return "ok"
+
+
+def format_table(results: list) -> str:
+    header = f"| {'example':16s} | {'max msg/s':>9s} | {'p50 ms':>8s} | {'p99 ms':>8s} | {'fps':>6s} | {'cpu %':>6s} | {'rss +MB':>8s} |"
+    lines = [header, "|" + "|".join("-" * (len(col)) for col in header.split("|")[1:-1]) + "|"]
+    for res in results:
+        if "error" in res:
+            lines.append(f"| {res['example']:16s} | ERROR: {res['error'][:60]}")
+            continue
+        # Report figures at the highest sustainable step (or the first step, if none was sustainable):
+        steps = [s for s in res["steps"] if s["sustainable"]] or res["steps"][:1]
+        step = steps[-1] if steps else {}
+        lines.append(
+            f"| {res['example']:16s} | {res['max_sustainable_msg_s']:9.0f} | {step.get('render_p50_ms', float('nan')):8.1f} | "
+            f"{step.get('render_p99_ms', float('nan')):8.1f} | {step.get('renders_per_s', float('nan')):6.1f} | "
+            f"{step.get('cpu_percent', float('nan')):6.0f} | {res.get('rss_growth_total_mb', float('nan')):8.1f} |"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", default=",".join(EXAMPLES), help=f"Comma-separated subset of: {', '.join(EXAMPLES)}")
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--spawn-broker", action="store_true", help="Start 'mosquitto' on '--port' for the duration of the run.")
+    parser.add_argument("--rates", default="10,50,100,500,1000,5000", help="Comma-separated message-rates [msg/s].")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per rate-step.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of warm-up at lowest rate.")
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds to wait for the dashboard to drain after each step.")
+    parser.add_argument("--latency-budget-ms", type=float, default=1000.0)
+    parser.add_argument("--startup-timeout", type=float, default=90.0)
+    parser.add_argument("--startup-delay", type=float, default=5.0, help="Seconds before a browser is pointed at a web frontend.")
+    parser.add_argument("--browser", help="Headless browser command, the URL is appended.")
+    parser.add_argument("--capture", action="append", default=[], metavar="KIND=PATH", help="Replay capture-file for payload-kind 'sine' or 'iss'.")
+    parser.add_argument("--no-early-stop", action="store_true", help="Keep stepping after the first non-sustainable rate.")
+    parser.add_argument("--json", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+    args.rates = sorted(float(r) for r in args.rates.split(","))
+    args.capture = dict(item.split("=", 1) for item in args.capture)
+    #
+    broker_proc = None
+    if args.spawn_broker:
+        if not shutil.which("mosquitto"):
+            sys.exit("ERROR: '--spawn-broker' requires 'mosquitto' in PATH!")
+        broker_proc = subprocess.Popen(["mosquitto", "-p", str(args.port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(1.0)
+    #
+    results = []
+    try:
+        for name in args.examples.split(","):
+            print(f"Benchmarking '{name}' ...")
+            results.append(run_example(name, EXAMPLES[name], args))
+    finally:
+        if broker_proc is not None:
+            broker_proc.terminate()
+    #
+    print()
+    print(format_table(results))
+    if args.json:
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "rates": args.rates,
+                "duration_s": args.duration,
+                "latency_budget_ms": args.latency_budget_ms,
+            },
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to '{args.json}'.")
@@ -0,0 +1,203 @@
+"""
+@file startup.py
+
+@brief Startup benchmark: import-time profile ('python -X importtime') and time-to-first-frame of each dashboard example.
+
+Per example the following is recorded:
+- import-time per top-level package (self-time summed over all its modules), from one '-X importtime' run,
+- time until the metrics-endpoint is up, i.e. the process is past its imports and setup ('ready'),
+- time-to-first-frame: from process spawn until the first render showing data ('pdb_first_frame_timestamp_seconds'),
+  as median over '--repeat' runs WITHOUT '-X importtime' (it adds overhead).
+A sample feed is published during startup, so a frame can be drawn as soon as the example has subscribed.
+
+Requires a local MQTT broker (e.g. 'mosquitto'), use '--spawn-broker' to start one for the run.
+Web frontends only render when a session is open - use '--browser' (e.g. --browser "chromium --headless=new"),
+the browser is started as soon as the example's URL answers.
+
+Usage:
+    python startup.py --spawn-broker --repeat 5 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from replay import Replayer, PAYLOAD_GENERATORS
+from run_benchmarks import EXAMPLES, free_port, scrape, start_example
+
+
+FEED_RATE_MSG_S = 20.0
+POLL_INTERVAL_S = 0.05
+TOP_PACKAGES = 8
+
+
+# ********************************** Helpers **************************************
+
+def parse_importtime(text: str) -> dict:
+    """
+    Sum up '-X importtime' output per top-level package.
+
+    Returns:
+        dict: {package: self-time [s]}, sorted by descending time.
+    """
+    per_package = {}
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        fields = line.split(":", 1)[1].split("|")
+        self_us, name = int(fields[0]), fields[2].strip()
+        package = name.split(".", 1)[0]
+        per_package[package] = per_package.get(package, 0.0) + self_us * 1e-6
+    return dict(sorted(per_package.items(), key=lambda item: item[1], reverse=True))
+
+
+def first_frame_time(samples: dict) -> float:
+    """ Earliest first-frame timestamp of the example's tracer(s), or 0 if none yet. """
+    values = [value for (name, _), value in samples.items() if "pdb_first_frame_timestamp_seconds" == name and 0 < value]
+    return min(values) if values else 0.0
+
+
+def url_answers(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+# ********************************** Benchmark **************************************
+
+def measure_startup(name: str, spec: dict, replayer: Replayer, args: argparse.Namespace, importtime: bool=False) -> dict:
+    """ Start the example once, and wait for its first frame (or '--timeout'). Times are relative to the spawn. """
+    metrics_port = free_port()
+    t_spawn = time.time()
+    proc = start_example(name, spec, args.broker, args.port, metrics_port, python_flags=("-X", "importtime") if importtime else ())
+    browser = None
+    result = {"ready_s": None, "first_frame_s": None}
+    try:
+        while time.time() - t_spawn < args.timeout and proc.poll() is None:
+            replayer.publish_for(FEED_RATE_MSG_S, POLL_INTERVAL_S)
+            if args.browser and spec.get("url") and browser is None and url_answers(spec["url"]):
+                browser = subprocess.Popen(shlex.split(args.browser) + [spec["url"]], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                samples = scrape(metrics_port)
+            except OSError:
+                continue
+            if result["ready_s"] is None:
+                result["ready_s"] = time.time() - t_spawn
+            t_first_frame = first_frame_time(samples)
+            if t_first_frame:
+                result["first_frame_s"] = t_first_frame - t_spawn
+                break
+    finally:
+        if browser is not None:
+            browser.terminate()
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        proc.stderr_log.seek(0)
+        stderr = proc.stderr_log.read().decode("utf-8", "replace")
+        proc.stderr_log.close()
+    if importtime:
+        result["imports_s"] = parse_importtime(stderr)
+    if result["ready_s"] is None:
+        result["error"] = "metrics-endpoint did not come up: " + "\n".join(l for l in stderr.splitlines() if not l.startswith("import time:"))[-2000:].strip()
+    return result
+
+
+def run_example(name: str, spec: dict, args: argparse.Namespace) -> dict:
+    result = {"example": name, "script": spec["script"]}
+    if spec.get("serve") and not args.browser:
+        result["error"] = "needs '--browser' (app-code only runs per browser-session)"
+        return result
+    replayer = Replayer(args.broker, args.port, spec["topic"], PAYLOAD_GENERATORS[spec["payload"]]())
+    try:
+        profile = measure_startup(name, spec, replayer, args, importtime=True)
+        if "error" in profile:
+            result["error"] = profile["error"]
+            return result
+        imports = profile["imports_s"]
+        result["import_total_s"] = sum(imports.values())
+        result["import_top"] = dict(list(imports.items())[:TOP_PACKAGES])
+        runs = [measure_startup(name, spec, replayer, args) for _ in range(args.repeat)]
+    finally:
+        replayer.close()
+    ready = [run["ready_s"] for run in runs if run["ready_s"] is not None]
+    first_frames = [run["first_frame_s"] for run in runs if run["first_frame_s"] is not None]
+    result["ready_s"] = statistics.median(ready) if ready else None
+    result["first_frame_s"] = statistics.median(first_frames) if first_frames else None
+    result["runs"] = runs
+    top = ", ".join(f"{pkg}={t * 1e3:.0f}" for pkg, t in list(result["import_top"].items())[:3])
+    print(f"  {name:16s} imports={result['import_total_s']:.2f} s ({top} ms) ready={result['ready_s']} s first-frame={result['first_frame_s']} s")
+    return result
+
+
+def format_table(results: list) -> str:
+    def sec(value: float) -> str:
+        return f"{value:8.2f}" if value is not None else f"{'-':>8s}"
+    #
+    header = f"| {'example':16s} | {'import s':>8s} | {'ready s':>8s} | {'frame s':>8s} | {'heaviest imports [ms]':40s} |"
+    lines = [header, "|" + "|".join("-" * (len(col)) for col in header.split("|")[1:-1]) + "|"]
+    for res in results:
+        if "error" in res:
+            lines.append(f"| {res['example']:16s} | ERROR: {res['error'][:60]}")
+            continue
+        top = ", ".join(f"{pkg} {t * 1e3:.0f}" for pkg, t in list(res["import_top"].items())[:4])
+        lines.append(f"| {res['example']:16s} | {sec(res['import_total_s'])} | {sec(res['ready_s'])} | {sec(res['first_frame_s'])} | {top[:40]:40s} |")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", default=",".join(EXAMPLES), help=f"Comma-separated subset of: {', '.join(EXAMPLES)}")
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--spawn-broker", action="store_true", help="Start 'mosquitto' on '--port' for the duration of the run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Time-to-first-frame runs per example (median is reported).")
+    parser.add_argument("--timeout", type=float, default=90.0, help="Max. seconds to wait for the first frame.")
+    parser.add_argument("--browser", help="Headless browser command, the URL is appended.")
+    parser.add_argument("--json", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+    #
+    broker_proc = None
+    if args.spawn_broker:
+        if not shutil.which("mosquitto"):
+            sys.exit("ERROR: '--spawn-broker' requires 'mosquitto' in PATH!")
+        broker_proc = subprocess.Popen(["mosquitto", "-p", str(args.port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(1.0)
+    #
+    results = []
+    try:
+        for name in args.examples.split(","):
+            print(f"Measuring startup of '{name}' ...")
+            results.append(run_example(name, EXAMPLES[name], args))
+    finally:
+        if broker_proc is not None:
+            broker_proc.terminate()
+    #
+    print()
+    print(format_table(results))
+    if args.json:
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to '{args.json}'.")
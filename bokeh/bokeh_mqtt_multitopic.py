@@ -0,0 +1,104 @@
+"""
+@file bokeh_mqtt_multitopic.py
+
+@brief Realtime line-chart of ANY topic below a wildcard subscription.
+Each concrete topic gets its own channel (ring buffer) - the channel shown is picked in a drop-down,
+which is updated as new topics appear. Switching channel does NOT resubscribe.
+"""
+
+from bokeh.plotting import figure
+from bokeh.models import ColumnDataSource, Select
+from bokeh.layouts import column
+from bokeh.server.server import Server
+from bokeh.palettes import Category10
+
+import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.topics import ChannelRouter
+from py_dash_boards.governor import RenderGovernor
+
+
+# Define the MQTT broker details
+broker_address = os.environ.get("PDB_MQTT_BROKER", "test.mosquitto.org")
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topics = ["1/testPoints/#", "sensors/+/vibration"]
+
+# Animation:
+RENDER_FLOOR_MS = 33        # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = 1000    # Max. interval between renders (w. new data).
+CHANNEL_CAPACITY = 5000     # Samples kept per topic.
+
+
+# *************************************** Routing *************************************************
+
+router = ChannelRouter()
+for pattern in topics:
+    router.add_route(pattern, capacity=CHANNEL_CAPACITY)
+
+# Create a MQTT client and connect to the broker
+mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port, topic=router.patterns(), msg_event_handler=router.on_message)
+
+
+# *************************************** Bokeh Setup *************************************************
+
+def modify_doc(doc):
+    source = ColumnDataSource(data=dict(x=[], y=[]))
+    p = figure(title='Real-Time MQTT Data', sizing_mode='stretch_both')
+    p.xaxis.axis_label = 'Sample no.'
+    p.yaxis.axis_label = 'Value'
+    p.line(x='x', y='y', source=source, line_width=2, line_color=Category10[10][0])
+    #
+    select = Select(title="Topic", options=sorted(router.channels()), value="")
+    # Per-session state - total sample count of selected channel at last update:
+    state = {"total": -1}
+    governor = RenderGovernor("bokeh_multitopic", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+
+    def on_select(attr, old, new):
+        state["total"] = -1         # Force full refresh.
+        governor.arrived()
+
+    def update_chart():
+        # New topics seen since last update?
+        options = sorted(router.channels())
+        if options != select.options:
+            select.options = options
+            if not select.value and options:
+                select.value = options[0]
+        #
+        channel = router.channel(select.value)
+        if channel is None:
+            return      # Nothing selected - skip.
+        governor.observe_total(channel.buffer.total)
+        if not governor.should_render():
+            return      # No new data, or too early - skip.
+        with governor.frame():
+            if 0 > state["total"]:
+                values = channel.buffer.last()
+                total = channel.buffer.total
+                source.data = dict(x=np.arange(total - len(values), total), y=values)
+            else:
+                values, total = channel.buffer.since(state["total"])
+                source.stream(dict(x=np.arange(total - len(values), total), y=values), rollover=CHANNEL_CAPACITY)
+            state["total"] = total
+
+    select.on_change("value", on_select)
+    doc.add_root(column(select, p, sizing_mode='stretch_both'))
+    doc.add_periodic_callback(update_chart, governor.tick_ms)
+
+
+# Create a Bokeh server and start it
+server = Server({'/': modify_doc}, num_procs=1)     # NOTE: on WinXX, 'num_procs' MUST be =1 !!
+
+server.start()
+
+# Start the MQTT client loop
+mqtt_client.loop_start()
+
+# Run the Bokeh server
+if __name__ == '__main__':
+    server.io_loop.add_callback(server.show, '/')
+    server.io_loop.start()
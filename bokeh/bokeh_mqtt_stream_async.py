@@ -0,0 +1,117 @@
+"""
+@file bokeh_mqtt_stream_async.py
+
+@brief Realtime line-chart showing MQTT streaming data - asyncio ingestion on the Bokeh server's own event-loop.
+Unlike 'bokeh_mqtt_stream_ex1.py' there is NO paho network-thread, so chart updates need no cross-thread hand-over.
+"""
+
+from bokeh.plotting import figure
+from bokeh.models import ColumnDataSource
+from bokeh.layouts import column
+from bokeh.server.server import Server
+from bokeh.palettes import Category10
+
+from functools import partial
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.aio import AsyncMqttIngest
+from py_dash_boards.config import setting
+from py_dash_boards.metrics import SampleTracer
+from py_dash_boards.timestamps import Timestamper, NS_PER_MS
+
+
+# Define the MQTT broker details
+broker_address = os.environ.get("PDB_MQTT_BROKER", "test.mosquitto.org")
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topic = setting("channel.topic", "1/testPoints/sinus")
+
+# Animation:
+FLUSH_LATENCY_MS = 50       # Max. time a received sample waits before being pushed to the chart(s).
+ROLLOVER_POINTS = setting("channel.buffer_points", 5000)    # Max. points kept in chart's data source.
+
+# Debug:
+DATA_STREAM_DEBUG = setting("frontend.debug", False)
+
+
+# ********************************** Helpers **************************************
+
+def get_value_from_raw(raw_data: bytes) -> float:
+    # Get value:
+    try:
+        f_val = float(raw_data)
+    except ValueError:
+        print(f"ERROR: could NOT extract FLOAT-data from raw string = '{raw_data}'")
+        f_val = 0.0
+    #
+    return f_val
+
+
+# *************************************** Bokeh Setup *************************************************
+
+# Per-session data sources - all updated from the same ingestion task:
+sessions = {}
+sample_counter = 0
+tracer = SampleTracer("bokeh_async")
+stamper = Timestamper()
+
+
+def modify_doc(doc):
+    source = ColumnDataSource(data=dict(time=[], value=[]))
+    p = figure(x_axis_type='datetime', title='Real-Time Time-Series Data (asyncio ingestion)', sizing_mode='stretch_both')
+    p.xaxis.axis_label = 'Time'
+    p.yaxis.axis_label = 'Value'
+    p.line(x='time', y='value', source=source, line_width=2, line_color=Category10[10][0])
+    doc.add_root(column(p, sizing_mode='stretch_both'))
+    #
+    sessions[doc] = source
+    doc.on_session_destroyed(lambda session_context: sessions.pop(doc, None))
+
+
+def stream_to_session(source: ColumnDataSource, line_data: dict, pending: dict) -> None:
+    """ Next-tick callback (document lock held). The batch is rendered once streamed to the LAST session. """
+    source.stream(line_data, rollover=ROLLOVER_POINTS)
+    pending["sessions"] -= 1
+    if 0 == pending["sessions"]:
+        tracer.render_complete()            # NOTE: server-side only, i.e. stream-patches are queued for the browser(s).
+
+
+async def ingest_mqtt():
+    global sample_counter
+    #
+    ingest = AsyncMqttIngest(broker_address, broker_port, topic, max_latency_s=FLUSH_LATENCY_MS / 1000)
+    await ingest.connect()
+    async for batch in ingest:
+        times = []
+        values = []
+        for _, payload, t_recv in batch:
+            tracer.msg_counter.inc()
+            sample_counter += 1
+            times.append(stamper.from_counter(t_recv) / NS_PER_MS)      # Receive-time, NOT flush-time.
+            values.append(get_value_from_raw(payload))
+            tracer.inserted(t_recv)
+        if DATA_STREAM_DEBUG:
+            print(f"Batch of {len(batch)} samples, total {sample_counter} ...")
+        #
+        # NOTE: document changes are scheduled as next-tick callbacks, i.e. applied w. the document lock held:
+        tracer.render_scheduled()
+        line_data = dict(time=times, value=values)
+        targets = list(sessions.items())
+        pending = dict(sessions=len(targets))
+        for doc, source in targets:
+            doc.add_next_tick_callback(partial(stream_to_session, source, line_data, pending))
+
+
+# Create a Bokeh server and start it
+server = Server({'/': modify_doc}, num_procs=1)     # NOTE: on WinXX, 'num_procs' MUST be =1 !!
+
+server.start()
+
+# MQTT ingestion runs as a task on the server's event-loop:
+server.io_loop.add_callback(ingest_mqtt)
+
+# Run the Bokeh server
+if __name__ == '__main__':
+    server.io_loop.add_callback(server.show, '/')
+    server.io_loop.start()
@@ -5,7 +5,6 @@
 """
 
 from bokeh.plotting import figure
-from bokeh.document import without_document_lock            # See: https://docs.bokeh.org/en/2.4.2/docs/user_guide/server.html#updating-from-unlocked-callbacks
 from bokeh.models import ColumnDataSource
 from bokeh.models.tools import HoverTool
 from bokeh.models.widgets import Div
@@ -14,14 +13,51 @@ from bokeh.server.server import Server
 from bokeh.themes import Theme
 from bokeh.palettes import Category10
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.metrics import SampleTracer, start_http_server
+from py_dash_boards.backpressure import BoundedChannel, POLICY_DECIMATE, DECIMATE_MINMAX
+from py_dash_boards.store import TimeSeriesStore
+from py_dash_boards.rollup import open_rollups, rollups_path
+from py_dash_boards.rolling import RollingOutliers
+from py_dash_boards.timestamps import Timestamper, to_epoch_ms, NS_PER_MS
+from py_dash_boards.ingest import mqtt_setup, GAP_VALUE
+from py_dash_boards.config import setting
+from py_dash_boards.governor import RenderGovernor
 
 
 # Define the MQTT broker details
-broker_address = "test.mosquitto.org"
-broker_port = 1883
-topic = "1/testPoints/sinus"
+broker_address = os.environ.get("PDB_MQTT_BROKER", "test.mosquitto.org")      # NOTE: environment overrides are used by 'benchmarks/'!
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topic = setting("channel.topic", "1/testPoints/sinus")
+
+# Animation:
+RENDER_FLOOR_MS = setting("frontend.render_floor_ms", 33)           # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = setting("frontend.render_ceiling_ms", 1000)     # Max. interval between renders (w. new data).
+ROLLOVER_POINTS = setting("channel.buffer_points", 5000)    # Max. points kept in chart's data source.
+
+# Hand-over from MQTT-thread to chart (see 'py_dash_boards.backpressure' for policies):
+CHANNEL_MAXLEN = 10000
+CHANNEL_POLICY = POLICY_DECIMATE
+
+# History - persisted, and used for backfill on restart ('None' = no persistence):
+STORE_DIR = os.path.join(os.path.expanduser("~"), ".py_dash_boards", "store")
+STORE_FLUSH_INTERVAL_S = 5.0
+ROLLUP_SAVE_INTERVAL_S = 60.0       # Rollup tiers (for 'bokeh_store_history.py') - NOTE: ~30 MB, written in the background.
+
+# Outlier detection (incremental, O(1) per sample):
+OUTLIER_WINDOW = 30
+OUTLIER_SIGMA = 3.0
+
+# Debug:
+DATA_STREAM_DEBUG = setting("frontend.debug", False)
+
+# Instrumentation - Prometheus scrape-port, or 'None' for in-process metrics only:
+METRICS_HTTP_PORT = int(os.environ["PDB_METRICS_PORT"]) if "PDB_METRICS_PORT" in os.environ else None
 
 
 # ********************************** Helpers **************************************
@@ -49,66 +85,6 @@ def get_value_from_raw(raw_data: str) -> tuple:
     return f_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
-
 # *************************************** Bokeh Setup *************************************************
 
 # Create a figure for the line chart
@@ -117,8 +93,17 @@ p.xaxis.axis_label = 'Time'
 p.yaxis.axis_label = 'Value'
 
 # Create a data source for the line chart
-source = ColumnDataSource(data=dict(time=[0.0], value=[0.0]))
-source.stream(dict(time=[1.0], value=[1.0]))
+store_channel = TimeSeriesStore(STORE_DIR).channel(topic) if STORE_DIR else None
+last_store_flush = last_rollup_save = time.monotonic()
+# Rollups are fed per sample, i.e. history charts never re-aggregate the store:
+rollups = open_rollups(store_channel) if store_channel is not None else None
+
+if store_channel is not None:
+    # Backfill w. samples from previous run(s):
+    backfill_ts, backfill_values = store_channel.last(ROLLOVER_POINTS)
+else:
+    backfill_ts, backfill_values = [], []
+source = ColumnDataSource(data=dict(time=to_epoch_ms(backfill_ts).tolist(), value=list(backfill_values)))
 
 # Create a line glyph for the line chart
 line = p.line(x='time', y='value', source=source, line_width=2, line_color=Category10[10][0])
@@ -142,22 +127,61 @@ def on_message(client, userdata, msg):
     div.text = f'Latest Value: {value}'
 """
 
-sample_counter = 0
+sample_counter = len(backfill_values)
+
+tracer = SampleTracer("bokeh")
+governor = RenderGovernor("bokeh", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+
+# Receive-time [epoch-ns] of each sample - the chart's x-values (Bokeh 'datetime'-axis = epoch-ms):
+stamper = Timestamper()
+
+# Samples (time, value) waiting to be streamed to the chart - bounded, so a slow browser/server can NOT make memory grow:
+channel = BoundedChannel("bokeh", maxlen=CHANNEL_MAXLEN, policy=CHANNEL_POLICY, decimate_mode=DECIMATE_MINMAX, value_key=lambda s: s[1])
+
+outlier_detector = RollingOutliers(window=OUTLIER_WINDOW, sigma=OUTLIER_SIGMA, history=ROLLOVER_POINTS)
 
 def update_chart(line_data: dict):
     global source
     #
     # Update the dashboard with the new data
     if source.stream:
-        print("'Source' ready - now add data to stream ...")
-        # TODO:: fix document locking!!
-        source.stream(line_data)   
+        if DATA_STREAM_DEBUG:
+            print("'Source' ready - now add data to stream ...")
+        source.stream(line_data, rollover=ROLLOVER_POINTS)
         # source.data.update(line_data)   # Same shit ...
     else:
         print("WARN: source-stream NOT set up yet!!") 
 
 
-without_document_lock(update_chart)
+def flush_chart():
+    """ Periodic document-callback, i.e. runs w. document lock held. Streams ALL pending samples in one patch. """
+    if not governor.should_render():
+        return      # No new data, or too early - skip.
+    with governor.frame():
+        tracer.render_scheduled()
+        samples = channel.drain()
+        update_chart(dict(time=[s[0] for s in samples], value=[s[1] for s in samples]))
+        if samples:
+            div.text = (f'Latest Value: {samples[-1][1]:.3f}<br>Outliers (last {ROLLOVER_POINTS}): {outlier_detector.outlier_count}'
+                        f'<br>Disconnected: {mqtt_client.manager.disconnected_seconds:.0f} sec.<br>Render: {governor.fps:.0f} fps')
+        tracer.render_complete()            # NOTE: server-side only, i.e. stream-patch is queued for the browser(s).
+
+
+def store_sample(ts_ns: int, value: float) -> None:
+    """ Persist sample - NOTE: called from the MQTT-thread only, i.e. the store has a single writer. """
+    global last_store_flush, last_rollup_save
+    #
+    if store_channel is None:
+        return
+    store_channel.append(ts_ns, value)
+    rollups.add(ts_ns, value)
+    if STORE_FLUSH_INTERVAL_S < time.monotonic() - last_store_flush:
+        store_channel.flush()
+        last_store_flush = time.monotonic()
+        # NOTE: saved after flushing, i.e. the stored samples are a superset - readers catch up from 'rollups.last_ts':
+        if ROLLUP_SAVE_INTERVAL_S < last_store_flush - last_rollup_save:
+            rollups.save_async(rollups_path(store_channel))      # NOTE: only the snapshot is taken in the MQTT-thread.
+            last_rollup_save = last_store_flush
 
 
 def on_message(client, userdata, msg):
@@ -170,27 +194,45 @@ def on_message(client, userdata, msg):
     if userdata:
         pass
     #
+    t_recv = tracer.received()
+    ts_ns = stamper.from_counter(t_recv)
     data = msg.payload.decode("utf-8")
     sine_val = get_value_from_raw(data)
-    print(f"Received data for sample-count {sample_counter}: {data}")
+    tracer.parsed(t_recv)
+    if DATA_STREAM_DEBUG:
+        print(f"Received data for sample-count {sample_counter}: {data}")
     #
     sample_counter += 1
     #
-    update_chart(dict(time=[float(sample_counter)], value=[sine_val]))
+    channel.put((ts_ns / NS_PER_MS, sine_val))
+    outlier_detector.push(sine_val)
+    store_sample(ts_ns, sine_val)
+    tracer.inserted(t_recv)
+    governor.arrived()
 
 
 # Create a MQTT client and connect to the broker
 mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port, topic=topic, msg_event_handler=on_message)
+# Broker outage - a NaN-sample breaks the line, i.e. the gap is visible instead of bridged by a straight line:
+def on_gap(t_start_ns: int, t_end_ns: int) -> None:
+    channel.put((t_start_ns / NS_PER_MS, GAP_VALUE))
+    governor.arrived()
+
+mqtt_client.manager.add_gap_listener(on_gap)
 
 
 # Define the callback function for Bokeh server initialization
 def modify_doc(doc):
     doc.add_root(column(p, div))
+    doc.add_periodic_callback(flush_chart, governor.tick_ms)
 
 # Create a Bokeh server and start it
 server = Server({'/': modify_doc}, num_procs=1)     # NOTE: on WinXX, 'num_procs' MUST be =1 !!
 
 server.start()
+
+if METRICS_HTTP_PORT is not None:
+    start_http_server(METRICS_HTTP_PORT)
     
 # Start the MQTT client loop
 mqtt_client.loop_start()
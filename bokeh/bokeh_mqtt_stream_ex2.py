@@ -4,8 +4,13 @@ import panel as pn
 from bokeh.models import ColumnDataSource
 from bokeh.plotting import figure
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.governor import RenderGovernor
 
 
 pn.extension()
@@ -17,7 +22,8 @@ broker_port = 1883
 topic = "1/testPoints/sinus"
 
 # Animation:
-UPDATE_INTERVAL_MS = 500    # 500 ms update-interval, i.e. 0.5 sec.
+RENDER_FLOOR_MS = 33        # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = 1000    # Max. interval between renders (w. new data).
 
 # Debug:
 DATA_STREAM_DEBUG = False
@@ -49,65 +55,6 @@ def get_value_from_raw(raw_data: str) -> tuple:
     return f_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
 # DATA setup:
@@ -122,6 +69,8 @@ p.line(x="x", y="y", source=source)
 bokeh_pane = pn.pane.Bokeh(p)
 bokeh_pane.servable()
 
+governor = RenderGovernor("panel_bokeh", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+
 # MQTT message callback
 def on_message(client, userdata, msg):
     #
@@ -145,7 +94,7 @@ def on_message(client, userdata, msg):
     sine_val[sample_counter] = sine_value
     print(f"sine_val = {sine_val[(sample_counter - 5):(sample_counter+5)]}")
     #
-    # PASS ...
+    governor.arrived()
     #
     if DATA_STREAM_DEBUG:
         print(f"DataFrame length is now = {len(sine_val)}")
@@ -154,12 +103,15 @@ def on_message(client, userdata, msg):
 def update_chart():
     global sine_val
     #
-    source.data.update({"y": sine_val})
-    bokeh_pane.param.trigger('object')
-    if USE_NOTEBOOK:
-        bokeh_pane.param.trigger('object') # Only needed in notebook
-    else:
-        print("Updated ...")
+    if not governor.should_render():
+        return      # No new data, or too early - skip.
+    with governor.frame():
+        source.data.update({"y": sine_val})
+        bokeh_pane.param.trigger('object')
+        if USE_NOTEBOOK:
+            bokeh_pane.param.trigger('object') # Only needed in notebook
+        else:
+            print(f"Updated ... ({governor.fps:.0f} fps)")
 
 # Create a MQTT client and connect to the broker
 mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port, topic=topic, msg_event_handler=on_message)
@@ -167,7 +119,7 @@ mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port,
 # Start the MQTT loop
 mqtt_client.loop_start()
     
-pn.state.add_periodic_callback(update_chart, UPDATE_INTERVAL_MS)
+pn.state.add_periodic_callback(update_chart, governor.tick_ms)
 
 # Create line chart
 bokeh_pane = pn.pane.Bokeh(p)
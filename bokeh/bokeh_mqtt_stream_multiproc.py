@@ -0,0 +1,78 @@
+"""
+@file bokeh_mqtt_stream_multiproc.py
+
+@brief Realtime line-chart w. ingestion and rendering in SEPARATE processes.
+One ingestion process subscribes, parses and writes into a shared-memory ring buffer,
+while N Bokeh worker processes (one per CPU-core) serve the sessions, reading the ring zero-copy.
+
+NOTE: forking Bokeh workers ('num_procs' > 1) does NOT work on WinXX!
+"""
+
+from bokeh.plotting import figure
+from bokeh.models import ColumnDataSource
+from bokeh.layouts import column
+from bokeh.server.server import Server
+from bokeh.palettes import Category10
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.shm_ring import SharedRing, start_ingest_process
+from py_dash_boards.governor import RenderGovernor
+
+
+# Define the MQTT broker details
+broker_address = os.environ.get("PDB_MQTT_BROKER", "test.mosquitto.org")
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topic = "1/testPoints/sinus"
+
+# Animation:
+RENDER_FLOOR_MS = 33        # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = 1000    # Max. interval between renders (w. new data).
+ROLLOVER_POINTS = 5000      # Max. points kept in chart's data source.
+
+# Processes:
+RING_NAME = "pdb_sinus"
+RING_CAPACITY = 100000
+NUM_WORKERS = 0             # Bokeh worker processes, 0 = one per CPU-core.
+
+
+# Ring is attached once per worker process (i.e. AFTER the fork):
+ring = None
+
+
+def modify_doc(doc):
+    global ring
+    #
+    if ring is None:
+        ring = SharedRing.attach(RING_NAME)
+    #
+    source = ColumnDataSource(data=dict(time=[], value=[]))
+    p = figure(x_axis_type='datetime', title=f'Real-Time Time-Series Data (worker pid={os.getpid()})', sizing_mode='stretch_both')
+    p.xaxis.axis_label = 'Time'
+    p.yaxis.axis_label = 'Value'
+    p.line(x='time', y='value', source=source, line_width=2, line_color=Category10[10][0])
+    doc.add_root(column(p, sizing_mode='stretch_both'))
+    # Per-session read position - start w. the most recent data:
+    state = {"total": max(0, ring.total - ROLLOVER_POINTS)}
+    governor = RenderGovernor("bokeh_multiproc", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+
+    def update_chart():
+        governor.observe_total(ring.total)
+        if not governor.should_render():
+            return      # No new data, or too early - skip.
+        with governor.frame():
+            rows, state["total"] = ring.since(state["total"])
+            source.stream(dict(time=rows[:, 0] * 1000, value=rows[:, 1]), rollover=ROLLOVER_POINTS)     # NOTE: Bokeh datetime-axis is in [ms].
+
+    doc.add_periodic_callback(update_chart, governor.tick_ms)
+
+
+if __name__ == '__main__':
+    # Ingestion process MUST be started before the Bokeh workers are forked:
+    ingest_proc = start_ingest_process(RING_NAME, broker_address, broker_port, topic, capacity=RING_CAPACITY)
+    #
+    server = Server({'/': modify_doc}, num_procs=NUM_WORKERS)
+    server.start()
+    server.io_loop.start()
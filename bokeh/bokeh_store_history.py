@@ -0,0 +1,97 @@
+"""
+@file bokeh_store_history.py
+
+@brief Long-horizon (hours .. weeks) history chart of a persisted channel, w. zoom.
+History is read from the store written by e.g. 'bokeh_mqtt_stream_ex1.py', which also maintains (and persists) the
+1s/1m/1h rollup tiers while ingesting - on startup only the samples stored since their last save are rolled up,
+afterwards the samples flushed by the ingesting process are rolled up every 'REFRESH_S' (i.e. the chart keeps up).
+On pan/zoom the coarsest tier giving at least one point per pixel is drawn as a min/max band + mean line,
+i.e. drawing cost is proportional to chart width - NOT to the number of samples in view.
+Only when zoomed in below the finest tier, raw samples are read from the store.
+"""
+
+from bokeh.plotting import figure
+from bokeh.models import ColumnDataSource
+from bokeh.models.widgets import Div
+from bokeh.layouts import column
+from bokeh.server.server import Server
+from bokeh.palettes import Category10
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.store import TimeSeriesStore
+from py_dash_boards.rollup import open_rollups, catch_up, NS_PER_S
+
+
+STORE_DIR = os.path.join(os.path.expanduser("~"), ".py_dash_boards", "store")
+CHANNEL = "1/testPoints/sinus"
+HISTORY_S = 7 * 24 * 3600           # Initial view - one week.
+DEFAULT_WIDTH_PX = 1200             # Used until the browser reports the actual plot width.
+REFRESH_S = 10                      # Roll up newly stored samples (the ingesting process flushes every 5 sec.).
+
+
+store = TimeSeriesStore(STORE_DIR)
+channel_store = store.channel(CHANNEL)
+t_now = time.time_ns()
+rollups = open_rollups(channel_store)
+last_refresh = time.monotonic()
+
+
+def refresh_rollups() -> None:
+    """ Catch up w. the samples stored by the ingesting process - at most once per 'REFRESH_S', for ALL sessions. """
+    global last_refresh
+    #
+    if time.monotonic() - last_refresh < REFRESH_S:
+        return
+    last_refresh = time.monotonic()
+    channel_store.reload()          # NOTE: written by another process - re-read its index.
+    catch_up(rollups, channel_store)
+
+
+def modify_doc(doc):
+    source = ColumnDataSource(data=dict(time=[], min=[], max=[], mean=[]))
+    p = figure(x_axis_type='datetime', title=f"History of '{CHANNEL}'", sizing_mode='stretch_both')
+    p.xaxis.axis_label = 'Time'
+    p.yaxis.axis_label = 'Value'
+    p.varea(x='time', y1='min', y2='max', source=source, fill_color=Category10[10][0], fill_alpha=0.3)
+    p.line(x='time', y='mean', source=source, line_width=1, line_color=Category10[10][0])
+    info = Div(text="")
+    doc.add_root(column(info, p, sizing_mode='stretch_both'))
+
+    def redraw(t0: int, t1: int):
+        pixels = p.inner_width or DEFAULT_WIDTH_PX
+        res = rollups.query(t0, t1, pixels)
+        if res is None:
+            ts, values = channel_store.range(t0, t1)
+            source.data = dict(time=ts / 1e6, min=values, max=values, mean=values)      # NOTE: Bokeh datetime-axis is in [ms].
+            info.text = f"Raw samples: {len(ts)}"
+            return
+        source.data = dict(time=res["start"] / 1e6, min=res["min"], max=res["max"], mean=res["mean"])
+        info.text = f"Rollup tier: {res['resolution_ns'] // NS_PER_S} s, buckets: {len(res['start'])}"
+
+    def on_range_change(attr, old, new):
+        if p.x_range.start is None or p.x_range.end is None:
+            return
+        redraw(int(p.x_range.start * 1e6), int(p.x_range.end * 1e6))
+
+    drawn = dict(last_ts=rollups.last_ts)      # Newest sample when last drawn - another session may have caught up already.
+
+    def on_refresh():
+        refresh_rollups()
+        if drawn["last_ts"] != rollups.last_ts:
+            drawn["last_ts"] = rollups.last_ts
+            on_range_change(None, None, None)
+
+    p.x_range.on_change('start', on_range_change)
+    p.x_range.on_change('end', on_range_change)
+    doc.add_periodic_callback(on_refresh, REFRESH_S * 1000)
+    redraw(t_now - HISTORY_S * NS_PER_S, t_now)
+
+
+if __name__ == '__main__':
+    server = Server({'/': modify_doc}, num_procs=1)
+    server.start()
+    server.io_loop.start()
@@ -0,0 +1,101 @@
+"""
+@file bokeh_vibration_spectrogram.py
+
+@brief Realtime spectrogram (waterfall) of a vibration feed over MQTT.
+Each message is a block of samples - binary or comma-separated text (see 'py_dash_boards.payload').
+Blocks go straight into a streaming STFT (batched FFTs), and the periodic callback replaces the 'image' glyph's data w. the rolling waterfall - only if new columns arrived.
+
+Test feed (10 kS/s, from 'test_data/'):
+    python ../benchmarks/replay.py publish --broker localhost --topic vibration/sensor1 --payload vibration --rate 100 --duration 600
+    python ../benchmarks/replay.py publish --broker localhost --topic vibration/sensor1 --payload vibration-bin --rate 10 --duration 600
+"""
+
+from bokeh.plotting import figure
+from bokeh.models import ColumnDataSource, LinearColorMapper, ColorBar
+from bokeh.models.widgets import Div
+from bokeh.layouts import column
+from bokeh.server.server import Server
+from bokeh.palettes import Viridis256
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.config import setting
+from py_dash_boards.governor import RenderGovernor
+from py_dash_boards.payload import decode_values
+from py_dash_boards.stft import StreamingSTFT
+
+
+# Define the MQTT broker details
+broker_address = os.environ.get("PDB_MQTT_BROKER", "localhost")      # NOTE: environment overrides are used by 'benchmarks/'!
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topic = setting("channel.topic", "vibration/sensor1")
+
+# Signal:
+SAMPLE_RATE_HZ = setting("channel.sample_rate_hz", 10000)    # Nominal sample-rate of the feed.
+NFFT = 1024                 # FFT-length, i.e. ~10 Hz resolution at 10 kS/s.
+HOP = 256                   # 75% overlap.
+N_COLUMNS = 400             # Waterfall width, i.e. ~10 sec. at 10 kS/s.
+DB_RANGE = (-100.0, 0.0)    # Color-scale [dB].
+
+# Animation:
+RENDER_FLOOR_MS = setting("frontend.render_floor_ms", 100)          # Min. interval between renders - the image is large, max. ~10 fps.
+RENDER_CEILING_MS = setting("frontend.render_ceiling_ms", 1000)     # Max. interval between renders (w. new data).
+
+
+stft = StreamingSTFT(fs=SAMPLE_RATE_HZ, nfft=NFFT, hop=HOP, n_columns=N_COLUMNS)
+x0, x1, y0, y1 = stft.extent()
+
+
+def on_message(client, userdata, msg):
+    try:
+        block = decode_values(msg.payload)
+    except ValueError:
+        print(f"ERROR: could NOT extract FLOAT-block from payload on '{msg.topic}'")
+        return
+    stft.push(block)
+
+
+# Create a MQTT client and connect to the broker
+mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port, topic=topic, msg_event_handler=on_message)
+
+
+# Define the callback function for Bokeh server initialization
+def modify_doc(doc):
+    source = ColumnDataSource(data=dict(image=[stft.waterfall(copy=True)]))
+    p = figure(title=f"Spectrogram of '{topic}'", x_range=(x0, x1), y_range=(y0, y1), sizing_mode='stretch_both')
+    p.xaxis.axis_label = 'Time [s]'
+    p.yaxis.axis_label = 'Frequency [Hz]'
+    color_mapper = LinearColorMapper(palette=Viridis256, low=DB_RANGE[0], high=DB_RANGE[1])
+    p.image(image='image', x=x0, y=y0, dw=x1 - x0, dh=y1 - y0, source=source, color_mapper=color_mapper)
+    p.add_layout(ColorBar(color_mapper=color_mapper, title='[dB]'), 'right')
+    div = Div(text='', width=300, height=30)
+    doc.add_root(column(p, div, sizing_mode='stretch_both'))
+    governor = RenderGovernor("bokeh_spectrogram", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+    governor.observe_total(stft.total_columns)
+
+    def update_image():
+        governor.observe_total(stft.total_columns)
+        if not governor.should_render():
+            return      # No new columns, or too early - skip.
+        with governor.frame():
+            # NOTE: copy - the STFT is fed from the MQTT-thread, and Bokeh serializes the array after this callback:
+            source.data = dict(image=[stft.waterfall(copy=True)])
+            div.text = f'Columns: {stft.total_columns} ({governor.fps:.0f} fps)'
+
+    doc.add_periodic_callback(update_image, governor.tick_ms)
+
+# Create a Bokeh server and start it
+server = Server({'/': modify_doc}, num_procs=1)     # NOTE: on WinXX, 'num_procs' MUST be =1 !!
+
+server.start()
+
+# Start the MQTT client loop
+mqtt_client.loop_start()
+
+# Run the Bokeh server
+if __name__ == '__main__':
+    server.io_loop.add_callback(server.show, '/')
+    server.io_loop.start()
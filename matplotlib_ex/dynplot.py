@@ -1,22 +1,28 @@
 """
 @file dynplot.py
 
-@brief Implement dynamic plot update w. Matplotlib. 
-Plot is refreshed whenever dynplot.plot() is called.
+@brief Implement dynamic plot update w. Matplotlib.
+Plot is refreshed whenever dynplot.plot() (or scatter/fill_between/imshow) is called, followed by dynplot.show().
 """
 
+import threading
+import time
+
 import matplotlib.pyplot as plt
-from functools import partialmethod
+import numpy as np
+
+
+EVENT_POLL_S = 0.05         # GUI-events are processed at least this often while waiting for data.
 
 
 class dynplot():
-    """Extends matplotlib's pyplot.plot() to allow for repetitive plotting
+    """Extends matplotlib's pyplot to allow for repetitive plotting
 
         There is no simple way to update multiple lines repetitively and
         continuously of an existing figure in
         `matplotlib <https://matplotlib.org/>`_. Using this class as drop-in
-        replacement for matplotlib's pyplot, the figure's line will be
-        updated upon every call of the ``plot()`` method and create thus a
+        replacement for matplotlib's pyplot, the figure's artists will be
+        updated upon every call of a plotting method and create thus a
         dynamic plot, constantly refreshing.
 
         :ivar fig: ``matplotlib.figure.Figure`` instance of the figure
@@ -26,9 +32,20 @@ class dynplot():
 
         >>> dplt = dynplot()
 
+        Supported functions (first call creates the artists, following calls
+        update them in place):
+
+        - ``plot(x, y, ...)`` - also 3D lines ``plot(x, y, z, ...)`` if
+          created w. ``projection='3d'``
+        - ``scatter(x, y, c=None, s=None)``
+        - ``fill_between(x, y1, y2)``
+        - ``imshow(A)`` - e.g. spectrogram waterfalls
+
+        NumPy arrays are handed to the artists as-is, i.e. never converted to
+        lists or copied here (only scatter-offsets must be stacked).
+
         Current limitations:
 
-        - Only the ``plot`` function is supported.
         - The figure and axes are only configurable via the internal ``fig``
           and ``ax`` attribute, i.e. the following call will _fail_:
 
@@ -38,7 +55,7 @@ class dynplot():
 
           >>> _ = dplt.ax.set_title('Will work!')
 
-        Example:
+        Example (polling):
 
         >>> from dynplot import dynplot
         >>> from math import sin, pi
@@ -51,83 +68,134 @@ class dynplot():
         >>>     _ = dplt.ax.set_title('Wave')
         >>>     dplt.show()
 
-        :param refresh_rate: Refresh rate (in seconds), has a lower limit
-                             given by the processing power of your machine
+        Example (event-driven, e.g. from an MQTT-thread):
+
+        >>> data_ready = threading.Event()      # Set by the ingestion thread.
+        >>> dplt.run(data_ready, lambda d: d.plot(xs, ys))
+
+        :param refresh_rate: Refresh rate (in seconds), i.e. minimum time
+                             between two redraws - has a lower limit given by
+                             the processing power of your machine
         :type refresh_rate: float
+        :param projection: Axes projection, e.g. ``'3d'``
+        :type projection: str
     """
 
-    # TODO: Add and test more plotting functions
-    supported_fcns = ['plot']
+    supported_fcns = ['plot', 'scatter', 'fill_between', 'imshow']
 
-    def __init__(self, refresh_rate=0.1):
+    def __init__(self, refresh_rate=0.1, projection=None):
         # Configure object
         self.refresh_rate = refresh_rate
 
         # Create figure and axis
-        self.fig, self.ax = plt.subplots()
+        if projection is None:
+            self.fig, self.ax = plt.subplots()
+        else:
+            self.fig = plt.figure()
+            self.ax = self.fig.add_subplot(111, projection=projection)
+        self._is_3d = '3d' == getattr(self.ax, 'name', '')
 
         # Set axis to auto-scale
         self.ax.set_autoscaley_on(True)
 
         self._initialized = False
-        self._crnt_line = 0
-
-    def _update(self, fcn, *args, **kwargs):
-         # Create initial lines upon first calls
-        if not self._initialized:
-            lines = getattr(self.ax, fcn)(*args, **kwargs)
-
-            # Verify if not consecutive call, adding multiple lines in
-            # multiple steps (i.e. multiple calls of plot() before call to
-            # show())
-            if not hasattr(self, 'lines') or not self.lines:
-                # create list if only one line existing
-                if not isinstance(lines, list):
-                    lines = [lines]
-
-                self.lines = lines
+        self._artists = {fcn: [] for fcn in self.supported_fcns}
+        self._crnt = {fcn: 0 for fcn in self.supported_fcns}
+        self._setters = {}
+        self._last_draw = 0.0
+        self._shown = False
+        self.frames_drawn = 0
+
+        # Prebuilt dispatch table - NO per-call lookup of update-methods:
+        self._updaters = {
+            'plot': self._update_lines,
+            'scatter': self._update_scatter,
+            'fill_between': self._update_fill,
+            'imshow': self._update_image,
+        }
+
+    @property
+    def lines(self):
+        return self._artists['plot']
+
+    # ***************************** Artist updates *****************************
+
+    def _set_attributes(self, artist, kwargs):
+        """ Apply kwargs (e.g. color=..) via cached setter-functions - keyed by artist CLASS, i.e. never stale """
+        for key, value in kwargs.items():
+            setter = self._setters.get((type(artist), key))
+            if setter is None:
+                setter = getattr(type(artist), 'set_' + key)
+                self._setters[(type(artist), key)] = setter
+            setter(artist, value)
+
+    def _next_ids(self, fcn, count):
+        """ Artists to update - cycles through them if fewer than existing are given (as 'plot()' always did) """
+        n_artists = len(self._artists[fcn])
+        if count >= n_artists:
+            self._crnt[fcn] = 0
+            return range(n_artists)
+        start = self._crnt[fcn]
+        self._crnt[fcn] = (start + count) % n_artists
+        return [(start + i) % n_artists for i in range(count)]
+
+    def _update_lines(self, *args, **kwargs):
+        # Skip line styling indications (format strings) in *args:
+        data = [arg for arg in args if not isinstance(arg, str)]
+        dims = 3 if self._is_3d else 2
+        if len(data) == 1:
+            line = self._artists['plot'][self._next_ids('plot', 1)[0]]
+            line.set_ydata(data[0])
+            self._set_attributes(line, kwargs)
+            return
+        for i, line_id in enumerate(self._next_ids('plot', len(data) // dims)):
+            line = self._artists['plot'][line_id]
+            if 3 == dims:
+                line.set_data_3d(data[3*i], data[3*i+1], data[3*i+2])
             else:
-                for line in lines:
-                    self.lines.append(line)
-
-        # Reuse existing lines upon following calls
+                line.set_data(data[2*i], data[2*i+1])
+            self._set_attributes(line, kwargs)
+
+    def _update_scatter(self, x, y, c=None, s=None, **kwargs):
+        collection = self._artists['scatter'][self._next_ids('scatter', 1)[0]]
+        collection.set_offsets(np.column_stack((x, y)))
+        if c is not None:
+            collection.set_array(c)
+        if s is not None:
+            collection.set_sizes(s)
+        self._set_attributes(collection, kwargs)
+
+    def _update_fill(self, x, y1, y2=0, **kwargs):
+        fill_id = self._next_ids('fill_between', 1)[0]
+        collection = self._artists['fill_between'][fill_id]
+        if hasattr(collection, 'set_data'):
+            collection.set_data(x, y1, y2)          # NOTE: Matplotlib >= 3.10 ('FillBetweenPolyCollection').
         else:
-            # Remove possible line styling indications from *args
-            args = list(filter(lambda x: not isinstance(x, str), args))
-
-            # Create set of lines to be updated
-            if len(args) == 1:
-                nbr_lines = 1
-                single_line = True
-            else:
-                nbr_lines = len(args) // 2
-                single_line = False
-
-            # Only update parts of the lines
-            if len(self.lines) > 1 and nbr_lines < len(self.lines):
-                line_ids = list(range(self._crnt_line,
-                                      self._crnt_line + nbr_lines))
-                line_ids = [i % len(self.lines) for i in line_ids]
-
-                self._crnt_line = (line_ids[-1] + 1) % len(self.lines)
+            # Older Matplotlib - polygon can NOT be updated, so replace it (keeping its style):
+            facecolor = collection.get_facecolor()
+            collection.remove()
+            collection = self.ax.fill_between(x, y1, y2, facecolor=facecolor)
+            self._artists['fill_between'][fill_id] = collection
+        self._set_attributes(collection, kwargs)
+
+    def _update_image(self, A, **kwargs):
+        image = self._artists['imshow'][self._next_ids('imshow', 1)[0]]
+        image.set_data(A)
+        self._set_attributes(image, kwargs)
+
+    def _create(self, fcn, *args, **kwargs):
+        artists = getattr(self.ax, fcn)(*args, **kwargs)
+        if not isinstance(artists, list):
+            artists = [artists]
+        # Consecutive calls (i.e. multiple calls of plot() before call to show()) add artists:
+        self._artists[fcn].extend(artists)
+        return artists
 
-            # Update all lines
-            else:
-                line_ids = list(range(0, len(self.lines)))
-                self._crnt_line = 0
-
-            # Apply changes to set of lines to be updated
-            for i, line_id in enumerate(line_ids):
-                # Set line values
-                if single_line:
-                    self.lines[line_id].set_ydata(args[i])
-                else:
-                    self.lines[line_id].set_xdata(args[2*i])
-                    self.lines[line_id].set_ydata(args[2*i+1])
-
-                # Set line attributes if existing
-                for key, value in kwargs.items():
-                    getattr(self.lines[line_id], 'set_' + key)(value)
+    def _update(self, fcn, *args, **kwargs):
+        # Create initial artists upon first calls, reuse existing ones upon following calls
+        if not self._initialized or not self._artists[fcn]:
+            return self._create(fcn, *args, **kwargs)
+        self._updaters[fcn](*args, **kwargs)
 
     def __getattr__(self, name):
         if name in self.supported_fcns:
@@ -136,6 +204,13 @@ class dynplot():
                 return self._update(name, *args, **kwargs)
 
             return wrapper
+        raise AttributeError(name)
+
+    # ***************************** Refresh *****************************
+
+    def due(self):
+        """ True if 'refresh_rate' has passed since last redraw """
+        return time.monotonic() - self._last_draw >= self.refresh_rate
 
     def show(self, permanent=False, *args, **kwargs):
         """Displays figure
@@ -144,23 +219,82 @@ class dynplot():
             if ``permanent`` is ``True`` forwards the call to
              ``matplotlib.pyplot.show()``
 
+            Redraws are limited to one per ``refresh_rate`` - a call coming
+            earlier processes GUI-events until the refresh-slot is due.
+
              :param permanent: Don't update or refresh plot
              :type permanent: bool
         """
         self._initialized = True
 
+        if permanent:
+            self._redraw()
+            plt.show(*args, **kwargs)
+            return
+
+        # Governor - wait (w. GUI responsive) for the next refresh-slot:
+        remaining = self.refresh_rate - (time.monotonic() - self._last_draw)
+        if remaining > 0:
+            self.fig.canvas.start_event_loop(remaining)
+
+        self._redraw()
+
+    def _redraw(self):
         # Rescale
-        self.ax.relim()
-        self.ax.autoscale_view()
+        if self.ax.get_autoscale_on() or self.ax.get_autoscaley_on():
+            self.ax.relim()
+            self.ax.autoscale_view()
 
         # Draw and flush
-        self.fig.canvas.draw()
+        self.fig.canvas.draw_idle()
+        if not self._shown:
+            plt.show(block=False)
+            self._shown = True
         self.fig.canvas.flush_events()
-
-        if permanent:
-            plt.show(*args, **kwargs)
-        else:
-            plt.pause(self.refresh_rate)
+        self._last_draw = time.monotonic()
+        self.frames_drawn += 1
+
+    def run(self, data_ready, update, stop=None, idle_update_s=None):
+        """Event-driven refresh loop (instead of polling)
+
+            Waits for ``data_ready`` (a ``threading.Event`` set by the
+            ingestion thread), calls ``update(self)`` to pass new data to the
+            artists, and redraws - at most once per ``refresh_rate``. Runs
+            until the figure is closed or ``stop`` (``threading.Event``) is set.
+
+            With ``idle_update_s`` set, ``update(self)`` is also called when no
+            data arrived for that long - e.g. to release data held back by the
+            producer (see ``ReorderBuffer.drain()``). If ``update`` returns
+            ``False``, nothing changed and the redraw is skipped.
+
+             :param data_ready: Set by producer whenever new data is available
+             :type data_ready: threading.Event
+             :param update: Callback ``update(dplt)`` - e.g. calls ``plot()``
+             :type update: callable
+             :param idle_update_s: Update interval (in seconds) w.o. new data
+             :type idle_update_s: float
+        """
+        stop = stop or threading.Event()
+        self._initialized = True
+        last_update = time.monotonic()
+        while not stop.is_set() and plt.fignum_exists(self.fig.number):
+            # Keep the GUI responsive while waiting for data:
+            if not data_ready.wait(timeout=EVENT_POLL_S):
+                if idle_update_s is not None and time.monotonic() - last_update >= idle_update_s:
+                    last_update = time.monotonic()
+                    if update(self) is not False:
+                        self._redraw()
+                        continue
+                self.fig.canvas.flush_events()
+                continue
+            # Governor - at most one redraw per 'refresh_rate', data arriving meanwhile is batched:
+            remaining = self.refresh_rate - (time.monotonic() - self._last_draw)
+            if remaining > 0:
+                self.fig.canvas.start_event_loop(remaining)
+            data_ready.clear()
+            last_update = time.monotonic()
+            if update(self) is not False:
+                self._redraw()
 
 
 # Helper Instance
@@ -4,7 +4,7 @@
 @brief Graphing ISS spaceship's position and velocity data w. Matplotlib/'dynplot'.
 @ref https://github.com/lorenzschmid/dynplot
 
-Position is shown in 3D-map. Update is *FORCED* in 'on_message' callback.
+Position is shown in 3D-map. Plot is updated (event-driven) when 'on_message' signals new data.
 The position/velocity data is in the following JSON format:
 {
     "name":"ISS (ZARYA)",
@@ -33,12 +33,20 @@ from dynplot import dynplot
 #import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from mpl_toolkits.mplot3d import Axes3D         # For 3D-plot.
+from trajectory3d import TrackBuffer
 
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
+import threading
 from math import sin, cos 
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.timestamps import to_epoch_ns, to_iso, NS_PER_S
+from py_dash_boards.reorder import ReorderBuffer
+from py_dash_boards.ingest import mqtt_setup
+
 EARTH_RADIUS_KM = 6371         # Earth's radius in [km].
 
 # Define the MQTT broker details
@@ -156,86 +164,24 @@ def get_3d_vector(lat: float, lon: float, alt: float, radius: float=EARTH_RADIUS
     return x, y, z
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
-xs = []
-ys = []
-zs = []
+MAX_POINTS = 10000          # Track-length kept (and drawn).
+REFRESH_RATE_S = 0.5        # Max. one redraw per 0.5 sec.
+LATENESS_S = 5              # Late (e.g. redelivered) positions are re-sorted within this window - see 'py_dash_boards.reorder'.
+
+# Track in a preallocated (double-write) ring - artists get views of it, appending never shifts the array:
+track = TrackBuffer(window=MAX_POINTS)
 sample_counter = 0
+reorder = ReorderBuffer(lateness_ns=LATENESS_S * NS_PER_S, name="iss")      # MQTT-thread -> GUI-thread, sorted + de-duplicated.
+data_ready = threading.Event()      # Set by MQTT-thread, i.e. the plot is updated event-driven (NOT by polling).
 
-dplt = dynplot()
-#fig = dplt.figure()
-#fig.add_subplot(111, projection="3d")
-#
-#ax1 = fig.gca()
-#ax1.set_xlabel('longitude')
-#ax1.set_ylabel('latitude')
-#ax1.set_label('altitude')
-#ax1.plot(xs, ys, zs)
-#ax1.legend()
+dplt = dynplot(refresh_rate=REFRESH_RATE_S, projection="3d")
+dplt.ax.set_xlabel('longitude')
+dplt.ax.set_ylabel('latitude')
+dplt.ax.set_zlabel('altitude')
 
 def on_message(client, userdata, msg):
-    #
-    global sample_counter, xs, ys, zs
     #
     if client:
         pass
@@ -244,25 +190,33 @@ def on_message(client, userdata, msg):
         pass
     #
     data = msg.payload.decode("utf-8")
-    print(f"Received data for sample-count {sample_counter}: {data}")
+    if DATA_STREAM_DEBUG:
+        print(f"Received data for sample-count {sample_counter}: {data}")
     # Get GEOPOS-data:
     time_stamp, lat, lon, alt = get_position(data)
     # Convert to 3D-coordinates:
     x, y, z = get_3d_vector(lat, lon, alt)
     #
-    sample_counter += 1
+    reorder.push(msg.topic, to_epoch_ns(time_stamp), (x, y, z))
+    data_ready.set()
+
+
+def redraw(dplt) -> bool:
+    """
+    Runs in the GUI-thread when new data is ready (at most once per 'REFRESH_RATE_S'), and when the feed is idle -
+    i.e. positions held back for re-ordering are released also if NO further message arrives. False if nothing changed.
+    """
+    global sample_counter
     #
-    xs.append(x)
-    ys.append(y)
-    zs.append(z)
-    # Update plot:
-    #ax1.clear()
-    #ax1.plot(xs, ys, zs)
-    #dplt.plot(xs, ys)
-    # ax1.redraw_in_frame()     <-- NOTE: redundant! Unless xyz-axis MIN/MAX-values has been established upon plot creation, and dynamic re-scaling is NOT required!!
-    #fig.canvas.draw()           # Forced UPDATE of plot!
-    #fig.canvas.flush_events()
-    #dplt.show()
+    ts, points = reorder.drain()
+    if 0 == len(ts):
+        return False        # Nothing released (yet) - held back for re-ordering.
+    track.store([(x, y, z, int(ts_ns)) for ts_ns, (x, y, z) in zip(ts, points)])
+    sample_counter += len(ts)
+    _ = dplt.ax.set_title(f'ISS spaceship trajectory @ {to_iso(track.latest_ts)} UTC')
+    xyz = track.view()
+    dplt.plot(xyz[0], xyz[1], xyz[2])       # NOTE: re-scaled by 'dplt' on redraw.
+    return True
 
 
 # Create a MQTT client and connect to the broker
@@ -271,21 +225,9 @@ mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port,
 # Start the MQTT client loop
 mqtt_client.loop_start()
 
-#dplt.plot(xs, ys)
 _ = dplt.ax.set_title('ISS spaceship trajectory')
-# Then show plot:
-#dplt.show()
-
-import time
-
-sample_counter_prev = 0
-#
-for _ in range(100):
-    if sample_counter_prev != sample_counter:
-        sample_counter_prev = sample_counter
-        dplt.plot(xs, ys)
-        dplt.show()
-    else:
-        time.sleep(1)
- 
+# Then show plot - until the window is closed:
+dplt.run(data_ready, redraw, idle_update_s=REFRESH_RATE_S)
+
+mqtt_client.loop_stop()
 print("DONE ...")
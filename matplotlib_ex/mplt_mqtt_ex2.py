@@ -8,20 +8,43 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib import style
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.backpressure import BoundedChannel, POLICY_DECIMATE, DECIMATE_MINMAX
+from py_dash_boards.frameserver import FrameRenderer, serve_frames
+from py_dash_boards.timestamps import Timestamper, break_gaps, to_datetime64, NS_PER_S
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.config import setting
+from py_dash_boards.governor import RenderGovernor
 
 
 # Define the MQTT broker details
 broker_address = "test.mosquitto.org"
 broker_port = 1883
-topic = "1/testPoints/sinus"
+topic = setting("channel.topic", "1/testPoints/sinus")
 
 # Animation:
-UPDATE_INTERVAL_MS = 500    # 500 ms update-interval, i.e. 0.5 sec.
+RENDER_FLOOR_MS = setting("frontend.render_floor_ms", 33)           # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = setting("frontend.render_ceiling_ms", 1000)     # Max. interval between renders (w. new data).
+
+PLOT_HISTORY = setting("channel.buffer_points", 2000)    # Max. points shown.
+MAX_GAP_NS = 5 * NS_PER_S   # Longer receive-pauses are shown as a break in the line.
+
+# Hand-over from MQTT-thread to plot (see 'py_dash_boards.backpressure' for policies):
+CHANNEL_MAXLEN = 10000
+CHANNEL_POLICY = POLICY_DECIMATE
+
+# Headless (Agg backend) - frames are served over HTTP (MJPEG stream + snapshots) on this port:
+FRAME_HTTP_PORT = int(os.environ.get("PDB_FRAME_PORT", 8090))
 
 # Debug:
-DATA_STREAM_DEBUG = False
+DATA_STREAM_DEBUG = setting("frontend.debug", False)
  
 # style.use('fivethirtyeight')      # Optional ...
 
@@ -51,81 +74,25 @@ def get_value_from_raw(raw_data: str) -> tuple:
     return f_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0, props: any=None):
-        if client:
-            pass
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-        #
-        if props:
-            pass
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client(callback_api_version=mqtt.CallbackAPIVersion.VERSION2)
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
 
 fig = plt.figure()
 ax1 = fig.add_subplot(1,1,1)
 
-xs = []
-ys = []
+xs = deque(maxlen=PLOT_HISTORY)
+ys = deque(maxlen=PLOT_HISTORY)
 sample_counter = 0
-sample_counter_prev = 0
+
+# Samples (x, y) waiting to be plotted - bounded, so a slow GUI can NOT make memory grow:
+# Samples are (receive-time [epoch-ns], value), i.e. the x-axis is real time:
+stamper = Timestamper()
+channel = BoundedChannel("matplotlib", maxlen=CHANNEL_MAXLEN, policy=CHANNEL_POLICY, decimate_mode=DECIMATE_MINMAX, value_key=lambda s: s[1])
+governor = RenderGovernor("matplotlib", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
 
 def on_message(client, userdata, msg):
     #
-    global sample_counter, xs, ys
+    global sample_counter
     #
     if client:
         pass
@@ -133,14 +100,16 @@ def on_message(client, userdata, msg):
     if userdata:
         pass
     #
+    ts_ns = stamper.now()
     data = msg.payload.decode("utf-8")
     sine_val = get_value_from_raw(data)
-    print(f"Received data for sample-count {sample_counter}: {data}")
+    if DATA_STREAM_DEBUG:
+        print(f"Received data for sample-count {sample_counter}: {data}")
     #
     sample_counter += 1
     #
-    xs.append(sample_counter)
-    ys.append(sine_val)
+    channel.put((ts_ns, sine_val))
+    governor.arrived()
 
 
 # Create a MQTT client and connect to the broker
@@ -148,27 +117,38 @@ mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port,
 
 
 def animate(i):
-    global xs, ys, sample_counter, sample_counter_prev
+    global xs, ys
     #
-    if 0 != i and 0 == i % 10:
-        print(f"Update {i} ...")
+    if DATA_STREAM_DEBUG and 0 != i and 0 == i % 10:
+        print(f"Update {i} ... (dropped={channel.dropped_counter.value}, decimated={channel.decimated_counter.value})")
     #
-    if sample_counter != sample_counter_prev:
+    samples = channel.drain()
+    if samples:
+        xs.extend(s[0] for s in samples)
+        ys.extend(s[1] for s in samples)
+        ts, values = break_gaps(np.fromiter(xs, dtype=np.int64, count=len(xs)), np.fromiter(ys, dtype=np.float64, count=len(ys)), MAX_GAP_NS)
         ax1.clear()
-        ax1.plot(xs, ys)
-        sample_counter_prev = sample_counter
+        ax1.plot(to_datetime64(ts), values)       # NOTE: datetime64 - Matplotlib picks a date-axis w. matching tick-format.
+        return True
     else:
         if DATA_STREAM_DEBUG:
             print("No new data ...")
         else:
             pass
+    return False        # I.e. nothing to draw.
 
 
-_ = animation.FuncAnimation(fig, animate, interval=UPDATE_INTERVAL_MS)    # NOTE: 'animation'-object is NOT used elsewhere, i.e. does NOT need a name!
+_ = animation.FuncAnimation(fig, governor.wrap(animate), interval=governor.tick_ms)    # NOTE: 'animation'-object is NOT used elsewhere, i.e. does NOT need a name!
 
 # Start the MQTT client loop
 mqtt_client.loop_start()
 
 # Then show plot:
-plt.show()
+if "agg" == plt.get_backend().lower():
+    # Headless - ONE render loop, shared by all viewers of 'http://<host>:FRAME_HTTP_PORT/':
+    renderer = FrameRenderer(fig, update=animate, governor=governor)
+    serve_frames(renderer, FRAME_HTTP_PORT)
+    renderer.run()
+else:
+    plt.show()
 
@@ -31,8 +31,17 @@ import matplotlib.animation as animation
 from matplotlib import style
 
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.timestamps import to_epoch_ns, break_gaps, NS_PER_S
+from py_dash_boards.reorder import ReorderBuffer
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.governor import RenderGovernor
 
 
 # Define the MQTT broker details
@@ -41,7 +50,10 @@ broker_port = 1883
 topic = "Satellite/Iss"
 
 # Animation:
-UPDATE_INTERVAL_MS = 500    # 500 ms update-interval, i.e. 0.5 sec.
+RENDER_FLOOR_MS = 33        # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = 1000    # Max. interval between renders (w. new data).
+MAX_GAP_S = 30              # Longer pauses between positions (payload timestamps) break the track.
+LATENESS_S = 5              # Late (e.g. redelivered) positions are re-sorted within this window - see 'py_dash_boards.reorder'.
 
 # Debug:
 DATA_STREAM_DEBUG = False
@@ -126,79 +138,23 @@ def get_position(raw_data: str) -> tuple:
     return t_stamp, lat_val, lon_val, alt_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
 
 fig = plt.figure()
 ax1 = fig.add_subplot(1,1,1)
 
+# Positions are re-sorted/de-duplicated by payload timestamp, and appended to the lists (GUI-thread only) when released:
+reorder = ReorderBuffer(lateness_ns=LATENESS_S * NS_PER_S, name="iss")
+governor = RenderGovernor("matplotlib_iss_2d", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+ts = []     # Payload timestamps [epoch-ns].
 xs = []
 ys = []
 sample_counter = 0
-sample_counter_prev = 0
 
 def on_message(client, userdata, msg):
     #
-    global sample_counter, xs, ys
+    global sample_counter
     #
     if client:
         pass
@@ -214,8 +170,8 @@ def on_message(client, userdata, msg):
     #
     sample_counter += 1
     #
-    xs.append(lon)
-    ys.append(lat)
+    reorder.push(msg.topic, to_epoch_ns(time_stamp), (lon, lat))
+    governor.arrived()
 
 
 # Create a MQTT client and connect to the broker
@@ -223,23 +179,27 @@ mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port,
 
 
 def animate(i):
-    global xs, ys, sample_counter, sample_counter_prev
-    #
     if 0 != i and 0 == i % 10:
         print(f"Update {i} ...")
     #
-    if sample_counter != sample_counter_prev:
+    new_ts, positions = reorder.drain()
+    if len(new_ts):
+        ts.extend(new_ts.tolist())
+        xs.extend(lon for lon, _ in positions)
+        ys.extend(lat for _, lat in positions)
+        _, lon_lat = break_gaps(ts, np.column_stack((xs, ys)), MAX_GAP_S * NS_PER_S)
         ax1.clear()
-        ax1.plot(xs, ys)
-        sample_counter_prev = sample_counter
+        ax1.plot(lon_lat[:, 0], lon_lat[:, 1])
+        return True
     else:
         if DATA_STREAM_DEBUG:
             print("No new data ...")
         else:
             pass
+    return False        # I.e. nothing to draw (yet) - see 'RenderGovernor.wrap()'.
 
 
-_ = animation.FuncAnimation(fig, animate, interval=UPDATE_INTERVAL_MS)    # NOTE: 'animation'-object is NOT used elsewhere, i.e. does NOT need a name!
+_ = animation.FuncAnimation(fig, governor.wrap(animate), interval=governor.tick_ms)    # NOTE: 'animation'-object is NOT used elsewhere, i.e. does NOT need a name!
 
 # Start the MQTT client loop
 mqtt_client.loop_start()
@@ -31,24 +31,45 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib import style
 from mpl_toolkits.mplot3d import Axes3D         # For 3D-plot.
+from trajectory3d import Trajectory3D
 
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
 from math import sin, cos 
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.metrics import SampleTracer, start_http_server
+from py_dash_boards.frameserver import FrameRenderer, serve_frames
+from py_dash_boards.timestamps import to_epoch_ns, to_iso, NS_PER_S
+from py_dash_boards.reorder import ReorderBuffer
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.config import setting
+from py_dash_boards.governor import RenderGovernor
+
 EARTH_RADIUS_KM = 6371         # Earth's radius in [km].
 
 # Define the MQTT broker details
-broker_address = "test.mosquitto.org"
-broker_port = 1883
-topic = "Satellite/Iss"
+broker_address = os.environ.get("PDB_MQTT_BROKER", "test.mosquitto.org")      # NOTE: environment overrides are used by 'benchmarks/'!
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topic = setting("channel.topic", "Satellite/Iss")
 
 # Animation:
-UPDATE_INTERVAL_MS = 500    # 500 ms update-interval, i.e. 0.5 sec.
+RENDER_FLOOR_MS = setting("frontend.render_floor_ms", 33)           # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = setting("frontend.render_ceiling_ms", 1000)     # Max. interval between renders (w. new data).
+TRAIL_POINTS = setting("channel.buffer_points", 5000)    # Trailing window of the trajectory, i.e. max. points drawn.
+MAX_GAP_S = 30              # Longer pauses between positions (payload timestamps) break the line.
+LATENESS_S = 5              # Late (e.g. redelivered) positions are re-sorted within this window - see 'py_dash_boards.reorder'.
 
 # Debug:
-DATA_STREAM_DEBUG = False
+DATA_STREAM_DEBUG = setting("frontend.debug", False)
+
+# Headless (Agg backend) - frames are served over HTTP (MJPEG stream + snapshots) on this port:
+FRAME_HTTP_PORT = int(os.environ.get("PDB_FRAME_PORT", 8090))
+
+# Instrumentation - Prometheus scrape-port, or 'None' for in-process metrics only:
+METRICS_HTTP_PORT = int(os.environ["PDB_METRICS_PORT"]) if "PDB_METRICS_PORT" in os.environ else None
  
 # style.use('fivethirtyeight')      # Optional ...
 
@@ -157,72 +178,9 @@ def get_3d_vector(lat: float, lon: float, alt: float, radius: float=EARTH_RADIUS
     return x, y, z
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
-xs = []
-ys = []
-zs = []
 sample_counter = 0
-sample_counter_prev = 0
 
 fig = plt.figure()
 fig.add_subplot(111, projection="3d")
@@ -231,12 +189,16 @@ ax1 = fig.gca()
 ax1.set_xlabel('longitude')
 ax1.set_ylabel('latitude')
 ax1.set_label('altitude')
-ax1.plot(xs, ys, zs)
+trajectory = Trajectory3D(ax1, window=TRAIL_POINTS, max_gap_ns=MAX_GAP_S * NS_PER_S, label='ISS')     # NOTE: fixed Earth-scale limits, updated in place.
 ax1.legend()
+reorder = ReorderBuffer(lateness_ns=LATENESS_S * NS_PER_S, name="iss")      # Sorted, de-duplicated positions.
+
+tracer = SampleTracer("matplotlib")
+governor = RenderGovernor("matplotlib", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
 
 def on_message(client, userdata, msg):
     #
-    global sample_counter, xs, ys, zs
+    global sample_counter
     #
     if client:
         pass
@@ -244,6 +206,7 @@ def on_message(client, userdata, msg):
     if userdata:
         pass
     #
+    t_recv = tracer.received()
     data = msg.payload.decode("utf-8")
     if DATA_STREAM_DEBUG:
         print(f"Received data for sample-count {sample_counter}: {data}")
@@ -251,12 +214,13 @@ def on_message(client, userdata, msg):
     time_stamp, lat, lon, alt = get_position(data)
     # Convert to 3D-coordinates:
     x, y, z = get_3d_vector(lat, lon, alt)
+    tracer.parsed(t_recv)
     #
     sample_counter += 1
     #
-    xs.append(x)
-    ys.append(y)
-    zs.append(z)
+    reorder.push(msg.topic, to_epoch_ns(time_stamp), (x, y, z))
+    tracer.inserted(t_recv)
+    governor.arrived()
 
 
 # Create a MQTT client and connect to the broker
@@ -264,27 +228,48 @@ mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port,
 
 
 def animate(i):
-    global xs, ys, sample_counter, sample_counter_prev
-    #
     if DATA_STREAM_DEBUG and 0 != i and 0 == i % 10:
         print(f"Update {i} ...")
     #
-    if sample_counter != sample_counter_prev:
-        ax1.clear()
-        ax1.plot(xs, ys, zs)
-        sample_counter_prev = sample_counter
+    ts, points = reorder.drain()
+    if len(ts):
+        trajectory.extend(points, ts)
+    if trajectory.changed:
+        tracer.render_scheduled()
+        trajectory.update()         # In-place, i.e. NO 'ax1.clear()' + re-plot of the full track.
+        ax1.set_title(f"ISS @ {to_iso(trajectory.latest_ts)} UTC")
+        return True
     else:
         if DATA_STREAM_DEBUG:
             print("No new data ...")
         else:
             pass
+    return False        # I.e. nothing to draw.
+
+
+def on_draw(event):
+    """ Canvas has been drawn, i.e. new data is now visible """
+    tracer.render_complete()
+    if DATA_STREAM_DEBUG and 0 == tracer.render_counter.value % 10:
+        print(f"Latency per stage: {tracer.summary()}")
+
+
+fig.canvas.mpl_connect("draw_event", on_draw)
 
+if METRICS_HTTP_PORT is not None:
+    start_http_server(METRICS_HTTP_PORT)
 
-_ = animation.FuncAnimation(fig, animate, interval=UPDATE_INTERVAL_MS)    # NOTE: 'animation'-object is NOT used elsewhere, i.e. does NOT need a name!
+_ = animation.FuncAnimation(fig, governor.wrap(animate), interval=governor.tick_ms)    # NOTE: 'animation'-object is NOT used elsewhere, i.e. does NOT need a name!
 
 # Start the MQTT client loop
 mqtt_client.loop_start()
 
 # Then show plot:
-plt.show()
+if "agg" == plt.get_backend().lower():
+    # Headless (e.g. edge box, benchmark) - ONE render loop, shared by all viewers of 'http://<host>:FRAME_HTTP_PORT/':
+    renderer = FrameRenderer(fig, update=animate, governor=governor)
+    serve_frames(renderer, FRAME_HTTP_PORT)
+    renderer.run()
+else:
+    plt.show()
 
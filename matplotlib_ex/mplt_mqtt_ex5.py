@@ -31,12 +31,20 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib import style
 from mpl_toolkits.mplot3d import Axes3D         # For 3D-plot.
+from trajectory3d import Trajectory3D
 
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
 from math import sin, cos 
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.timestamps import to_epoch_ns, to_iso, NS_PER_S
+from py_dash_boards.reorder import ReorderBuffer
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.governor import RenderGovernor
+
 EARTH_RADIUS_KM = 6371         # Earth's radius in [km].
 
 # Define the MQTT broker details
@@ -45,7 +53,11 @@ broker_port = 1883
 topic = "Satellite/Iss"
 
 # Animation:
-UPDATE_INTERVAL_MS = 500    # 500 ms update-interval, i.e. 0.5 sec.
+RENDER_FLOOR_MS = 33        # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = 1000    # Max. interval between renders (w. new data).
+TRAIL_POINTS = 5000         # Trailing window of the trajectory, i.e. max. points drawn.
+MAX_GAP_S = 30              # Longer pauses between positions (payload timestamps) break the line.
+LATENESS_S = 5              # Late (e.g. redelivered) positions are re-sorted within this window - see 'py_dash_boards.reorder'.
 
 # Debug:
 DATA_STREAM_DEBUG = False
@@ -157,72 +169,9 @@ def get_3d_vector(lat: float, lon: float, alt: float, radius: float=EARTH_RADIUS
     return x, y, z
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
-xs = []
-ys = []
-zs = []
 sample_counter = 0
-sample_counter_prev = 0
 
 fig = plt.figure()
 fig.add_subplot(111, projection="3d")
@@ -231,12 +180,14 @@ ax1 = fig.gca()
 ax1.set_xlabel('longitude')
 ax1.set_ylabel('latitude')
 ax1.set_label('altitude')
-ax1.plot(xs, ys, zs)
+trajectory = Trajectory3D(ax1, window=TRAIL_POINTS, max_gap_ns=MAX_GAP_S * NS_PER_S, label='ISS')     # NOTE: fixed Earth-scale limits, updated in place.
 ax1.legend()
+reorder = ReorderBuffer(lateness_ns=LATENESS_S * NS_PER_S, name="iss")      # Sorted, de-duplicated positions.
+governor = RenderGovernor("matplotlib_iss", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
 
 def on_message(client, userdata, msg):
     #
-    global fig, ax1, sample_counter, xs, ys, zs
+    global sample_counter
     #
     if client:
         pass
@@ -253,12 +204,8 @@ def on_message(client, userdata, msg):
     #
     sample_counter += 1
     #
-    xs.append(x)
-    ys.append(y)
-    zs.append(z)
-    # Update plot:
-    ax1.clear()
-    ax1.plot(xs, ys, zs)
+    reorder.push(msg.topic, to_epoch_ns(time_stamp), (x, y, z))     # NOTE: plot is updated in the GUI-thread, see 'update_plot()'.
+    governor.arrived()
 
 
 # Create a MQTT client and connect to the broker
@@ -266,10 +213,16 @@ mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port,
 
 
 def update_plot(i):
-    """ Dummy callback - only to update display """
-    pass
-
-_ = animation.FuncAnimation(fig, update_plot, interval=UPDATE_INTERVAL_MS)    # NOTE: 'animation'-object is NOT used elsewhere, i.e. does NOT need a name!
+    """ Move released (sorted) positions into the trajectory - in place """
+    ts, points = reorder.drain()
+    if len(ts):
+        trajectory.extend(points, ts)
+    if trajectory.update():
+        ax1.set_title(f"ISS @ {to_iso(trajectory.latest_ts)} UTC")
+        return True
+    return False        # I.e. nothing to draw (yet) - see 'RenderGovernor.wrap()'.
+
+_ = animation.FuncAnimation(fig, governor.wrap(update_plot), interval=governor.tick_ms)    # NOTE: 'animation'-object is NOT used elsewhere, i.e. does NOT need a name!
 
 # Start the MQTT client loop
 mqtt_client.loop_start()
@@ -0,0 +1,154 @@
+"""
+@file trajectory3d.py
+
+@brief Fixed-cost 3D trajectory artist for Matplotlib's 'Axes3D', e.g. the ISS track.
+Points are kept in a preallocated XYZ-array (trailing window of fixed length), and the SAME line is updated in place
+via 'set_data_3d()' - no 'ax.clear()', no new artists, and fixed (Earth-scale) axis limits, i.e. no re-scaling.
+Hence an update costs the same after a week as after a minute.
+Points may carry a timestamp (int64 epoch-ns, kept in a parallel column) - a pause longer than 'max_gap_ns' is then
+drawn as a break in the line (NaN-point), instead of a straight chord through the Earth.
+"""
+
+import threading
+from collections import deque
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371          # Earth's radius in [km].
+ORBIT_MARGIN_KM = 1000          # Room for altitude (ISS: ~420 km) on top of the radius.
+TRAIL_POINTS = 2000             # Default trailing window (samples).
+
+
+class TrackBuffer:
+    """
+    Trailing window of XYZ-points (+ int64 timestamps) - the storage behind 'Trajectory3D', also usable on its own
+    (e.g. w. 'dynplot'). NOT thread-safe: written and read by the GUI-thread only.
+
+    Storage is a (3, 2*window) array where each point is written twice - at 'i' and 'i + window' - so the
+    newest 'window' points are ALWAYS one contiguous slice, i.e. artists get views, never copies, and appending
+    never shifts the array.
+    """
+    def __init__(self, window: int=TRAIL_POINTS, max_gap_ns: int=None):
+        self.window = window
+        self.max_gap_ns = max_gap_ns
+        self._xyz = np.zeros((3, 2 * window), dtype=np.float64)
+        self._ts = np.zeros(2 * window, dtype=np.int64)
+        self._total = 0
+        self._last_ts = None
+
+    @property
+    def total(self) -> int:
+        """ Points stored since creation. """
+        return self._total
+
+    @property
+    def latest_ts(self) -> int|None:
+        """ Timestamp [epoch-ns] of the newest stored point, or None if not timestamped. """
+        return self._last_ts
+
+    def _put(self, x: float, y: float, z: float, ts_ns: int) -> None:
+        idx = self._total % self.window
+        self._xyz[:, idx] = self._xyz[:, idx + self.window] = (x, y, z)
+        self._ts[idx] = self._ts[idx + self.window] = ts_ns
+        self._total += 1
+
+    def store(self, points: list) -> None:
+        """ Store (x, y, z, ts_ns|None) points - a pause longer than 'max_gap_ns' is stored as a NaN-point (line break). """
+        for x, y, z, ts_ns in points:
+            if ts_ns is None:
+                ts_ns = 0
+            elif self._last_ts is not None:
+                if self.max_gap_ns is not None and ts_ns - self._last_ts > self.max_gap_ns:
+                    self._put(np.nan, np.nan, np.nan, self._last_ts + 1)       # Break the line across the gap.
+                self._last_ts = max(self._last_ts, ts_ns)
+            else:
+                self._last_ts = ts_ns
+            self._put(x, y, z, ts_ns)
+
+    def _end(self) -> int:
+        return self._total % self.window + self.window if self._total >= self.window else self._total
+
+    def view(self) -> np.ndarray:
+        """ The newest points (up to 'window'), oldest first, as a (3, n) VIEW into the storage. """
+        end = self._end()
+        return self._xyz[:, end - min(self._total, self.window):end]
+
+    def timestamps(self) -> np.ndarray:
+        """ Timestamps [epoch-ns] matching 'view()' (0 = not timestamped). """
+        end = self._end()
+        return self._ts[end - min(self._total, self.window):end]
+
+
+class Trajectory3D:
+    """
+    Trailing-window 3D line (+ marker for the latest position) on an existing 3D-axes - points are kept in a 'TrackBuffer'.
+
+    NOTE: 'append()/extend()' may be called from the MQTT-thread - points are only queued there. The storage (which the
+    line's data are views of) is written by 'update()' only, which must be called from the GUI-thread, i.e. a draw never
+    sees half-updated data.
+    """
+    def __init__(self, ax, window: int=TRAIL_POINTS, limit: float=EARTH_RADIUS_KM + ORBIT_MARGIN_KM, max_gap_ns: int=None, **line_kwargs):
+        self.ax = ax
+        self.window = window
+        self.max_gap_ns = max_gap_ns
+        self.track = TrackBuffer(window, max_gap_ns)
+        self._pending = deque(maxlen=window)     # NOTE: bounded - older points would not be shown anyway.
+        self._lock = threading.Lock()
+        # Fixed axis limits - 3D auto-scaling would otherwise re-run on every update:
+        ax.set_xlim(-limit, limit)
+        ax.set_ylim(-limit, limit)
+        ax.set_zlim(-limit, limit)
+        ax.set_autoscale_on(False)
+        self.line, = ax.plot([], [], [], **line_kwargs)
+        self.head, = ax.plot([], [], [], marker="o", linestyle="", color=self.line.get_color())
+
+    @property
+    def total(self) -> int:
+        """ Points stored since creation. """
+        return self.track.total
+
+    @property
+    def changed(self) -> bool:
+        return 0 != len(self._pending)
+
+    @property
+    def latest_ts(self) -> int|None:
+        """ Timestamp [epoch-ns] of the newest stored point, or None if not timestamped. """
+        return self.track.latest_ts
+
+    def append(self, x: float, y: float, z: float, ts_ns: int=None) -> None:
+        with self._lock:
+            self._pending.append((x, y, z, ts_ns))
+
+    def extend(self, points: object, ts_ns: object=None) -> None:
+        """ Append a batch of points, shape (n, 3), w. optional timestamps, shape (n,). """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        ts_ns = [None] * len(points) if ts_ns is None else [int(t) for t in ts_ns]
+        with self._lock:
+            self._pending.extend((x, y, z, t) for (x, y, z), t in zip(points, ts_ns))
+
+    def view(self) -> np.ndarray:
+        """ The newest points (up to 'window'), oldest first, as a (3, n) VIEW into the storage. """
+        return self.track.view()
+
+    def timestamps(self) -> np.ndarray:
+        """ Timestamps [epoch-ns] matching 'view()' (0 = not timestamped). """
+        return self.track.timestamps()
+
+    def update(self) -> bool:
+        """ Push new points to the artists - returns False (and does nothing) if there is nothing new. """
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        if not pending:
+            return False
+        self.track.store(pending)
+        xyz = self.track.view()
+        self.line.set_data_3d(xyz[0], xyz[1], xyz[2])
+        self.head.set_data_3d(xyz[0, -1:], xyz[1, -1:], xyz[2, -1:])
+        return True
+
+    @property
+    def artists(self) -> tuple:
+        return self.line, self.head
@@ -1,39 +1,57 @@
 import panel as pn
 import hvplot.pandas
 import param
+import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.memo import memoize
 
 # Load Data
 from bokeh.sampledata.autompg import autompg_clean as df
 
+# Max. number of cached (widget-state -> frame/plot) entries - bounds server memory:
+CACHE_SIZE = 64
+
+# Precompute once: per-'cyl' partitions, w. 'mfr' as categorical codes (integer compare instead of string 'isin'):
+df = df.assign(mfr=df.mfr.astype('category'))
+MFR_CATEGORIES = df.mfr.cat.categories
+partitions = {cyl: (part, part.mfr.cat.codes.to_numpy()) for cyl, part in df.groupby('cyl')}
+
 # create a self-contained dashboard class
 class InteractiveDashboard(param.Parameterized):
     cylinders =  param.Integer(label='Cylinders', default=4, bounds=(4, 8))
     mfr = param.ListSelector(
         label='MFR',
-        default=['ford', 'chevrolet', 'honda', 'toyota', 'audi'], 
+        default=['ford', 'chevrolet', 'honda', 'toyota', 'audi'],
         objects=['ford', 'chevrolet', 'honda', 'toyota', 'audi'], precedence=0.5)
     yaxis = param.Selector(label='Y axis', objects=['hp', 'weight'])
 
-    
+    @memoize(maxsize=CACHE_SIZE)
     @param.depends('cylinders', 'mfr', 'yaxis')
-    def plot(self):
+    def frame(self):
+        part, mfr_codes = partitions.get(self.cylinders, (df.iloc[:0], np.zeros(0, dtype=np.int8)))
+        wanted = MFR_CATEGORIES.get_indexer(self.mfr)
         return (
-            df[
-                (df.cyl == self.cylinders) & 
-                (df.mfr.isin(self.mfr))
-            ]
-            .groupby(['origin', 'mpg'])[self.yaxis].mean()
+            part[np.isin(mfr_codes, wanted[wanted >= 0])]
+            .groupby(['origin', 'mpg'], observed=True)[self.yaxis].mean()
             .to_frame()
             .reset_index()
-            .sort_values(by='mpg')  
+            .sort_values(by='mpg')
             .reset_index(drop=True)
-            .hvplot(x='mpg', y=self.yaxis, by='origin', color=["#ff6f69", "#ffcc5c", "#88d8b0"], line_width=6, height=400)
         )
+
+    @memoize(maxsize=CACHE_SIZE)
+    @param.depends('cylinders', 'mfr', 'yaxis')
+    def plot(self):
+        return self.frame().hvplot(x='mpg', y=self.yaxis, by='origin', color=["#ff6f69", "#ffcc5c", "#88d8b0"], line_width=6, height=400)
+
 dashboard = InteractiveDashboard()
 
 # Layout using Template
 template = pn.template.FastListTemplate(
-    title="Interactive DataFrame Dashboards with param.depends", 
+    title="Interactive DataFrame Dashboards with param.depends",
     sidebar=[pn.Param(dashboard.param, widgets={'mfr': pn.widgets.ToggleGroup,'yaxis': pn.widgets.RadioButtonGroup})],
     main=[dashboard.plot],
     accent_base_color="#88d8b0",
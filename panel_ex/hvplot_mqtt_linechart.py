@@ -1,8 +1,15 @@
 import panel as pn
 import pandas as pd
 import hvplot.pandas
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.ringbuffer import TimedRingBuffer
+from py_dash_boards.timestamps import Timestamper, to_datetime64
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.governor import RenderGovernor
 
 
 # Define the MQTT broker details
@@ -11,7 +18,9 @@ broker_port = 1883
 topic = "1/testPoints/sinus"
 
 # Animation:
-UPDATE_INTERVAL_MS = 500    # 500 ms update-interval, i.e. 0.5 sec.
+RENDER_FLOOR_MS = 33        # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = 1000    # Max. interval between renders (w. new data).
+HISTORY_POINTS = 5000       # Max. points kept (and shown).
 
 # Debug:
 DATA_STREAM_DEBUG = False
@@ -42,77 +51,24 @@ def get_value_from_raw(raw_data: str) -> tuple:
     return f_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
 # DATA setup:
 sample_counter = 0
 
-# Create empty dataframe
-df = pd.DataFrame(pd.DataFrame(columns=["sampleno", "sineval"]))
+# Samples w. receive-time [epoch-ns] in a parallel int64 column - NO per-sample 'pd.Timestamp' objects:
+stamper = Timestamper()
+samples = TimedRingBuffer(HISTORY_POINTS)
+
+
+def make_frame() -> pd.DataFrame:
+    ts, values = samples.last()
+    return pd.DataFrame({"time": to_datetime64(ts), "sineval": values})
 
 # MQTT message callback
 def on_message(client, userdata, msg):
     #
-    global sample_counter, df, sample_data
+    global sample_counter
     #
     if client:
         pass
@@ -127,12 +83,10 @@ def on_message(client, userdata, msg):
     #
     sample_counter += 1
     #
-    timestamp = pd.Timestamp.now()
-    #
-    df.loc[len(df)] = [sample_counter, sine_val]         # Append data.
+    samples.append(stamper.now(), sine_val)
     #
     if DATA_STREAM_DEBUG:
-        print(f"DataFrame length is now = {len(df)}")
+        print(f"Buffer length is now = {len(samples)}")
 
 
 
@@ -145,17 +99,25 @@ mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port,
 mqtt_client.loop_start()
 
 
-# Create line chart
-line_chart = df.hvplot.line(x="sampleno", y="sineval")
+# Create line chart - datetime x-axis:
+line_chart = pn.pane.HoloViews(make_frame().hvplot.line(x="time", y="sineval"))
 
 # Create a Panel dashboard
 dashboard = pn.Column(line_chart)
 
+# NOTE: each update re-plots the full history, i.e. the governor's render-cost limit keeps the rate down as it grows:
+governor = RenderGovernor("panel_hvplot_full", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+governor.observe_total(samples.total)
+
 def update_chart() -> None:
-    pass
+    governor.observe_total(samples.total)
+    if not governor.should_render():
+        return      # No new data, or too early - skip.
+    with governor.frame():
+        line_chart.object = make_frame().hvplot.line(x="time", y="sineval")
 
 # Define the periodic callback to update the chart
-pn.state.add_periodic_callback(update_chart, UPDATE_INTERVAL_MS)
+pn.state.add_periodic_callback(update_chart, governor.tick_ms)
 
 # Display the dashboard
 dashboard.show()
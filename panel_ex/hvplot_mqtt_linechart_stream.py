@@ -1,26 +1,49 @@
-import panel as pn
-import pandas as pd
-import hvplot.pandas
-import holoviews as hv
-from holoviews.streams import Pipe
+"""
+@file hvplot_mqtt_linechart_stream.py
+
+@brief Realtime line-chart (HoloViews 'DynamicMap' fed by a 'Buffer'-stream) showing MQTT streaming data.
+Samples go into a ring buffer (MQTT-thread), and each browser session streams only the samples that are new since
+its previous update into its 'Buffer' (bounded 'length') - HoloViews then patches the existing glyph w. Bokeh's
+'stream()', i.e. bytes and CPU per update do NOT grow w. the history.
+W. 'frontend.rasterize = true' the chart is rasterized server-side by Datashader (see 'py_dash_boards.raster'),
+i.e. the browser gets a fixed-size image - for windows of 10^6+ samples.
+HoloViews and Panel are imported in the background while the MQTT-client connects (see 'py_dash_boards.startup'),
+and only used once the view is created - i.e. the (slow) framework imports do NOT delay connecting.
+"""
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.startup import prewarm
+prewarm("holoviews", "panel")       # NOTE: import order MUST match 'create_view()'!
+from py_dash_boards.metrics import SampleTracer, start_http_server
+from py_dash_boards.timestamps import Timestamper, to_datetime64
+from py_dash_boards.ringbuffer import TimedRingBuffer
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.config import setting
+from py_dash_boards.governor import RenderGovernor
+from py_dash_boards.raster import line_view
 
-#hv.extension('bokeh')
-#pn.extension()
 
 # Define the MQTT broker details
-broker_address = "test.mosquitto.org"
-broker_port = 1883
-topic = "1/testPoints/sinus"
+broker_address = os.environ.get("PDB_MQTT_BROKER", "test.mosquitto.org")      # NOTE: environment overrides are used by 'benchmarks/'!
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topic = setting("channel.topic", "1/testPoints/sinus")
 
 # Animation:
-UPDATE_INTERVAL_MS = 500    # 500 ms update-interval, i.e. 0.5 sec.
+RENDER_FLOOR_MS = setting("frontend.render_floor_ms", 33)           # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = setting("frontend.render_ceiling_ms", 1000)     # Max. interval between renders (w. new data).
+BUFFER_POINTS = setting("channel.buffer_points", 5000)              # Points kept (and shown) per session.
+RASTERIZE = setting("frontend.rasterize", False)                    # Datashader image instead of lines.
+SERVE_PORT = setting("frontend.port", 5006)
 
 # Debug:
-DATA_STREAM_DEBUG = False
+DATA_STREAM_DEBUG = setting("frontend.debug", False)
+
+# Instrumentation - Prometheus scrape-port, or 'None' for in-process metrics only:
+METRICS_HTTP_PORT = int(os.environ["PDB_METRICS_PORT"]) if "PDB_METRICS_PORT" in os.environ else None
 
 
 # ********************************** Helpers **************************************
@@ -48,88 +71,16 @@ def get_value_from_raw(raw_data: str) -> tuple:
     return f_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
 # DATA setup:
-sample_counter = 0
-x_val = [0]
-sine_val = [0.0]
-
-# define a pipe-funtion for streaming of data:
-pipe = Pipe(data=[])
+samples = TimedRingBuffer(BUFFER_POINTS)        # (time, value) - written by the MQTT-thread, read by the sessions.
 
-# Create line chart
-dmap = hv.DynamicMap(hv.Curve, streams=[pipe])
-
-pipe.send((x_val, sine_val))
-
-# Create empty dataframe
-#df = pd.DataFrame(pd.DataFrame(columns=["sampleno", "sineval"]))
+tracer = SampleTracer("panel_hvplot")
+stamper = Timestamper()         # Receive-time [epoch-ns] - x-values are real time, NOT sample-numbers.
 
 # MQTT message callback
 def on_message(client, userdata, msg):
-    #
-    #global sample_counter, df, sample_data
-    global sample_counter, x_val, sine_val
     #
     if client:
         pass
@@ -137,21 +88,15 @@ def on_message(client, userdata, msg):
     if userdata:
         pass
     #
+    t_recv = tracer.received()
     data = msg.payload.decode("utf-8")
     sine_value_new = get_value_from_raw(data)
+    tracer.parsed(t_recv)
     if DATA_STREAM_DEBUG:
-        print(f"Received data for sample-count {sample_counter}: {data}")
-    #
-    sample_counter += 1
+        print(f"Received data for sample-count {samples.total}: {data}")
     #
-    timestamp = pd.Timestamp.now()
-    #
-    #df.loc[len(df)] = [sample_counter, sine_val]         # Append data.
-    x_val.append(sample_counter)
-    sine_val.append(sine_value_new)
-    #
-    if DATA_STREAM_DEBUG:
-        print(f"DataFrame length is now = {len(sine_val)}")
+    samples.append(stamper.from_counter(t_recv), sine_value_new)
+    tracer.inserted(t_recv)
 
 
 
@@ -162,27 +107,47 @@ mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port,
 # Start the MQTT loop
 mqtt_client.loop_start()
 
-# Create line chart
-#line_chart = df.hvplot.line(x="sampleno", y="sineval")
-
+if METRICS_HTTP_PORT is not None:
+    start_http_server(METRICS_HTTP_PORT)
 
-# Create a Panel dashboard
-#dashboard = pn.Column(line_chart)
-dashboard = pn.Column(dmap)
 
-def update_chart() -> None:
-    global x_val, sine_val
-    # Pipe data:
-    pipe.send((sample_counter, sine_val))
-    # 
-    pn.state.loaded
+# ********************************** View **************************************
 
+def create_view() -> object:
+    """ Create the dashboard of ONE browser session - HoloViews/Panel are (being) imported by the pre-warm thread by now. """
+    import holoviews as hv
+    import panel as pn
+    from holoviews.streams import Buffer
+    #
+    # Session state - starts w. the buffered history, then only new samples are streamed:
+    ts, values = samples.last()
+    state = {"total": samples.total}
+    buffer = Buffer(data=dict(time=to_datetime64(ts), value=values), length=BUFFER_POINTS)
+    # Line chart - the DynamicMap is re-evaluated per 'buffer.send()', and its Curve updates the existing glyph:
+    dmap = hv.DynamicMap(lambda data: hv.Curve(data, kdims=["time"], vdims=["value"]), streams=[buffer])
+    if not RASTERIZE:
+        dmap.opts(responsive=True, min_height=400, framewise=True)
+    governor = RenderGovernor("panel_hvplot", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+    governor.observe_total(state["total"])
+
+    def update_chart() -> None:
+        governor.observe_total(samples.total)
+        if not governor.should_render():
+            return      # No new data, or too early - skip.
+        with governor.frame():
+            tracer.render_scheduled()
+            ts, values, state["total"] = samples.since(state["total"])
+            buffer.send(dict(time=to_datetime64(ts), value=values))        # NOTE: new samples ONLY.
+            tracer.render_complete()
+
+    # Periodic callback of THIS session (stopped w. the session) - ticks at the governor's floor-rate:
+    pn.state.add_periodic_callback(update_chart, period=governor.tick_ms)
+    #
+    return pn.Column(line_view(dmap, rasterize=RASTERIZE), sizing_mode="stretch_width")
 
-# Define the periodic callback to update the chart
-#pn.state.add_periodic_callback(update_chart, UPDATE_INTERVAL_MS)
-# period call back
-cb = pn.state.add_periodic_callback(update_chart, period=500, start=False)  
-
-# Display the dashboard
-dashboard.show()
 
+# Serve the dashboard - 'create_view()' is called per browser session:
+if __name__ == "__main__":
+    import panel as pn
+    #
+    pn.serve(create_view, port=SERVE_PORT, show=True)
@@ -1,19 +1,50 @@
-import paho.mqtt.client as mqtt
-import pandas as pd
-import hvplot.pandas
+"""
+@file panel_mqtt_holoviews_linechart.py
+
+@brief Realtime line-chart (HoloViews 'DynamicMap' fed by a 'Buffer'-stream) showing MQTT streaming data.
+Samples go into a ring buffer (MQTT-thread), the governed periodic callback sends only the new ones to the 'Buffer'.
+W. 'frontend.rasterize = true' the chart is rasterized server-side by Datashader (see 'py_dash_boards.raster'),
+i.e. the browser gets a fixed-size image, re-aggregated on zoom - for windows of 10^6+ samples.
+
+Usage:
+    panel serve panel_mqtt_holoviews_linechart.py
+"""
+
+import holoviews as hv
+import numpy as np
+import panel as pn
 from holoviews.streams import Buffer
 
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.metrics import SampleTracer, start_http_server
+from py_dash_boards.timestamps import Timestamper, to_datetime64
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.config import setting
+from py_dash_boards.ringbuffer import TimedRingBuffer
+from py_dash_boards.governor import RenderGovernor
+from py_dash_boards.raster import line_view
 
 
 # Define the MQTT broker details:
-broker_address = "test.mosquitto.org"
-broker_port = 1883
-topic = "1/testPoints/sinus"
+broker_address = os.environ.get("PDB_MQTT_BROKER", "test.mosquitto.org")      # NOTE: environment overrides are used by 'benchmarks/'!
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topic = setting("channel.topic", "1/testPoints/sinus")
 
+# Animation:
+RENDER_FLOOR_MS = setting("frontend.render_floor_ms", 33)           # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = setting("frontend.render_ceiling_ms", 1000)     # Max. interval between renders (w. new data).
+BUFFER_POINTS = setting("channel.buffer_points", 5000)              # Points kept (and shown).
+RASTERIZE = setting("frontend.rasterize", False)                    # Datashader image instead of lines.
 
 # Debug:
-DATA_STREAM_DEBUG = False
+DATA_STREAM_DEBUG = setting("frontend.debug", False)
+
+# Instrumentation - Prometheus scrape-port, or 'None' for in-process metrics only:
+METRICS_HTTP_PORT = int(os.environ["PDB_METRICS_PORT"]) if "PDB_METRICS_PORT" in os.environ else None
 
 
 # ********************************** Helpers **************************************
@@ -41,76 +72,21 @@ def get_value_from_raw(raw_data: str) -> tuple:
     return f_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
 # DATA setup
 # ==========
-sample_counter = 0
-# Create a buffer to store incoming data:
-buffer = Buffer(pd.DataFrame(data={'x': [], 'y': []}))
+samples = TimedRingBuffer(BUFFER_POINTS)        # (time, value) - written by the MQTT-thread.
+# Chart data - bounded, only new samples are sent (see 'flush_chart()'):
+buffer = Buffer(dict(x=np.array([], dtype="datetime64[ns]"), y=np.array([], dtype=np.float64)), length=BUFFER_POINTS)
+state = {"total": 0}            # Sample-total at last flush.
+
+tracer = SampleTracer("panel_holoviews")
+governor = RenderGovernor("panel_holoviews", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+stamper = Timestamper()         # Receive-time [epoch-ns] - the x-axis is real (datetime) time.
 
 # MQTT Callback
 def on_message(client, userdata, msg):
-    global sample_counter
     #
     if client:
         pass
@@ -118,23 +94,39 @@ def on_message(client, userdata, msg):
     if userdata:
         pass
     #
+    t_recv = tracer.received()
     data = msg.payload.decode("utf-8")
     sine_val = get_value_from_raw(data)
-    print(f"Received data for sample-count {sample_counter}: {data}")
-    sample_counter += 1
-    #
-    data = msg.payload.decode("utf-8")
-    sine_val = get_value_from_raw(data)
-    x, y = float(sample_counter), sine_val
+    tracer.parsed(t_recv)
+    if DATA_STREAM_DEBUG:
+        print(f"Received data for sample-count {samples.total}: {data}")
     #
-    buffer.send(pd.DataFrame(data={'x': [x], 'y': [y]}))
+    samples.append(stamper.from_counter(t_recv), sine_val)
+    tracer.inserted(t_recv)
+
+
+def flush_chart():
+    governor.observe_total(samples.total)
+    if not governor.should_render():
+        return      # No new data, or too early - skip.
+    with governor.frame():
+        tracer.render_scheduled()
+        ts, values, state["total"] = samples.since(state["total"])
+        buffer.send(dict(x=to_datetime64(ts), y=values))       # NOTE: new samples ONLY - rasterizing re-aggregates the window.
+        tracer.render_complete()
 
 
 # Connect to MQTT Broker
 client = mqtt_setup(broker_address=broker_address, broker_port=broker_port, topic=topic, msg_event_handler=on_message)
 client.loop_start()
 
+if METRICS_HTTP_PORT is not None:
+    start_http_server(METRICS_HTTP_PORT)
+
 # Create the dashboard
-line_chart = buffer.add_subscriber(hvplot.plot(x='x', y='y', width=800, height=400))
+dmap = hv.DynamicMap(lambda data: hv.Curve(data, kdims=["x"], vdims=["y"]), streams=[buffer])
+if not RASTERIZE:
+    dmap.opts(responsive=True, min_height=400, framewise=True)
+pn.state.add_periodic_callback(flush_chart, period=governor.tick_ms)
 
-line_chart
+pn.Column(line_view(dmap, rasterize=RASTERIZE), sizing_mode="stretch_width").servable()
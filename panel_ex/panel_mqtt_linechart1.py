@@ -1,7 +1,13 @@
 import panel as pn
 import pandas as pd
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.timestamps import Timestamper, to_datetime64
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.governor import RenderGovernor
 
 
 # Define the MQTT broker details
@@ -10,7 +16,8 @@ broker_port = 1883
 topic = "1/testPoints/sinus"
 
 # Animation:
-UPDATE_INTERVAL_MS = 500    # 500 ms update-interval, i.e. 0.5 sec.
+RENDER_FLOOR_MS = 33        # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = 1000    # Max. interval between renders (w. new data).
 
 # Debug:
 DATA_STREAM_DEBUG = False
@@ -41,80 +48,22 @@ def get_value_from_raw(raw_data: str) -> tuple:
     return f_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
 # DATA setup:
-xs = []
+stamper = Timestamper()
+xs = []         # Receive-time ('datetime64[ns]' - i.e. a datetime x-axis, NOT raw epoch-ns integers).
 ys = []
 sample_counter = 0
 sample_counter_prev = 0
 data = {
-        'SampleNo': xs,
+        'Time': xs,
         'SineVal': ys
        }
 df = pd.DataFrame(data)
 
 # Create a line chart using hvplot
-line_chart = df.hvplot.line(x='SampleNo', y='Sales')
+line_chart = df.hvplot.line(x='Time', y='SineVal')
 
 def on_message(client, userdata, msg):
     #
@@ -132,10 +81,13 @@ def on_message(client, userdata, msg):
     #
     sample_counter += 1
     #
-    xs.append(sample_counter)
+    xs.append(to_datetime64(stamper.now())[()])     # NOTE: '[()]' - 0-dim array -> 'numpy.datetime64' scalar.
     ys.append(sine_val)
+    governor.arrived()
 
 
+governor = RenderGovernor("panel_linechart", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+
 # Create a MQTT client and connect to the broker
 mqtt_client = mqtt_setup(broker_address=broker_address, broker_port=broker_port, topic=topic, msg_event_handler=on_message)
 
@@ -149,17 +101,18 @@ mqtt_client.loop_start()
 # Define the update function to update the chart with new data
 def update_chart():
     global chart
+    #
+    if not governor.should_render():
+        return      # No new data, or too early - skip.
     # Get the data from the MQTT topic and update the chart
-    chart.show()
+    with governor.frame():
+        chart.show()
 
 # Create a Panel dashboard
 dashboard = pn.Column(chart)
 
-# Define the update interval in milliseconds
-update_interval = 1000
-
-# Define the periodic callback to update the chart
-pn.state.add_periodic_callback(update_chart, update_interval)
+# Define the periodic callback to update the chart - ticks at the governor's floor-rate:
+pn.state.add_periodic_callback(update_chart, governor.tick_ms)
 
 # Show the dashboard
 dashboard.show()
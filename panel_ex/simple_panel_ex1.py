@@ -6,8 +6,13 @@
 
 import panel as pn
 import hvplot.pandas
-import pandas as pd
 import numpy as np
+import os
+import sys
+from functools import lru_cache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.query import QueryLayer
 """
 from js import console
 from pyodide_http import patch_all
@@ -17,44 +22,54 @@ patch_all()
 pn.extension(design='material')
 
 csv_file = ("https://raw.githubusercontent.com/holoviz/panel/main/examples/assets/occupancy.csv")
-data = pd.read_csv(csv_file, parse_dates=["date"], index_col="date")
-#console.log("Downloaded data")
-df = pn.widgets.DataFrame(data, name="DataFrame from Panda's 'read_csv()'.")
+PREVIEW_ROWS = 1000         # Rows shown in the table - NOT the whole file.
 
-df.show()
+# CSV is downloaded ONCE (cached), and queried in DuckDB - only result sets are loaded into pandas:
+ql = QueryLayer()
+ql.register_csv("occupancy", csv_file)
+data = ql.time_window("occupancy", "date", limit=PREVIEW_ROWS).set_index("date")
+#console.log("Downloaded data")
+df = pn.widgets.DataFrame(data, name=f"First {PREVIEW_ROWS} rows (of {ql.count('occupancy')}).")
 
-"""
 # Panel Widgets
-variable_widget = pn.widgets.Select(name="variable", value="Temperature", options=list(data.columns))
+variable_widget = pn.widgets.Select(name="variable", value="Temperature", options=[c for c in ql.columns("occupancy") if "date" != c])
 window_widget = pn.widgets.IntSlider(name="window", value=30, start=1, end=60)
 sigma_widget = pn.widgets.IntSlider(name="sigma", value=10, start=0, end=20)
 #console.log("Set up widgets!")
-"""
 
-"""
-# Interactive hvplot pipeline
-## Compute the outliers
-data = df.interactive()
-avg = data[variable_widget].rolling(window=window_widget).mean()
-residual = data[variable_widget] - avg
-std = residual.rolling(window=window_widget).std()
-outliers = np.abs(residual) > std * sigma_widget
-
-## Plot the average variable line together with the outliers as points
-pipeline = (
-    avg.hvplot(height=300, width=400, color="blue", legend=False)
-    * avg[outliers].hvplot.scatter(color="orange", padding=0.1, legend=False)
-)
-
-# Compute the number of outliers
-count = outliers.pipe(
-    lambda s: pn.indicators.Number(
-        name='Outliers count', value=s.sum(),
-        colors=[(10, 'green'), (30, 'gold'), (np.Inf, 'red')]
+
+# Outlier pipeline - rolling mean/residual/std are computed in SQL, ONCE per (variable, window) - changing only 'sigma' just re-thresholds:
+@lru_cache(maxsize=32)
+def rolling_stats(variable, window):
+    return ql.rolling("occupancy", "date", variable, window).set_index("date")
+
+
+def outliers(variable, window, sigma):
+    stats = rolling_stats(variable, window)
+    return stats["residual"].abs() > stats["std"] * sigma
+
+
+def outlier_plot(variable, window, sigma):
+    avg = rolling_stats(variable, window)["mean"].rename(variable)
+    ## Plot the average variable line together with the outliers as points
+    return (
+        avg.hvplot(height=300, width=400, color="blue", legend=False)
+        * avg[outliers(variable, window, sigma)].hvplot.scatter(color="orange", padding=0.1, legend=False)
+    )
+
+
+def outlier_count(variable, window, sigma):
+    return pn.indicators.Number(
+        name='Outliers count', value=int(outliers(variable, window, sigma).sum()),
+        colors=[(10, 'green'), (30, 'gold'), (np.inf, 'red')]
     )
-)
+
 
 # Servable App
-dash_board = pn.Column(pipeline.widgets(), pn.Row(count.output(), pipeline.output())).servable(target='panel')
+widgets = dict(variable=variable_widget, window=window_widget, sigma=sigma_widget)
+dash_board = pn.Column(
+    pn.Row(variable_widget, window_widget, sigma_widget),
+    pn.Row(pn.bind(outlier_count, **widgets), pn.bind(outlier_plot, **widgets)),
+    df,
+).servable(target='panel')
 dash_board.show()
-"""
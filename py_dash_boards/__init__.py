@@ -0,0 +1,6 @@
+"""
+@file __init__.py
+
+@brief Shared helpers for the MQTT dashboard examples.
+NOTE: keep this module light - the frontends (matplotlib, bokeh, panel, taipy ...) are NEVER imported from here!
+"""
@@ -0,0 +1,78 @@
+"""
+@file __main__.py
+
+@brief Config-driven dashboard runner - launches ONE frontend, selected by a TOML/YAML config (see 'config.py').
+
+Only the selected frontend's framework is ever imported (the runner itself imports none of them), i.e. startup
+time and memory of a deployment do not include the other frameworks.
+
+Usage:
+    python -m py_dash_boards configs/sine_bokeh.toml
+    python -m py_dash_boards configs/iss_matplotlib.yaml --frontend matplotlib-iss
+    python -m py_dash_boards --list
+"""
+
+import argparse
+import os
+import runpy
+import sys
+
+from py_dash_boards.config import export_environment, load_config, lookup
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Frontend name -> example script (relative to the repo-root), and how it is launched:
+FRONTENDS = {
+    "bokeh": {"script": "bokeh/bokeh_mqtt_stream_ex1.py", "help": "Bokeh server, line-chart w. history + outliers"},
+    "bokeh-async": {"script": "bokeh/bokeh_mqtt_stream_async.py", "help": "Bokeh server, asyncio ingestion"},
+    "bokeh-spectrogram": {"script": "bokeh/bokeh_vibration_spectrogram.py", "help": "Bokeh server, vibration waterfall"},
+    "matplotlib": {"script": "matplotlib_ex/mplt_mqtt_ex2.py", "help": "Matplotlib line-chart (Agg: served over HTTP)"},
+    "matplotlib-iss": {"script": "matplotlib_ex/mplt_mqtt_ex4.py", "help": "Matplotlib 3D ISS trajectory"},
+    "panel": {"script": "panel_ex/panel_mqtt_holoviews_linechart.py", "serve": True, "help": "Panel/HoloViews streaming line-chart"},
+    "panel-hvplot": {"script": "panel_ex/hvplot_mqtt_linechart_stream.py", "help": "Panel/HoloViews buffer-stream"},
+    "taipy": {"script": "taipy_ex/taipy_mqtt_plotter.py", "help": "Taipy GUI line-chart"},
+}
+
+DEFAULT_SERVE_PORT = 5006
+
+
+def run_frontend(name: str, config: dict) -> None:
+    """ Run the frontend's script as '__main__' in THIS process (blocks until it exits). """
+    spec = FRONTENDS[name]
+    script = os.path.join(REPO_ROOT, spec["script"])
+    os.chdir(os.path.dirname(script))       # NOTE: the scripts expect to be run from their own folder.
+    if spec.get("serve"):
+        # App-code runs per browser-session, i.e. under 'panel serve':
+        port = lookup(config, "frontend.port", DEFAULT_SERVE_PORT)
+        sys.argv = ["panel", "serve", script, "--port", str(port), "--show"]
+        runpy.run_module("panel", run_name="__main__", alter_sys=True)
+    else:
+        sys.argv = [script]
+        runpy.run_path(script, run_name="__main__")
+
+
+def main(argv: list=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m py_dash_boards", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("config", nargs="?", help="Config-file (.toml, .yaml or .yml).")
+    parser.add_argument("--frontend", help="Override 'frontend.name' of the config.")
+    parser.add_argument("--list", action="store_true", help="List available frontends.")
+    args = parser.parse_args(argv)
+    #
+    if args.list:
+        for name, spec in FRONTENDS.items():
+            print(f"{name:20s} {spec['help']}  ({spec['script']})")
+        return 0
+    if not args.config:
+        parser.error("a config-file is required (or '--list')")
+    config = load_config(args.config)
+    name = args.frontend or lookup(config, "frontend.name")
+    if name not in FRONTENDS:
+        parser.error(f"unknown frontend '{name}' - choose one of: {', '.join(FRONTENDS)}")
+    export_environment(config, args.config)
+    run_frontend(name, config)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
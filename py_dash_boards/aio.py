@@ -0,0 +1,187 @@
+"""
+@file aio.py
+
+@brief Asyncio-native MQTT ingestion, i.e. NO separate paho network-thread.
+
+The paho-client's socket is registered w. the asyncio event-loop of the web-server (Bokeh/Panel run on Tornado,
+which is asyncio-based), so MQTT messages are read and handed to the dashboard on the SAME thread that renders:
+no cross-thread hand-over, no locking of documents from foreign threads, and no GIL-contention w. a paho thread.
+
+Messages are collected into batches, which are flushed when 'max_batch' messages are pending,
+or 'max_latency_s' after the first message of a batch arrived - whichever comes first.
+A lost connection is re-established w. exponential backoff (and re-subscribed), i.e. iterating just continues.
+Connecting (DNS + TCP-connect) runs in an executor-thread, i.e. NEVER blocks the event-loop.
+
+Usage (inside a coroutine running on the server's loop):
+    >>> ingest = AsyncMqttIngest(broker_address, broker_port, ["1/testPoints/#"])
+    >>> await ingest.connect()
+    >>> async for batch in ingest:
+    >>>     for topic, payload, t_recv in batch:
+    >>>         ...
+"""
+
+import asyncio
+import socket
+import time
+
+import paho.mqtt.client as mqtt
+
+from py_dash_boards.ingest import new_client, MIN_BACKOFF_S, MAX_BACKOFF_S
+from py_dash_boards.metrics import REGISTRY, Registry
+
+
+MISC_INTERVAL_S = 1.0           # paho expects 'loop_misc()' about once per second.
+
+class AsyncMqttIngest:
+    """
+    MQTT-client driven by an asyncio event-loop, delivering message-batches through an async iterator.
+    """
+    def __init__(self, broker_address: str, broker_port: int, topics: str|list, max_batch: int=1000, max_latency_s: float=0.05,
+                 qos: int=0, min_backoff_s: float=MIN_BACKOFF_S, max_backoff_s: float=MAX_BACKOFF_S, registry: Registry=REGISTRY):
+        self.broker_address = broker_address
+        self.broker_port = broker_port
+        self.topics = [topics] if isinstance(topics, str) else list(topics)
+        self.max_batch = max_batch
+        self.max_latency_s = max_latency_s
+        self.qos = qos
+        self.min_backoff_s = min_backoff_s
+        self.max_backoff_s = max_backoff_s
+        #
+        self._loop = None
+        self._pending = []
+        self._ready = None
+        self._flush_handle = None
+        self._misc_task = None
+        self._closed = False
+        #
+        self.batch_size = registry.histogram("pdb_aio_batch_size", "Messages per flushed batch.",
+                                             buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000))
+        self.reconnect_counter = registry.counter("pdb_aio_reconnects_total", "Reconnects after a lost connection.")
+        #
+        self.client = new_client()
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_socket_register_write
+        self.client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    # ******************************* Socket <-> Event-loop glue *******************************
+
+    def _in_loop(self, func: object, *args) -> None:
+        """ Call 'func' on the event-loop's thread - socket-callbacks also fire in the executor, while connecting. """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            func(*args)
+        else:
+            self._loop.call_soon_threadsafe(func, *args)
+
+    def _on_socket_open(self, client, userdata, sock):
+        self._in_loop(self._loop.add_reader, sock, client.loop_read)
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._in_loop(self._loop.remove_reader, sock)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._in_loop(self._loop.add_writer, sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._in_loop(self._loop.remove_writer, sock)
+
+    async def _connect_socket(self) -> None:
+        """ Name-resolution and (blocking) TCP-connect in an executor - the loop keeps serving meanwhile. """
+        addr_info = await self._loop.getaddrinfo(self.broker_address, self.broker_port, type=socket.SOCK_STREAM)
+        host = addr_info[0][4][0]
+        await self._loop.run_in_executor(None, self.client.connect, host, self.broker_port)
+        self.client.socket().setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 2048)
+
+    async def _misc_loop(self):
+        """ Keep-alive pings, retries etc. - and reconnects w. exponential backoff once the connection is lost. """
+        backoff_s = self.min_backoff_s
+        while not self._closed:
+            if mqtt.MQTT_ERR_SUCCESS == self.client.loop_misc():
+                backoff_s = self.min_backoff_s
+                await asyncio.sleep(MISC_INTERVAL_S)
+                continue
+            # Connection lost (or never established) - subscriptions are restored in '_on_connect()':
+            await asyncio.sleep(backoff_s)
+            if self._closed:
+                break
+            try:
+                await self._connect_socket()
+                self.reconnect_counter.inc()
+                print("Reconnected to MQTT Broker.")
+            except OSError as exc:
+                backoff_s = min(2 * backoff_s, self.max_backoff_s)
+                print(f"WARN: reconnect to MQTT Broker failed ({exc}) - retrying in {backoff_s:.0f} sec.")
+
+    # ******************************* MQTT callbacks *******************************
+
+    def _on_connect(self, client, userdata, flags, rc: int=0):
+        if rc == 0:
+            # NOTE: (re-)subscribe on EVERY connect, so subscriptions survive reconnects:
+            client.subscribe([(topic, self.qos) for topic in self.topics])
+        else:
+            print(f"ERROR: failed to connect, return code {rc}")
+
+    def _on_message(self, client, userdata, msg):
+        self._pending.append((msg.topic, msg.payload, time.perf_counter_ns()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.max_latency_s, self._flush)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._pending:
+            self._ready.set()
+
+    # ******************************* Public API *******************************
+
+    async def connect(self) -> None:
+        """ First connect (raises on failure) - afterwards, lost connections are re-established in the background. """
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        await self._connect_socket()
+        self._misc_task = self._loop.create_task(self._misc_loop())
+
+    async def next_batch(self) -> list:
+        """
+        Wait for the next batch of messages.
+
+        Returns:
+            list: (topic, payload, receive-timestamp[perf-counter ns]) tuples, oldest first. Empty list when closed.
+        """
+        while not self._pending and not self._closed:
+            await self._ready.wait()
+            self._ready.clear()
+        batch, self._pending = self._pending, []
+        self._ready.clear()
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if batch:
+            self.batch_size.observe(len(batch))
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> list:
+        batch = await self.next_batch()
+        if not batch and self._closed:
+            raise StopAsyncIteration
+        return batch
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._ready is not None:
+            self._ready.set()
+        self.client.disconnect()
+        if self._misc_task is not None:
+            self._misc_task.cancel()
@@ -0,0 +1,199 @@
+"""
+@file backpressure.py
+
+@brief Bounded hand-over queue between MQTT ingestion (paho thread) and a rendering consumer.
+
+When the consumer falls behind, the queue applies one of these policies instead of growing without bounds:
+- POLICY_BLOCK:       producer waits for free space (i.e. backpressure all the way to the broker via TCP).
+                      If 'block_timeout_s' expires, the NEW sample is dropped.
+- POLICY_DROP_OLDEST: oldest queued sample is discarded (i.e. ring-buffer behaviour).
+- POLICY_DROP_NEWEST: incoming sample is discarded.
+- POLICY_DECIMATE:    queued samples are compacted - either every Nth sample is kept, or min+max per N samples
+                      (keeps peaks visible in line-charts). Older data thus gets coarser, but still spans the full time.
+
+Dropped and decimated samples are counted in the 'py_dash_boards.metrics' registry.
+
+Usage:
+    >>> channel = BoundedChannel("sine", maxlen=1000, policy=POLICY_DECIMATE, decimate_mode=DECIMATE_MINMAX, value_key=lambda s: s[1])
+    >>> channel.put((x, y))                 # In 'on_message' callback.
+    >>> samples = channel.drain()           # In render callback.
+"""
+
+import threading
+from collections import deque
+
+from py_dash_boards.metrics import REGISTRY, Registry
+
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop-oldest"
+POLICY_DROP_NEWEST = "drop-newest"
+POLICY_DECIMATE = "decimate"
+
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_DECIMATE)
+
+DECIMATE_EVERY_NTH = "every-nth"
+DECIMATE_MINMAX = "minmax"
+
+
+def decimate(samples: list, factor: int, mode: str=DECIMATE_EVERY_NTH, value_key: object=None) -> list:
+    """
+    Reduce a list of samples, preserving order.
+
+    Args:
+        samples (list): samples to reduce.
+        factor (int): block size N, i.e. reduction factor.
+        mode (str, optional): DECIMATE_EVERY_NTH (keep last sample of each block),
+                              or DECIMATE_MINMAX (keep min and max of each block). Defaults to DECIMATE_EVERY_NTH.
+        value_key (object, optional): function extracting the value to compare in 'minmax'-mode. Defaults to the sample itself.
+
+    Returns:
+        list: reduced samples.
+    """
+    if factor <= 1:
+        return list(samples)
+    #
+    if DECIMATE_EVERY_NTH == mode:
+        # NOTE: keep LAST sample of each (possibly partial) block, so the newest sample always survives:
+        return [samples[min(i + factor - 1, len(samples) - 1)] for i in range(0, len(samples), factor)]
+    #
+    key = value_key or (lambda s: s)
+    result = []
+    for i in range(0, len(samples), factor):
+        block = samples[i:i + factor]
+        if len(block) <= 2:
+            result.extend(block)
+            continue
+        i_min = min(range(len(block)), key=lambda j: key(block[j]))
+        i_max = max(range(len(block)), key=lambda j: key(block[j]))
+        if i_min == i_max:
+            result.append(block[i_min])
+        else:
+            result.extend((block[i_min], block[i_max]) if i_min < i_max else (block[i_max], block[i_min]))
+    return result
+
+
+class BoundedChannel:
+    """
+    Thread-safe bounded queue w. selectable overload policy. One channel per consumer!
+    """
+    def __init__(self, name: str, maxlen: int=10000, policy: str=POLICY_DROP_OLDEST,
+                 decimate_factor: int=4, decimate_mode: str=DECIMATE_EVERY_NTH, value_key: object=None,
+                 block_timeout_s: float=None, registry: Registry=REGISTRY):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy '{policy}' - must be one of: {', '.join(POLICIES)}")
+        if maxlen < 1:
+            raise ValueError("'maxlen' must be >= 1")
+        if POLICY_DECIMATE == policy and DECIMATE_MINMAX == decimate_mode and decimate_factor <= 2:
+            raise ValueError("'decimate_factor' must be > 2 for min/max-decimation - it keeps 2 samples per block")
+        #
+        self.name = name
+        self.maxlen = maxlen
+        self.policy = policy
+        self.decimate_factor = max(2, decimate_factor)
+        self.decimate_mode = decimate_mode
+        self.value_key = value_key
+        self.block_timeout_s = block_timeout_s
+        #
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._not_empty = threading.Condition(self._lock)
+        self._closed = False
+        #
+        labels = {"channel": name}
+        self.put_counter = registry.counter("pdb_channel_put_total", "Samples offered to channel.", labels)
+        self.dropped_counter = registry.counter("pdb_channel_dropped_total", "Samples dropped by overload policy.", labels)
+        self.decimated_counter = registry.counter("pdb_channel_decimated_total", "Samples removed by decimation.", labels)
+        self.depth_gauge = registry.gauge("pdb_channel_depth", "Samples queued, waiting for consumer.", labels)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _make_room(self) -> bool:
+        """
+        Apply overload policy for ONE new sample. NOTE: lock must be held!
+
+        Returns:
+            bool: True if new sample shall be queued.
+        """
+        if POLICY_DROP_NEWEST == self.policy:
+            self.dropped_counter.inc()
+            return False
+        if POLICY_DROP_OLDEST == self.policy:
+            self._queue.popleft()
+            self.dropped_counter.inc()
+            return True
+        if POLICY_DECIMATE == self.policy:
+            before = len(self._queue)
+            reduced = decimate(list(self._queue), self.decimate_factor, self.decimate_mode, self.value_key)
+            if len(reduced) >= before:
+                # Could not reduce (e.g. 'maxlen' tiny) - fall back to dropping oldest:
+                self._queue.popleft()
+                self.dropped_counter.inc()
+                return True
+            self._queue = deque(reduced)
+            self.decimated_counter.inc(before - len(self._queue))
+            return True
+        # POLICY_BLOCK:
+        if not self._not_full.wait_for(lambda: len(self._queue) < self.maxlen or self._closed, timeout=self.block_timeout_s):
+            self.dropped_counter.inc()
+            return False
+        return not self._closed
+
+    def put(self, sample: object) -> bool:
+        """
+        Offer a sample to the consumer.
+
+        Returns:
+            bool: True if sample was queued, False if it was dropped.
+        """
+        with self._lock:
+            self.put_counter.inc()
+            if len(self._queue) >= self.maxlen and not self._make_room():
+                return False
+            self._queue.append(sample)
+            self.depth_gauge.set(len(self._queue))
+            self._not_empty.notify()
+        return True
+
+    def put_many(self, samples: list) -> int:
+        """
+        Offer a batch of samples (e.g. from one batched MQTT payload).
+
+        Returns:
+            int: number of samples queued.
+        """
+        return sum(1 for sample in samples if self.put(sample))
+
+    def drain(self, max_items: int=None) -> list:
+        """
+        Take all (or at most 'max_items') queued samples, oldest first. Never blocks.
+        """
+        with self._lock:
+            if max_items is None or max_items >= len(self._queue):
+                items = list(self._queue)
+                self._queue.clear()
+            else:
+                items = [self._queue.popleft() for _ in range(max_items)]
+            self.depth_gauge.set(len(self._queue))
+            self._not_full.notify_all()
+        return items
+
+    def wait(self, timeout_s: float=None) -> bool:
+        """
+        Wait until samples are available (or channel is closed).
+
+        Returns:
+            bool: True if samples are available.
+        """
+        with self._lock:
+            self._not_empty.wait_for(lambda: len(self._queue) or self._closed, timeout=timeout_s)
+            return 0 < len(self._queue)
+
+    def close(self) -> None:
+        """ Release any blocked producer/consumer - e.g. on shutdown. """
+        with self._lock:
+            self._closed = True
+            self._not_full.notify_all()
+            self._not_empty.notify_all()
@@ -0,0 +1,113 @@
+"""
+@file config.py
+
+@brief Deployment configuration (TOML or YAML) for the dashboard runner - see '__main__.py'.
+
+The runner exports the config-file path as 'PDB_CONFIG', and the broker/metrics settings as the existing
+environment overrides ('PDB_MQTT_BROKER', 'PDB_MQTT_PORT', ...). Example scripts read the remaining settings
+w. 'setting()', falling back to their built-in defaults - i.e. they still run stand-alone, w.o. any config.
+
+Config layout (TOML - the YAML equivalent has the same keys):
+    [source]
+    broker = "localhost"
+    port = 1883
+    client_id = "kiosk-1"           # Stable id -> persistent session is resumed across restarts.
+
+    [channel]
+    topic = "1/testPoints/sinus"
+    buffer_points = 5000            # Points kept in the chart's buffer.
+
+    [frontend]
+    name = "bokeh"                  # See 'python -m py_dash_boards --list'.
+    render_floor_ms = 33            # Adaptive render-rate limits - see 'py_dash_boards.governor'.
+    render_ceiling_ms = 1000
+    debug = false
+
+    [metrics]
+    port = 9100
+
+Usage:
+    >>> RENDER_FLOOR_MS = setting("frontend.render_floor_ms", 33)
+"""
+
+import os
+
+
+CONFIG_ENV = "PDB_CONFIG"
+
+# Config-keys exported as environment overrides, read by the scripts (and 'benchmarks/'):
+ENV_OVERRIDES = {
+    "source.broker": "PDB_MQTT_BROKER",
+    "source.port": "PDB_MQTT_PORT",
+    "source.client_id": "PDB_MQTT_CLIENT_ID",
+    "metrics.port": "PDB_METRICS_PORT",
+    "frontend.frame_port": "PDB_FRAME_PORT",
+}
+
+_active = None
+
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError as exc:
+        raise ImportError("YAML config-files need 'PyYAML' - install w. 'pip install pyyaml' (or use TOML)") from exc
+    return yaml
+
+
+def load_config(path: str) -> dict:
+    """ Load a '.toml' or '.yaml'/'.yml' config-file. """
+    ext = os.path.splitext(path)[1].lower()
+    if ".toml" == ext:
+        import tomllib
+        #
+        with open(path, "rb") as f:
+            config = tomllib.load(f)
+    elif ext in (".yaml", ".yml"):
+        with open(path, "r", encoding="utf-8") as f:
+            config = _yaml().safe_load(f) or {}
+    else:
+        raise ValueError(f"Unsupported config-file type '{ext}' - use .toml, .yaml or .yml")
+    if not isinstance(config, dict):
+        raise ValueError(f"Config-file '{path}' must contain a mapping at top-level.")
+    return config
+
+
+def lookup(config: dict, key: str, default: object=None) -> object:
+    """ Dotted-key lookup, e.g. 'frontend.render_floor_ms'. """
+    node = config
+    for part in key.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
+
+
+def active_config() -> dict:
+    """ Config of this process - loaded (once) from '$PDB_CONFIG', empty if not set. """
+    global _active
+    #
+    if _active is None:
+        path = os.environ.get(CONFIG_ENV)
+        _active = load_config(path) if path else {}
+    return _active
+
+
+def setting(key: str, default: object=None) -> object:
+    """ Setting from the active config, or 'default' if not configured. """
+    return lookup(active_config(), key, default)
+
+
+def export_environment(config: dict, path: str=None, environ: dict=None) -> dict:
+    """
+    Export broker/metrics settings as environment overrides - already set variables are kept, i.e. the environment
+    overrides the config-file (as for the stand-alone scripts).
+    """
+    environ = os.environ if environ is None else environ
+    if path:
+        environ[CONFIG_ENV] = os.path.abspath(path)
+    for key, env_name in ENV_OVERRIDES.items():
+        value = lookup(config, key)
+        if value is not None:
+            environ.setdefault(env_name, str(value))
+    return environ
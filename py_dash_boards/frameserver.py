@@ -0,0 +1,264 @@
+"""
+@file frameserver.py
+
+@brief Headless (Agg) render service for the Matplotlib examples - for edge boxes w.o. a desktop.
+
+ONE render loop draws the figure at a target fps into the (reused) Agg canvas, and publishes each frame.
+Frames are encoded (JPEG/PNG/WebP, via Pillow) in a worker pool, lazily and at most ONCE per frame and format,
+i.e. any number of viewers share one render and one encode per frame. Served over HTTP:
+    /                   minimal HTML page showing the stream
+    /stream.mjpg        MJPEG stream (multipart/x-mixed-replace) - works in any browser '<img>'
+    /snapshot.<fmt>     latest frame (fmt: png, jpg, webp), w. ETag - unchanged frames are answered '304 Not Modified'
+
+Usage:
+    >>> renderer = FrameRenderer(fig, update=animate, fps=10)       # 'animate(frame_no)' may return False = nothing new.
+    >>> renderer = FrameRenderer(fig, update=animate, governor=RenderGovernor("matplotlib"))    # Or: adaptive rate.
+    >>> renderer.start()
+    >>> serve_frames(renderer, port=8090)
+"""
+
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from py_dash_boards.metrics import REGISTRY, Registry
+from py_dash_boards.governor import RenderGovernor
+
+
+CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+JPEG_QUALITY = 80
+MJPEG_BOUNDARY = "pdbframe"
+STREAM_WAIT_S = 5.0             # Max. wait for a (new) frame, before re-checking the connection/renderer.
+
+
+class Frame:
+    """
+    One rendered frame (RGBA pixels) - encoded on demand, at most once per format (shared by all viewers).
+    """
+    def __init__(self, seq: int, rgba: np.ndarray, etag_prefix: str, pool: ThreadPoolExecutor, encode_counter):
+        self.seq = seq
+        self.rgba = rgba
+        self.t_rendered = time.time()
+        self.etag = f'"{etag_prefix}-{seq}"'
+        self._pool = pool
+        self._encode_counter = encode_counter
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _encode(self, fmt: str) -> bytes:
+        from PIL import Image
+        #
+        height, width = self.rgba.shape[:2]
+        image = Image.frombuffer("RGBA", (width, height), self.rgba, "raw", "RGBA", 0, 1)
+        out = io.BytesIO()
+        if "jpg" == fmt:
+            image.convert("RGB").save(out, format="JPEG", quality=JPEG_QUALITY)
+        elif "webp" == fmt:
+            image.save(out, format="WEBP", quality=JPEG_QUALITY, method=0)       # NOTE: 'method=0' = fastest.
+        else:
+            image.save(out, format="PNG", compress_level=1)
+        self._encode_counter.inc()
+        return out.getvalue()
+
+    def prefetch(self, fmt: str):
+        """ Start encoding (in the worker pool) if not already done/started - returns the future. """
+        with self._lock:
+            future = self._futures.get(fmt)
+            if future is None:
+                future = self._pool.submit(self._encode, fmt)
+                self._futures[fmt] = future
+            return future
+
+    def encoded(self, fmt: str) -> bytes:
+        return self.prefetch(fmt).result()
+
+
+class FrameRenderer:
+    """
+    Render loop: 'update(frame_no)' (e.g. the example's 'animate()') + Agg draw, at most 'fps' times per second.
+    If 'update' returns False, there is nothing new - the frame is neither drawn nor encoded.
+    W. a 'governor' the loop ticks at the governor's floor-rate instead, and renders (update + draw) only when the
+    governor says so - see 'py_dash_boards.governor'.
+    """
+    def __init__(self, fig, update: object=None, fps: float=10.0, encode_workers: int=2, governor: RenderGovernor=None,
+                 registry: Registry=REGISTRY):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        #
+        self.fig = fig
+        self.canvas = fig.canvas if isinstance(fig.canvas, FigureCanvasAgg) else FigureCanvasAgg(fig)
+        self.update = update
+        self.governor = governor
+        self.fps = 1000 / governor.tick_ms if governor is not None else fps
+        self.frame_no = 0
+        self._pool = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="frame-encode")
+        self._etag_prefix = f"{os.getpid():x}{int(time.time()):x}"        # Unique per run - stale browser caches never match.
+        self._frame = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stream_viewers = 0
+        self.render_counter = registry.counter("pdb_frameserver_renders_total", "Frames rendered (Agg draw).")
+        self.encode_counter = registry.counter("pdb_frameserver_encodes_total", "Frame encodes (all formats).")
+        self.viewers_gauge = registry.gauge("pdb_frameserver_stream_viewers", "Connected MJPEG viewers.")
+
+    @property
+    def frame(self) -> Frame|None:
+        return self._frame
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def render_once(self) -> bool:
+        """ Run update + draw; publish a new frame if anything changed. """
+        if self.governor is None:
+            return self._render()
+        if self._frame is not None and not self.governor.should_render():
+            return False
+        t_start = time.monotonic()
+        if not self._render():
+            self.governor.postpone()
+            return False
+        self.governor.rendered(t_start, time.monotonic() - t_start)
+        return True
+
+    def _render(self) -> bool:
+        changed = self.update(self.frame_no) if self.update is not None else None
+        self.frame_no += 1
+        if changed is False and self._frame is not None:
+            return False
+        self.canvas.draw()
+        rgba = np.asarray(self.canvas.buffer_rgba()).copy()     # NOTE: the canvas' buffer is re-used by the next draw.
+        self.render_counter.inc()
+        with self._cond:
+            seq = self._frame.seq + 1 if self._frame is not None else 0
+            self._frame = Frame(seq, rgba, self._etag_prefix, self._pool, self.encode_counter)
+            if self.stream_viewers:
+                self._frame.prefetch("jpg")         # Encode once, right away - all stream viewers wait for it.
+            self._cond.notify_all()
+        return True
+
+    def wait_frame(self, after_seq: int, timeout_s: float) -> Frame|None:
+        """ Block until a frame newer than 'after_seq' is published (or timeout) - returns the latest frame. """
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame is not None and self._frame.seq > after_seq or self._stop.is_set(), timeout_s)
+            return self._frame
+
+    def run(self) -> None:
+        """ Render loop w. fixed frame-slots - a slow frame skips slots rather than drifting. """
+        period = 1.0 / self.fps
+        t_next = time.monotonic()
+        while not self._stop.is_set():
+            self.render_once()
+            t_next += period
+            delay = t_next - time.monotonic()
+            if delay < 0:
+                t_next = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run, name="frame-render", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._pool.shutdown(wait=False)
+
+    def add_viewer(self, delta: int) -> None:
+        with self._cond:
+            self.stream_viewers += delta
+            self.viewers_gauge.set(self.stream_viewers)
+
+
+INDEX_HTML = """<!DOCTYPE html>
+<html><head><title>py_dash_boards</title></head>
+<body style="margin:0;background:#222"><img src="stream.mjpg" style="max-width:100%"></body></html>
+"""
+
+
+def serve_frames(renderer: FrameRenderer, port: int, address: str="0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve the renderer's frames over HTTP, from a daemon thread (one thread per connection).
+
+    Returns:
+        ThreadingHTTPServer: server instance - call 'shutdown()' to stop.
+    """
+    class FrameHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path in ("/", "/index.html"):
+                self._send(200, "text/html; charset=utf-8", INDEX_HTML.encode("utf-8"))
+            elif "/stream.mjpg" == path:
+                self._stream()
+            elif path.startswith("/snapshot.") and path.rsplit(".", 1)[-1] in CONTENT_TYPES:
+                self._snapshot(path.rsplit(".", 1)[-1])
+            else:
+                self.send_error(404)
+
+        def _send(self, status: int, content_type: str, body: bytes, etag: str=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")       # I.e. browsers re-validate w. the ETag.
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _snapshot(self, fmt: str):
+            frame = renderer.frame or renderer.wait_frame(-1, STREAM_WAIT_S)
+            if frame is None:
+                self.send_error(503, "No frame rendered yet")
+                return
+            if self.headers.get("If-None-Match") == frame.etag:
+                self.send_response(304)
+                self.send_header("ETag", frame.etag)
+                self.end_headers()
+                return
+            self._send(200, CONTENT_TYPES[fmt], frame.encoded(fmt), etag=frame.etag)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            renderer.add_viewer(+1)
+            last_seq = -1
+            try:
+                while True:
+                    frame = renderer.wait_frame(last_seq, STREAM_WAIT_S)
+                    if renderer.stopped:
+                        break
+                    if frame is None or frame.seq == last_seq:
+                        continue        # Nothing new (e.g. no data) - the viewer keeps showing the last frame.
+                    jpeg = frame.encoded("jpg")
+                    self.wfile.write(f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode("ascii"))
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+                    self.wfile.flush()
+                    last_seq = frame.seq
+            except (BrokenPipeError, ConnectionResetError):
+                pass        # Viewer went away.
+            finally:
+                renderer.add_viewer(-1)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((address, port), FrameHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="frame-http", daemon=True)
+    thread.start()
+    #
+    return server
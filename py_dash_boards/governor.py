@@ -0,0 +1,146 @@
+"""
+@file governor.py
+
+@brief Adaptive render-rate governor for the periodic-callback dashboards (Bokeh, Panel, Taipy, Matplotlib).
+
+The periodic callback ticks at the floor interval (e.g. 33 ms, i.e. max. ~30 fps), and the governor decides per tick
+whether to render:
+    - no new data since the previous render -> skip (idle topics cost next to nothing)
+    - else render, if the target interval has passed since the previous render, where
+        target = max(floor, render-cost / max_load, 1 / arrival-rate), capped at the ceiling
+      i.e. hot topics render at up to the floor-rate, expensive renders are throttled to keep the load below
+      'max_load', and slow topics render once per arrival (never later than 'ceiling' after the previous render).
+Render cost and arrival rate are exponentially smoothed. The effective fps (renders over the last 'FPS_WINDOW_S')
+is reported as 'pdb_effective_fps'.
+
+Usage:
+    >>> governor = RenderGovernor("bokeh")
+    >>> governor.arrived()                                      # MQTT-thread, per sample (or block).
+    >>> def flush_chart():                                      # Periodic callback, every 'governor.tick_ms'.
+    >>>     if not governor.should_render():
+    >>>         return
+    >>>     with governor.frame():
+    >>>         source.stream(...)
+    >>> doc.add_periodic_callback(flush_chart, governor.tick_ms)
+Pull-based frontends (reading a ring-buffer) call 'governor.observe_total(ring.total)' per tick instead of 'arrived()'.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from py_dash_boards.metrics import REGISTRY, Registry
+
+
+DEFAULT_FLOOR_MS = 33           # I.e. max. ~30 fps.
+DEFAULT_CEILING_MS = 1000
+DEFAULT_MAX_LOAD = 0.5          # Max. fraction of time spent rendering.
+FPS_WINDOW_S = 2.0
+
+
+class RenderGovernor:
+    """
+    Decides per tick whether to render, from render cost and data arrival rate. Thread-safe ('arrived()' may be
+    called from any thread - 'should_render()' and 'frame()' from the render-callback only).
+    """
+    def __init__(self, frontend: str, floor_ms: int=DEFAULT_FLOOR_MS, ceiling_ms: int=DEFAULT_CEILING_MS,
+                 max_load: float=DEFAULT_MAX_LOAD, smoothing: float=0.2, registry: Registry=REGISTRY):
+        self.floor_s = floor_ms / 1000
+        self.ceiling_s = max(ceiling_ms, floor_ms) / 1000
+        self.max_load = max_load
+        self.smoothing = smoothing
+        self.rate = 0.0                 # Arrivals per second (smoothed).
+        self.cost_s = 0.0               # Render duration (smoothed).
+        self.interval_s = self.floor_s
+        self._pending = 0               # Arrivals since previous render.
+        self._total = None              # Last sample-total seen by 'observe_total()'.
+        self._new = 0                   # Arrivals since previous tick.
+        self._t_tick = None
+        self._t_render = None
+        self._renders = deque()
+        self._lock = threading.Lock()
+        labels = {"frontend": frontend}
+        self.interval_gauge = registry.gauge("pdb_render_interval_seconds", "Target interval between renders.", labels)
+        self.fps_gauge = registry.gauge("pdb_effective_fps", f"Renders per second (over the last {FPS_WINDOW_S:g} sec.).", labels)
+        self.skipped_counter = registry.counter("pdb_frames_skipped_total", "Ticks w.o. render (no new data, or too early).", labels)
+
+    @property
+    def tick_ms(self) -> int:
+        """ Period for the frontend's periodic callback [ms]. """
+        return max(1, round(self.floor_s * 1000))
+
+    @property
+    def fps(self) -> float:
+        return self.fps_gauge.value
+
+    def arrived(self, n: int=1) -> None:
+        with self._lock:
+            self._pending += n
+            self._new += n
+
+    def observe_total(self, total: int) -> None:
+        """ Pull-based frontends: report the source's running sample-total (e.g. 'RingBuffer.total') before each tick. """
+        last, self._total = self._total, total
+        if total > (last or 0):
+            self.arrived(total - (last or 0))
+
+    def should_render(self, now: float=None) -> bool:
+        """ Call once per tick - True if a frame should be rendered now (pending arrivals are then cleared). """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._t_tick is not None and now > self._t_tick:
+                self.rate += self.smoothing * (self._new / (now - self._t_tick) - self.rate)
+            self._t_tick, self._new = now, 0
+            interval = max(self.floor_s, self.cost_s / self.max_load, 1.0 / self.rate if 0 < self.rate else self.ceiling_s)
+            self.interval_s = min(interval, self.ceiling_s)
+            # NOTE: ticks are 'floor' apart - half a tick early is closer to the target than half a tick late.
+            due = self._t_render is None or now - self._t_render + self.floor_s / 2 >= self.interval_s
+            render = 0 < self._pending and due
+            if render:
+                self._pending = 0
+            while self._renders and self._renders[0] < now - FPS_WINDOW_S:
+                self._renders.popleft()
+        self.interval_gauge.set(self.interval_s)
+        self.fps_gauge.set(len(self._renders) / FPS_WINDOW_S)
+        if not render:
+            self.skipped_counter.inc()
+        return render
+
+    def wrap(self, update: object) -> object:
+        """
+        Governed version of a per-tick 'update(*args)' callback, e.g. Matplotlib's 'FuncAnimation' function.
+        Skipped ticks return False (i.e. 'nothing new') - and if 'update' returns False, the render is postponed.
+        """
+        def governed(*args, **kwargs):
+            if not self.should_render():
+                return False
+            t_start = time.monotonic()
+            changed = update(*args, **kwargs)
+            if changed is False:
+                self.postpone()
+            else:
+                self.rendered(t_start, time.monotonic() - t_start)
+            return changed
+        return governed
+
+    def postpone(self) -> None:
+        """ A due render found nothing to show yet (e.g. held back by a 'ReorderBuffer') - re-check on the next tick. """
+        with self._lock:
+            self._pending = max(self._pending, 1)
+
+    @contextmanager
+    def frame(self):
+        """ Wrap the render - measures its cost. """
+        t_start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.rendered(t_start, time.monotonic() - t_start)
+
+    def rendered(self, t_start: float, duration_s: float) -> None:
+        """ Record a render started at 't_start' (monotonic) - for frontends timing their renders themselves. """
+        with self._lock:
+            self.cost_s += self.smoothing * (duration_s - self.cost_s)
+            self._t_render = t_start
+            self._renders.append(t_start)
@@ -0,0 +1,173 @@
+"""
+@file ingest.py
+
+@brief Shared MQTT-client setup for the dashboard examples, w. reconnect, resubscribe and session-resume.
+
+'ConnectionManager' keeps a long-running dashboard connected through broker restarts and network blips:
+    - reconnect w. exponential backoff (paho's own reconnect-loop, 'min_backoff_s' doubling up to 'max_backoff_s')
+    - (re-)subscription in 'on_connect', i.e. on EVERY connect - NOT once before the first connect
+    - persistent session (clean_session=False) w. QoS 1 - the broker queues messages during short outages,
+      if a stable client-id is configured (see below)
+    - gap listeners, called w. (t_start_ns, t_end_ns) of each outage - e.g. to insert a gap marker into the buffers
+    - metrics: connection state, reconnects, and total time spent disconnected
+
+NOTE: a persistent session is bound to the client-id. W.o. a stable 'client_id' (or 'PDB_MQTT_CLIENT_ID') each client
+gets a random id (paho 1.x; broker-assigned w. paho 2.x) and a clean session - i.e. several clients per process (e.g. one per 'panel serve'-session) do NOT
+take over each other's session, and restarts leave NO orphaned sessions queueing messages on the broker.
+W. a stable id the session is persistent, i.e. resumed across reconnects AND restarts - use ONE client per id!
+"""
+
+import os
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from py_dash_boards.metrics import REGISTRY, Registry
+
+
+MIN_BACKOFF_S = 1
+MAX_BACKOFF_S = 60
+GAP_VALUE = float("nan")        # Gap marker for line-charts (all frontends break the line at NaN).
+
+
+def new_client(client_id: str="", clean_session: bool=True) -> mqtt.Client:
+    """ Create paho-client w. the (v1-style) callback-signatures used throughout the examples. """
+    try:
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id=client_id, clean_session=clean_session)     # paho-mqtt >= 2.0
+    except AttributeError:
+        return mqtt.Client(client_id=client_id, clean_session=clean_session)                                      # paho-mqtt 1.x
+
+
+def default_client_id() -> str:
+    """ Configured stable client-id, or "" (i.e. a random / broker-assigned id). """
+    return os.environ.get("PDB_MQTT_CLIENT_ID", "")
+
+
+class ConnectionManager:
+    """
+    MQTT-client w. automatic reconnect + resubscribe, and outage book-keeping.
+    """
+    def __init__(self, broker_address: str, broker_port: int, topic: str|list, msg_event_handler: object=None,
+                 conn_event_handler: object=None, qos: int=1, clean_session: bool|None=None, client_id: str=None,
+                 min_backoff_s: int=MIN_BACKOFF_S, max_backoff_s: int=MAX_BACKOFF_S, registry: Registry=REGISTRY):
+        self.broker_address = broker_address
+        self.broker_port = broker_port
+        self.topics = [topic] if isinstance(topic, str) else list(topic)
+        self.qos = qos
+        self.conn_event_handler = conn_event_handler
+        self.client_id = client_id or default_client_id()
+        self.clean_session = not self.client_id if clean_session is None else clean_session     # Persistent w. stable id only.
+        self.client = new_client(self.client_id, self.clean_session)
+        self.client.reconnect_delay_set(min_delay=min_backoff_s, max_delay=max_backoff_s)
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        if msg_event_handler:
+            self.client.on_message = msg_event_handler
+        self._gap_listeners = []
+        self._lock = threading.Lock()
+        self._down_since_ns = time.time_ns()        # Not connected yet - the initial connect is NOT counted as outage.
+        self._down_since_mono = None
+        self._disconnected_s = 0.0
+        labels = {"broker": f"{broker_address}:{broker_port}"}
+        self.connected_gauge = registry.gauge("pdb_mqtt_connected", "1 if connected to the broker, else 0.", labels)
+        self.reconnect_counter = registry.counter("pdb_mqtt_reconnects_total", "Reconnects after a lost connection.", labels)
+        self.disconnected_counter = registry.counter("pdb_mqtt_disconnected_seconds_total", "Time spent disconnected (completed outages).", labels)
+
+    # ******************************* MQTT callbacks *******************************
+
+    def _on_connect(self, client, userdata, flags, rc: int=0):
+        if rc != 0:
+            print(f"ERROR: failed to connect, return code {rc}")
+            return
+        # NOTE: (re-)subscribe on EVERY connect - also if the broker kept the session, as it may have been expired:
+        client.subscribe([(t, self.qos) for t in self.topics])
+        with self._lock:
+            t_down_mono, self._down_since_mono = self._down_since_mono, None
+            t_down_ns = self._down_since_ns
+        self.connected_gauge.set(1)
+        if t_down_mono is not None:
+            outage_s = time.monotonic() - t_down_mono
+            self._disconnected_s += outage_s
+            self.disconnected_counter.inc(outage_s)
+            self.reconnect_counter.inc()
+            print(f"Reconnected to MQTT Broker after {outage_s:.1f} sec. (session present: {bool(flags.get('session present'))})")
+            t_up_ns = time.time_ns()
+            for callback in self._gap_listeners:
+                callback(t_down_ns, t_up_ns)
+        else:
+            print("Connected to MQTT Broker!")
+        if self.conn_event_handler:
+            self.conn_event_handler(client, userdata, flags, rc)
+
+    def _on_disconnect(self, client, userdata, rc: int=0):
+        with self._lock:
+            if self._down_since_mono is None:
+                self._down_since_mono = time.monotonic()
+                self._down_since_ns = time.time_ns()
+        self.connected_gauge.set(0)
+        if rc != 0:
+            print(f"WARN: lost connection to MQTT Broker (rc={rc}) - reconnecting ...")
+
+    # ******************************* Public API *******************************
+
+    @property
+    def connected(self) -> bool:
+        return self.client.is_connected()
+
+    @property
+    def disconnected_seconds(self) -> float:
+        """ Total time spent disconnected, incl. an ongoing outage. """
+        with self._lock:
+            ongoing = time.monotonic() - self._down_since_mono if self._down_since_mono is not None else 0.0
+        return self._disconnected_s + ongoing
+
+    def add_gap_listener(self, callback: object) -> None:
+        """ Get notified - callback(t_start_ns, t_end_ns) - after each outage, e.g. to insert a gap marker ('GAP_VALUE'). """
+        self._gap_listeners.append(callback)
+
+    def connect(self) -> mqtt.Client:
+        """ Blocking first connect (raises on failure) - afterwards, paho's loop reconnects w. backoff. """
+        self.client.connect(self.broker_address, self.broker_port)
+        return self.client
+
+    def start(self) -> mqtt.Client:
+        """ Non-blocking: connect (w. retries + backoff, also for the FIRST connect) in paho's network-thread. """
+        self.client.connect_async(self.broker_address, self.broker_port)
+        self.client.loop_start()
+        return self.client
+
+    def stop(self) -> None:
+        self.client.disconnect()
+        self.client.loop_stop()
+
+
+def mqtt_setup(broker_address: str, broker_port: int, topic: str|list, msg_event_handler: object=None, conn_event_handler: object=None,
+               qos: int=1, clean_session: bool|None=None, client_id: str=None) -> mqtt.Client:
+    """
+    Complete setup of MQTT-client, including connecting event-handlers to events - see 'ConnectionManager'.
+    Call 'loop_start()' (or 'loop_forever()') on the returned client - its network-loop also does the reconnects.
+
+    Args:
+        broker_address (str): broker hostname or IP-address.
+        broker_port (int): broker TCP-port.
+        topic (str|list): topic, or list of topics - wildcards ('+', '#') allowed.
+        msg_event_handler (object, optional): 'on_message' callback. Defaults to printing the payload.
+        conn_event_handler (object, optional): additional 'on_connect' callback (subscribing is done already).
+        qos (int, optional): subscription QoS. Defaults to 1.
+        clean_session (bool, optional): Defaults to a persistent session if a stable client-id is configured, else a clean one.
+        client_id (str, optional): Defaults to 'default_client_id()', i.e. 'PDB_MQTT_CLIENT_ID' or a random id.
+
+    Returns:
+        mqtt.Client: MQTT-client instance - the 'ConnectionManager' is available as 'client.manager'.
+    """
+    def default_msg_handler(client, userdata, msg):
+        data = msg.payload.decode("utf-8")
+        print(f"Received data on '{msg.topic}': {data}")
+
+    manager = ConnectionManager(broker_address, broker_port, topic, msg_event_handler or default_msg_handler, conn_event_handler,
+                                qos=qos, clean_session=clean_session, client_id=client_id)
+    client = manager.connect()
+    client.manager = manager
+    #
+    return client
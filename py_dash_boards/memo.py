@@ -0,0 +1,80 @@
+"""
+@file memo.py
+
+@brief Bounded (LRU) memoization of 'param.depends' methods, e.g. dashboard plot-methods.
+
+Results (frames, plot objects) are cached per instance and per tuple of the parameter VALUES the method depends on,
+so toggling back to a previously seen widget state is a dictionary lookup - while server memory stays bounded.
+
+Usage (NOTE: 'memoize' goes OUTSIDE 'param.depends' - the dependency-info is picked up from the wrapped method):
+    >>> class Dashboard(param.Parameterized):
+    ...     @memoize(maxsize=32)
+    ...     @param.depends('cylinders', 'mfr', 'yaxis')
+    ...     def plot(self): ...
+"""
+
+import functools
+import threading
+import weakref
+from collections import OrderedDict
+
+
+def _freeze(value: object) -> object:
+    """ Parameter value -> hashable key-part (e.g. 'ListSelector' values are lists). """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _dependencies(func: object) -> tuple:
+    """ Parameter names declared by 'param.depends' (stored by param as '_dinfo' on the function). """
+    dinfo = getattr(func, "_dinfo", None) or {}
+    return tuple(dep for dep in dinfo.get("dependencies", ()) if isinstance(dep, str))
+
+
+def memoize(maxsize: int=32, params: tuple=None):
+    """
+    LRU-memoize a method on the values of 'params' (default: the names given to 'param.depends').
+    The wrapper gets 'cache_info()' and 'cache_clear()', like 'functools.lru_cache'.
+    """
+    def decorator(func):
+        names = tuple(params) if params is not None else _dependencies(func)
+        if not names:
+            raise ValueError(f"'{func.__name__}': no parameters to memoize on - use 'param.depends' or pass 'params'!")
+        caches = weakref.WeakKeyDictionary()        # Per instance, w.o. keeping instances alive.
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0}
+
+        @functools.wraps(func)      # NOTE: also copies '_dinfo', i.e. Panel/param still see the dependencies.
+        def wrapper(self, *args, **kwargs):
+            key = tuple(_freeze(getattr(self, name)) for name in names) + _freeze(args) + _freeze(kwargs)
+            with lock:
+                cache = caches.setdefault(self, OrderedDict())
+                if key in cache:
+                    cache.move_to_end(key)
+                    stats["hits"] += 1
+                    return cache[key]
+                stats["misses"] += 1
+            result = func(self, *args, **kwargs)
+            with lock:
+                cache[key] = result
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return result
+
+        def cache_info() -> dict:
+            with lock:
+                return dict(stats, size=sum(len(c) for c in caches.values()), maxsize=maxsize)
+
+        def cache_clear() -> None:
+            with lock:
+                caches.clear()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
@@ -0,0 +1,382 @@
+"""
+@file metrics.py
+
+@brief In-process latency/throughput instrumentation for the MQTT dashboards.
+
+Each sample is timestamped at MQTT receive, and the time elapsed since receive is recorded
+when the sample has been parsed, inserted into the plot buffer, scheduled for render and rendered.
+All values end up in a registry of counters and histograms (p50/p99 available in-process),
+which optionally can be scraped by Prometheus over HTTP (text exposition format).
+
+Usage:
+    >>> tracer = SampleTracer("matplotlib")
+    >>> t_recv = tracer.received()
+    >>> ...                                 # Parse payload.
+    >>> tracer.parsed(t_recv)
+    >>> ...                                 # Append to plot data.
+    >>> tracer.inserted(t_recv)
+    >>> ...                                 # In render callback:
+    >>> tracer.render_scheduled()
+    >>> ...                                 # Draw.
+    >>> tracer.render_complete()
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Stages, in pipeline order:
+STAGE_PARSE = "parse"
+STAGE_INSERT = "insert"
+STAGE_RENDER_SCHEDULE = "render_schedule"
+STAGE_RENDER_COMPLETE = "render_complete"
+
+# Histogram buckets (upper bounds in seconds) - log-spaced from 10 us to ~100 s:
+DEFAULT_BUCKETS = tuple(round(10 ** (e / 4), 9) for e in range(-20, 9))
+
+
+# ********************************** Metric Types **************************************
+
+def bucket_quantile(buckets: tuple, counts: list, q: float) -> float:
+    """
+    Estimate quantile from (NON-cumulative) histogram bucket counts.
+
+    Args:
+        buckets (tuple): sorted bucket upper bounds.
+        counts (list): count per bucket, with one extra trailing '+Inf' bucket.
+        q (float): quantile in range [0, 1], e.g. 0.99 for p99.
+
+    Returns:
+        float: estimated value, or NaN if there are no observations.
+    """
+    total = sum(counts)
+    if 0 == total:
+        return float("nan")
+    #
+    rank = q * total
+    cumulative = 0
+    for idx, bucket_count in enumerate(counts):
+        if cumulative + bucket_count >= rank and 0 < bucket_count:
+            if idx == len(buckets):
+                return buckets[-1]      # Value is in '+Inf' bucket - best we can say is 'larger than last bound'.
+            lower = buckets[idx - 1] if 0 < idx else 0.0
+            upper = buckets[idx]
+            return lower + (upper - lower) * (rank - cumulative) / bucket_count
+        cumulative += bucket_count
+    #
+    return buckets[-1]
+
+
+class Counter:
+    """
+    Monotonically increasing counter.
+    """
+    def __init__(self, name: str, help_text: str="", labels: dict=None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels or {}
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int|float=1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int|float:
+        return self._value
+
+
+class Gauge(Counter):
+    """
+    Counter-like value which also may go down (e.g. queue depth, effective fps).
+    """
+    def set(self, value: int|float) -> None:
+        with self._lock:
+            self._value = value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Quantiles are estimated by linear interpolation inside the bucket,
+    i.e. the same way as Prometheus' 'histogram_quantile()' does it.
+    """
+    def __init__(self, name: str, help_text: str="", labels: dict=None, buckets: tuple=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels or {}
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)       # Last slot is the '+Inf' bucket.
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate quantile from bucket counts.
+
+        Args:
+            q (float): quantile in range [0, 1], e.g. 0.99 for p99.
+
+        Returns:
+            float: estimated value, or NaN if nothing was observed yet.
+        """
+        with self._lock:
+            counts = list(self._counts)
+        return bucket_quantile(self.buckets, counts, q)
+
+    def cumulative_counts(self) -> list:
+        with self._lock:
+            counts = list(self._counts)
+        cumulative = []
+        running = 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative
+
+
+# ********************************** Registry **************************************
+
+class Registry:
+    """
+    Collection of metrics, keyed on (name, labels).
+    Metrics are created on first access, so instrumented code never has to check for existence.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, help_text: str, labels: dict, **kwargs) -> object:
+        key = (name, tuple(sorted((labels or {}).items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(name, help_text, labels, **kwargs)
+                    self._metrics[key] = metric
+        if not isinstance(metric, cls):
+            raise TypeError(f"Metric '{name}' is already registered as {type(metric).__name__}!")
+        return metric
+
+    def counter(self, name: str, help_text: str="", labels: dict=None) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str="", labels: dict=None) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str="", labels: dict=None, buckets: tuple=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def metrics(self) -> list:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> dict:
+        """
+        Get a plain-dict view of all metrics, e.g. for logging or JSON dumps.
+        Histograms are summarized as count/sum/p50/p99.
+        """
+        result = {}
+        for metric in self.metrics():
+            label_str = ",".join(f"{k}={v}" for k, v in sorted(metric.labels.items()))
+            key = f"{metric.name}{{{label_str}}}" if label_str else metric.name
+            if isinstance(metric, Histogram):
+                result[key] = {
+                    "count": metric.count,
+                    "sum": metric.sum,
+                    "p50": metric.quantile(0.5),
+                    "p99": metric.quantile(0.99),
+                }
+            else:
+                result[key] = metric.value
+        return result
+
+    def to_prometheus(self) -> str:
+        """
+        Render all metrics in Prometheus text exposition format (version 0.0.4).
+        """
+        def fmt_labels(labels: dict, extra: dict=None) -> str:
+            merged = dict(labels)
+            if extra:
+                merged.update(extra)
+            if not merged:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(merged.items())) + "}"
+        #
+        lines = []
+        seen_headers = set()
+        for metric in sorted(self.metrics(), key=lambda m: m.name):
+            if metric.name not in seen_headers:
+                seen_headers.add(metric.name)
+                metric_type = "histogram" if isinstance(metric, Histogram) else ("gauge" if isinstance(metric, Gauge) else "counter")
+                if metric.help_text:
+                    lines.append(f"# HELP {metric.name} {metric.help_text}")
+                lines.append(f"# TYPE {metric.name} {metric_type}")
+            #
+            if isinstance(metric, Histogram):
+                cumulative = metric.cumulative_counts()
+                for bound, count in zip(metric.buckets, cumulative):
+                    lines.append(f"{metric.name}_bucket{fmt_labels(metric.labels, {'le': repr(bound)})} {count}")
+                lines.append(f"{metric.name}_bucket{fmt_labels(metric.labels, {'le': '+Inf'})} {cumulative[-1]}")
+                lines.append(f"{metric.name}_sum{fmt_labels(metric.labels)} {metric.sum}")
+                lines.append(f"{metric.name}_count{fmt_labels(metric.labels)} {metric.count}")
+            else:
+                lines.append(f"{metric.name}{fmt_labels(metric.labels)} {metric.value}")
+        #
+        return "\n".join(lines) + "\n"
+
+
+# Default (process-wide) registry:
+REGISTRY = Registry()
+
+
+# ********************************** Tracing **************************************
+
+class SampleTracer:
+    """
+    Per-frontend latency tracer. All latencies are measured relative to the MQTT receive timestamp
+    of a sample, so each stage histogram shows the accumulated latency up to (and including) that stage.
+
+    NOTE: render stages are batch-oriented - one render covers all samples inserted since previous render.
+    The reported render latency is that of the OLDEST pending sample, i.e. worst case for the batch.
+    """
+    def __init__(self, frontend: str, registry: Registry=REGISTRY):
+        self.frontend = frontend
+        self.registry = registry
+        labels = {"frontend": frontend}
+        self.msg_counter = registry.counter("pdb_messages_received_total", "MQTT messages received.", labels)
+        self.render_counter = registry.counter("pdb_renders_total", "Completed renders.", labels)
+        self.stage_hist = {
+            stage: registry.histogram("pdb_stage_latency_seconds", "Latency from MQTT receive to end of stage.", dict(labels, stage=stage))
+            for stage in (STAGE_PARSE, STAGE_INSERT, STAGE_RENDER_SCHEDULE, STAGE_RENDER_COMPLETE)
+        }
+        self.render_duration = registry.histogram("pdb_render_duration_seconds", "Time spent drawing one frame.", labels)
+        self.first_frame_gauge = registry.gauge("pdb_first_frame_timestamp_seconds", "Wall-clock time of the first render showing data (0 = none yet).", labels)
+        # Oldest receive-timestamp NOT yet rendered (None = nothing pending):
+        self._pending_t_recv = None
+        self._scheduled = None
+        self._t_render_start = None
+        self._lock = threading.Lock()
+
+    def received(self) -> int:
+        """
+        Mark MQTT receive of a sample.
+
+        Returns:
+            int: receive timestamp (perf-counter nanoseconds), to be passed on to the following stages.
+        """
+        self.msg_counter.inc()
+        return time.perf_counter_ns()
+
+    def parsed(self, t_recv: int) -> None:
+        self.stage_hist[STAGE_PARSE].observe((time.perf_counter_ns() - t_recv) * 1e-9)
+
+    def inserted(self, t_recv: int) -> None:
+        self.stage_hist[STAGE_INSERT].observe((time.perf_counter_ns() - t_recv) * 1e-9)
+        with self._lock:
+            if self._pending_t_recv is None:
+                self._pending_t_recv = t_recv
+
+    def render_scheduled(self) -> bool:
+        """
+        Mark start of a render. Samples inserted after this call belong to the NEXT render.
+
+        Returns:
+            bool: True if there are samples pending render.
+        """
+        with self._lock:
+            self._scheduled = self._pending_t_recv
+            self._pending_t_recv = None
+        t_now = time.perf_counter_ns()
+        self._t_render_start = t_now
+        if self._scheduled is None:
+            return False
+        self.stage_hist[STAGE_RENDER_SCHEDULE].observe((t_now - self._scheduled) * 1e-9)
+        return True
+
+    def render_complete(self) -> None:
+        t_now = time.perf_counter_ns()
+        self.render_counter.inc()
+        if self._t_render_start is not None:
+            self.render_duration.observe((t_now - self._t_render_start) * 1e-9)
+            self._t_render_start = None
+        if self._scheduled is not None:
+            self.stage_hist[STAGE_RENDER_COMPLETE].observe((t_now - self._scheduled) * 1e-9)
+            self._scheduled = None
+            if 0 == self.first_frame_gauge.value:
+                self.first_frame_gauge.set(time.time())     # NOTE: wall-clock, i.e. comparable to the process' spawn-time - see 'benchmarks/startup.py'.
+
+    def summary(self) -> dict:
+        """
+        Get p50/p99 (in milliseconds) per stage.
+        """
+        return {
+            stage: {"count": hist.count, "p50_ms": hist.quantile(0.5) * 1e3, "p99_ms": hist.quantile(0.99) * 1e3}
+            for stage, hist in self.stage_hist.items()
+        }
+
+
+# ********************************** Prometheus Endpoint **************************************
+
+_http_servers = {}              # (address, port) -> running server, see 'start_http_server()'.
+_http_servers_lock = threading.Lock()
+
+
+def start_http_server(port: int, address: str="0.0.0.0", registry: Registry=REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve registry in Prometheus text format at 'http://<address>:<port>/metrics', from a daemon thread.
+    Idempotent per process and (address, port) - e.g. scripts run once per session by 'panel serve' get the running server.
+
+    Args:
+        port (int): TCP port. Use 0 to let the OS pick one (see 'server.server_port').
+        address (str, optional): bind address. Defaults to all interfaces.
+        registry (Registry, optional): metrics to serve. Defaults to process-wide REGISTRY.
+
+    Returns:
+        ThreadingHTTPServer: server instance - call 'shutdown()' to stop.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass        # NOTE: no per-request logging - scrapes are frequent!
+
+    with _http_servers_lock:
+        server = _http_servers.get((address, port)) if port else None       # NOTE: port 0 - always a new server.
+        if server is not None:
+            return server
+        server = ThreadingHTTPServer((address, port), MetricsHandler)
+        thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+        if port:
+            _http_servers[(address, port)] = server
+    #
+    return server
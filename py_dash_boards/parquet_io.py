@@ -0,0 +1,269 @@
+"""
+@file parquet_io.py
+
+@brief Arrow/Parquet exchange format for recorded MQTT channels and vibration captures.
+
+Files are written sorted on the time-column, in row-groups of ROW_GROUP_ROWS rows, w. column statistics enabled.
+A time-range read then only touches the row-groups whose (min, max) time-statistics overlap the range
+(predicate pushdown) - e.g. a 10 second window of a 1 GB capture reads a few MB.
+
+Conversion of CSV captures is streamed (multi-threaded Arrow CSV reader), i.e. never holds the whole capture in memory.
+
+NOTE: requires 'pyarrow' (optional dependency - imported on first use). Examples reading captures go through
+'capture_path()' + 'read_pandas()', i.e. keep working on the CSV w.o. pyarrow or a converted file.
+
+Usage:
+    >>> csv_to_parquet("test_data/vibration_test_data_1.csv", "vib1.parquet", time_column="Time")
+    >>> df = read_range("vib1.parquet", 10.0, 20.0, time_column="Time").to_pandas()
+    >>> export_channel(TimeSeriesStore(STORE_DIR).channel("1/testPoints/sinus"), "sinus.parquet")
+    or from the command line:
+    $ python -m py_dash_boards.parquet_io convert test_data/vibration_test_data_1.csv vib1.parquet --time-column Time
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+
+import numpy as np
+
+
+ROW_GROUP_ROWS = 256 * 1024         # I.e. 4 MB per row-group for a (time, value) float64 pair.
+TIME_COLUMN = "time"                # Column names for recorded channels.
+VALUE_COLUMN = "value"
+EXPORT_CHUNK_S = 3600               # Store -> Parquet export, one hour at a time.
+
+
+def _pyarrow():
+    """ Import pyarrow on first use - it is an optional dependency. """
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("Parquet support requires 'pyarrow' - install w. 'pip install pyarrow'!") from exc
+    return pyarrow
+
+
+# ******************************* Writing *******************************
+
+def channel_schema(channel: str=""):
+    """ Schema of a recorded channel: UTC timestamp[ns] + float64 value (channel name kept as metadata). """
+    pa = _pyarrow()
+    return pa.schema([(TIME_COLUMN, pa.timestamp("ns", tz="UTC")), (VALUE_COLUMN, pa.float64())],
+                     metadata={b"pdb.channel": channel.encode()})
+
+
+def _channel_table(schema, ts: object, values: object):
+    pa = _pyarrow()
+    return pa.Table.from_arrays([pa.array(np.asarray(ts, dtype=np.int64), type=schema.field(TIME_COLUMN).type),
+                                 pa.array(np.asarray(values, dtype=np.float64))], schema=schema)
+
+
+def write_parquet(path: str, ts: object, values: object, channel: str="", row_group_rows: int=ROW_GROUP_ROWS) -> None:
+    """ Write one channel's (timestamps[int64 epoch-ns], values) - sorted on time - to a Parquet file. """
+    pa = _pyarrow()
+    table = _channel_table(channel_schema(channel), ts, values)
+    pa.parquet.write_table(table, path, row_group_size=row_group_rows, write_statistics=True)
+
+
+def export_channel(channel_store, path: str, t0: int=None, t1: int=None, channel: str="", row_group_rows: int=ROW_GROUP_ROWS) -> int:
+    """
+    Export range [t0, t1) (epoch-ns, default: everything) of a 'py_dash_boards.store' channel to Parquet, in bounded memory.
+
+    Returns:
+        int: number of rows written.
+    """
+    pa = _pyarrow()
+    schema = channel_schema(channel)
+    t0 = channel_store.first_ts() if t0 is None else t0
+    t1 = time.time_ns() if t1 is None else t1
+    if t0 is None:
+        t0 = t1         # Empty channel - write an empty file.
+    rows = 0
+    pending_ts, pending_values, n_pending = [], [], 0
+    chunk_ns = EXPORT_CHUNK_S * 10**9
+    with pa.parquet.ParquetWriter(path, schema, write_statistics=True) as writer:
+        for start in range(t0, t1, chunk_ns):
+            ts, values = channel_store.range(start, min(start + chunk_ns, t1))
+            pending_ts.append(ts)
+            pending_values.append(values)
+            n_pending += len(ts)
+            # Collect chunks into FULL row-groups (sparse channels would otherwise give tiny row-groups):
+            if n_pending >= row_group_rows:
+                all_ts, all_values = np.concatenate(pending_ts), np.concatenate(pending_values)
+                full = (n_pending // row_group_rows) * row_group_rows
+                writer.write_table(_channel_table(schema, all_ts[:full], all_values[:full]), row_group_size=row_group_rows)
+                pending_ts, pending_values, n_pending = [all_ts[full:]], [all_values[full:]], n_pending - full
+                rows += full
+        if n_pending:
+            writer.write_table(_channel_table(schema, np.concatenate(pending_ts), np.concatenate(pending_values)), row_group_size=row_group_rows)
+            rows += n_pending
+    return rows
+
+
+def import_channel(path: str, channel_store, t0: object=None, t1: object=None) -> int:
+    """
+    Import a channel exported by 'export_channel()' (optionally only range [t0, t1) epoch-ns) into a 'py_dash_boards.store' channel.
+
+    Returns:
+        int: number of rows imported.
+    """
+    pa = _pyarrow()
+    rows = 0
+    pf = pa.parquet.ParquetFile(path)
+    for rg in row_groups_for_range(path, t0, t1, TIME_COLUMN):
+        table = pf.read_row_group(rg, columns=[TIME_COLUMN, VALUE_COLUMN])
+        ts = table.column(TIME_COLUMN).cast(pa.int64()).to_numpy()
+        values = table.column(VALUE_COLUMN).to_numpy()
+        keep = np.ones(len(ts), dtype=bool)
+        if t0 is not None:
+            keep &= ts >= t0
+        if t1 is not None:
+            keep &= ts < t1
+        channel_store.extend(ts[keep], values[keep])
+        rows += int(keep.sum())
+    return rows
+
+
+def csv_to_parquet(csv_path: str, parquet_path: str, time_column: str=None, row_group_rows: int=ROW_GROUP_ROWS,
+                   compression: str="zstd") -> int:
+    """
+    Streamed CSV -> Parquet conversion of a capture, e.g. 'test_data/vibration_test_data_1.csv' (columns: Time, Amplitude).
+    If 'time_column' is given, the CSV must already be sorted on it (captures are) - it is what row-group statistics are used for.
+
+    Returns:
+        int: number of rows written.
+    """
+    pa = _pyarrow()
+    convert_options = pa.csv.ConvertOptions(column_types={time_column: pa.float64()} if time_column else None)
+    reader = pa.csv.open_csv(csv_path, read_options=pa.csv.ReadOptions(block_size=16 << 20), convert_options=convert_options)
+    rows = 0
+    last_time = None
+    with pa.parquet.ParquetWriter(parquet_path, reader.schema, compression=compression, write_statistics=True) as writer:
+        for batch in reader:
+            if time_column:
+                times = batch.column(time_column).to_numpy(zero_copy_only=False)
+                if len(times) and ((last_time is not None and times[0] < last_time) or np.any(np.diff(times) < 0)):
+                    raise ValueError(f"CSV '{csv_path}' is not sorted on column '{time_column}'!")
+                last_time = times[-1] if len(times) else last_time
+            writer.write_batch(batch, row_group_size=row_group_rows)
+            rows += batch.num_rows
+    return rows
+
+
+# ******************************* Reading *******************************
+
+def row_groups_for_range(path: str, t0: object=None, t1: object=None, time_column: str=TIME_COLUMN) -> list:
+    """
+    Predicate pushdown: indices of the row-groups whose time-statistics overlap [t0, t1).
+    't0'/'t1' are in the physical type of the column, i.e. epoch-ns for recorded channels, seconds for captures.
+    Row-groups without statistics are always included.
+    """
+    pa = _pyarrow()
+    meta = pa.parquet.ParquetFile(path).metadata
+    col_idx = meta.schema.names.index(time_column)
+    selected = []
+    for rg in range(meta.num_row_groups):
+        stats = meta.row_group(rg).column(col_idx).statistics
+        if stats is None or not stats.has_min_max:
+            selected.append(rg)
+            continue
+        if t0 is not None and stats.max_raw < t0:
+            continue
+        if t1 is not None and stats.min_raw >= t1:
+            continue
+        selected.append(rg)
+    return selected
+
+
+def read_range(path: str, t0: object=None, t1: object=None, time_column: str=TIME_COLUMN, columns: list=None):
+    """
+    Read rows w. t0 <= time < t1 - touching only the overlapping row-groups.
+
+    Returns:
+        pyarrow.Table: use '.to_pandas()' for a DataFrame.
+    """
+    pa = _pyarrow()
+    import pyarrow.compute as pc
+    #
+    pf = pa.parquet.ParquetFile(path)
+    if columns is not None and time_column not in columns:
+        columns = [time_column] + list(columns)
+    row_groups = row_groups_for_range(path, t0, t1, time_column)
+    table = pf.read_row_groups(row_groups, columns=columns) if row_groups else pf.schema_arrow.empty_table()
+    if columns is not None:
+        table = table.select(columns)
+    # Exact filtering within the (boundary) row-groups:
+    times = table.column(time_column)
+    if pa.types.is_timestamp(times.type):
+        times = times.cast(pa.int64())
+    mask = None
+    if t0 is not None:
+        mask = pc.greater_equal(times, t0)
+    if t1 is not None:
+        upper = pc.less(times, t1)
+        mask = upper if mask is None else pc.and_(mask, upper)
+    return table if mask is None else table.filter(mask)
+
+
+def capture_path(csv_path: str) -> str:
+    """ Parquet version of a CSV capture (same name, '.parquet'), if converted and pyarrow is installed - else the CSV. """
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and importlib.util.find_spec("pyarrow") is not None:
+        return parquet_path
+    return csv_path
+
+
+def read_pandas(path: str, t0: object=None, t1: object=None, time_column: str=TIME_COLUMN, columns: list=None, dtype: dict=None):
+    """
+    As 'read_range()', but as pandas DataFrame - also accepts CSV files (read in full!) for backwards compatibility.
+    'dtype' is passed on to 'pandas.read_csv()' (CSV only).
+    """
+    if path.endswith(".csv"):
+        import pandas as pd
+        df = pd.read_csv(path, usecols=columns, dtype=dtype)
+        if t0 is not None:
+            df = df[df[time_column] >= t0]
+        if t1 is not None:
+            df = df[df[time_column] < t1]
+        return df
+    return read_range(path, t0, t1, time_column, columns).to_pandas()
+
+
+# ******************************* CLI *******************************
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parquet conversion of captures and recorded channels.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_conv = sub.add_parser("convert", help="CSV capture -> Parquet")
+    p_conv.add_argument("csv")
+    p_conv.add_argument("parquet")
+    p_conv.add_argument("--time-column", default=None)
+    p_conv.add_argument("--row-group-rows", type=int, default=ROW_GROUP_ROWS)
+    p_exp = sub.add_parser("export", help="Recorded channel (store) -> Parquet")
+    p_exp.add_argument("store_root")
+    p_exp.add_argument("channel")
+    p_exp.add_argument("parquet")
+    p_imp = sub.add_parser("import", help="Parquet -> recorded channel (store)")
+    p_imp.add_argument("parquet")
+    p_imp.add_argument("store_root")
+    p_imp.add_argument("channel")
+    args = parser.parse_args()
+    #
+    t_start = time.perf_counter()
+    if "convert" == args.cmd:
+        rows = csv_to_parquet(args.csv, args.parquet, args.time_column, args.row_group_rows)
+    else:
+        from py_dash_boards.store import TimeSeriesStore
+        store = TimeSeriesStore(args.store_root)
+        if "export" == args.cmd:
+            rows = export_channel(store.channel(args.channel), args.parquet, channel=args.channel)
+        else:
+            rows = import_channel(args.parquet, store.channel(args.channel))
+        store.close()
+    print(f"{args.cmd}: {rows} rows in {time.perf_counter() - t_start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
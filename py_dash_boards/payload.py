@@ -0,0 +1,162 @@
+"""
+@file payload.py
+
+@brief Batched MQTT payloads - many samples per message, decoded w.o. per-sample Python work.
+
+Supported formats (auto-detected by 'decode_block()'):
+    binary      32-byte header + little-endian float32/float64 samples, see 'HEADER' below.
+                Samples are a zero-copy 'numpy.frombuffer' view of the payload.
+    MessagePack map {"channel", "t0", "dt", "dtype", "values"} - 'values' either packed bytes (zero-copy) or a list.
+    CBOR        same map as MessagePack.
+    text        one float ("0.5") or comma-separated floats ("0.5,0.6,...") - i.e. the existing examples' format.
+
+MessagePack/CBOR are optional dependencies ('pip install msgpack' / 'pip install cbor2'), only imported when used.
+
+Usage:
+    >>> payload = pack_block(samples, channel=3, t0_ns=time.time_ns(), dt_ns=1e5)     # Sender: 1000 samples/message.
+    >>> block = decode_block(msg.payload)
+    >>> ring.extend(block.values)                                                       # ONE slice-copy into the ring.
+    >>> router.add_route("sensors/+/vibration", dtype=np.float32, parser=decode_values)  # Or per channel.
+"""
+
+import struct
+
+import numpy as np
+
+
+# Header: magic, version, sample-size (4|8), channel, count, reserved, t0 [epoch-ns], dt [ns] - 32 bytes, so float64 data are aligned.
+HEADER = struct.Struct("<4sBBHIIqd")
+MAGIC = b"PDBB"
+VERSION = 1
+DTYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+
+
+class Block:
+    """
+    One decoded payload: 'count' samples, starting at 't0_ns' (epoch-ns, 0 = unknown) w. 'dt_ns' spacing (0 = unknown).
+    """
+    __slots__ = ("channel", "t0_ns", "dt_ns", "values")
+
+    def __init__(self, values: np.ndarray, channel: object=0, t0_ns: int=0, dt_ns: float=0.0):
+        self.values = values
+        self.channel = channel
+        self.t0_ns = t0_ns
+        self.dt_ns = dt_ns
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def timestamps(self) -> np.ndarray:
+        """ Per-sample epoch-ns (int64), from 't0_ns' and 'dt_ns'. """
+        return self.t0_ns + np.round(np.arange(len(self.values)) * self.dt_ns).astype(np.int64)
+
+
+# ********************************** Optional Dependencies **************************************
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise ImportError("MessagePack payloads need 'msgpack' - install w. 'pip install msgpack'") from exc
+    return msgpack
+
+
+def _cbor2():
+    try:
+        import cbor2
+    except ImportError as exc:
+        raise ImportError("CBOR payloads need 'cbor2' - install w. 'pip install cbor2'") from exc
+    return cbor2
+
+
+# ********************************** Binary **************************************
+
+def pack_block(values: object, channel: int=0, t0_ns: int=0, dt_ns: float=0.0, dtype: object=np.float32) -> bytes:
+    """ Encode samples as binary payload (header + little-endian floats). """
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if dtype.itemsize not in DTYPES or "f" != dtype.kind:
+        raise ValueError(f"Unsupported sample type '{dtype}' - use float32 or float64.")
+    values = np.ascontiguousarray(values, dtype=dtype)
+    return HEADER.pack(MAGIC, VERSION, dtype.itemsize, channel, len(values), 0, t0_ns, dt_ns) + values.tobytes()
+
+
+def unpack_block(payload: bytes) -> Block:
+    """ Decode a binary payload - samples are a read-only VIEW of the payload (no copy). """
+    if len(payload) < HEADER.size:
+        raise ValueError(f"Binary payload too short ({len(payload)} bytes).")
+    magic, version, itemsize, channel, count, _, t0_ns, dt_ns = HEADER.unpack_from(payload)
+    if MAGIC != magic or VERSION != version or itemsize not in DTYPES:
+        raise ValueError("Not a (supported) binary block payload.")
+    if len(payload) < HEADER.size + count * itemsize:
+        raise ValueError(f"Binary payload truncated: {count} samples announced, {len(payload)} bytes received.")
+    values = np.frombuffer(payload, dtype=DTYPES[itemsize], count=count, offset=HEADER.size)
+    return Block(values, channel, t0_ns, dt_ns)
+
+
+# ********************************** MessagePack / CBOR **************************************
+
+def _record(values: object, channel: object, t0_ns: int, dt_ns: float, dtype: object) -> dict:
+    dtype = np.dtype(dtype).newbyteorder("<")
+    values = np.ascontiguousarray(values, dtype=dtype)
+    return {"channel": channel, "t0": int(t0_ns), "dt": float(dt_ns), "dtype": dtype.str, "values": values.tobytes()}
+
+
+def _from_record(record: dict) -> Block:
+    try:
+        raw = record["values"]
+    except (KeyError, TypeError) as exc:
+        raise ValueError("Record payload w.o. 'values'.") from exc
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        values = np.frombuffer(raw, dtype=np.dtype(record.get("dtype", "<f4")))
+    else:
+        values = np.asarray(raw, dtype=np.float64)
+    return Block(values, record.get("channel", 0), int(record.get("t0", 0)), float(record.get("dt", 0.0)))
+
+
+def pack_msgpack(values: object, channel: object=0, t0_ns: int=0, dt_ns: float=0.0, dtype: object=np.float32) -> bytes:
+    return _msgpack().packb(_record(values, channel, t0_ns, dt_ns, dtype))
+
+
+def pack_cbor(values: object, channel: object=0, t0_ns: int=0, dt_ns: float=0.0, dtype: object=np.float32) -> bytes:
+    return _cbor2().dumps(_record(values, channel, t0_ns, dt_ns, dtype))
+
+
+def unpack_msgpack(payload: bytes) -> Block:
+    return _from_record(_msgpack().unpackb(payload))
+
+
+def unpack_cbor(payload: bytes) -> Block:
+    return _from_record(_cbor2().loads(payload))
+
+
+# ********************************** Auto-detect **************************************
+
+def unpack_text(payload: bytes|str) -> Block:
+    """ One float, or comma-separated floats - parsed by NumPy in ONE call. """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return Block(np.array(payload.split(b","), dtype=np.float64))
+
+
+def decode_block(payload: bytes|str) -> Block:
+    """
+    Decode any supported payload format (see module doc). Raises ValueError if not decodable - also for a
+    MessagePack/CBOR payload (or a stray binary one, looking like it) if the codec is not installed.
+    """
+    if isinstance(payload, (bytes, bytearray, memoryview)) and len(payload):
+        lead = payload[0]
+        if payload[:4] == MAGIC:
+            return unpack_block(payload)
+        try:
+            if 0x80 <= lead <= 0x8F or lead in (0xDE, 0xDF):         # MessagePack map.
+                return unpack_msgpack(payload)
+            if 0xA0 <= lead <= 0xBB or 0xBF == lead:                  # CBOR map.
+                return unpack_cbor(payload)
+        except ImportError as exc:
+            raise ValueError(f"Undecodable payload ({exc}).") from exc     # NOTE: ImportError would kill paho's network-loop.
+    return unpack_text(payload)
+
+
+def decode_values(payload: bytes|str) -> np.ndarray:
+    """ Samples only - e.g. as 'parser' of a 'py_dash_boards.topics' route. """
+    return decode_block(payload).values
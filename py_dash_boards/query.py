@@ -0,0 +1,174 @@
+"""
+@file query.py
+
+@brief Shared DuckDB query layer for the exploration dashboards (Panel, PyGWalker, ...).
+
+Sources - CSV files, Parquet files/globs, and recorded streams - are registered as DuckDB VIEWS, i.e. nothing is loaded
+on registration. Filters, aggregates and rolling windows are pushed down to SQL, so pandas only ever sees the
+(small) result set - multi-GB captures can be explored without loading them into RAM.
+
+NOTE: requires 'duckdb' (optional dependency - imported on first use).
+
+Usage:
+    >>> ql = QueryLayer()
+    >>> ql.register_parquet("vib", "vib1.parquet")                      # See 'py_dash_boards.parquet_io'.
+    >>> ql.register_csv("occupancy", OCCUPANCY_URL, cache=True)         # Remote CSV - downloaded ONCE.
+    >>> df = ql.time_window("vib", "Time", 10.0, 20.0)
+    >>> df = ql.downsample("vib", "Time", "Amplitude", bucket=0.01)
+    >>> df = ql.rolling("occupancy", "date", "Temperature", window=30)
+"""
+
+import hashlib
+import os
+import urllib.request
+
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".py_dash_boards", "cache")
+
+
+def _duckdb():
+    """ Import duckdb on first use - it is an optional dependency. """
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise ImportError("Query layer requires 'duckdb' - install w. 'pip install duckdb'!") from exc
+    return duckdb
+
+
+def _ident(name: str) -> str:
+    """ Quote SQL identifier (view- or column-name). """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(text: str) -> str:
+    """ Quote SQL string literal - NOTE: view definitions can NOT use bound parameters. """
+    return "'" + text.replace("'", "''") + "'"
+
+
+def cached_download(url: str, cache_dir: str=CACHE_DIR) -> str:
+    """ Download 'url' once into 'cache_dir' - returns the local path. """
+    os.makedirs(cache_dir, exist_ok=True)
+    digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+    path = os.path.join(cache_dir, f"{digest}_{os.path.basename(url.split('?')[0]) or 'data'}")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        urllib.request.urlretrieve(url, tmp_path)
+        os.replace(tmp_path, path)
+    return path
+
+
+class QueryLayer:
+    """
+    One DuckDB connection w. named views over the registered sources.
+    """
+    def __init__(self, database: str=":memory:", threads: int=None, memory_limit: str=None):
+        self.con = _duckdb().connect(database)
+        if threads is not None:
+            self.con.execute(f"SET threads = {int(threads)}")
+        if memory_limit is not None:
+            self.con.execute(f"SET memory_limit = {_literal(memory_limit)}")
+        self.sources = {}
+
+    # ******************************* Sources *******************************
+
+    def _create_view(self, name: str, select: str, source: str) -> None:
+        self.con.execute(f"CREATE OR REPLACE VIEW {_ident(name)} AS {select}")
+        self.sources[name] = source
+
+    def register_csv(self, name: str, path: str, cache: bool=True, **options) -> None:
+        """
+        Register CSV file (or URL) as view 'name'. Remote files are downloaded once if 'cache' is set.
+        Extra 'options' are passed on to DuckDB's 'read_csv_auto()', e.g. 'header=True'.
+        """
+        if path.startswith(("http://", "https://")) and cache:
+            path = cached_download(path)
+        args = "".join(f", {key}={_literal(value) if isinstance(value, str) else value}" for key, value in options.items())
+        self._create_view(name, f"SELECT * FROM read_csv_auto({_literal(os.path.expanduser(path))}{args})", path)
+
+    def register_parquet(self, name: str, path: str) -> None:
+        """ Register Parquet file (or glob, e.g. 'captures/*.parquet') as view 'name' - row-group statistics are used for filters. """
+        self._create_view(name, f"SELECT * FROM read_parquet({_literal(os.path.expanduser(path))})", path)
+
+    def register_capture(self, name: str, csv_path: str) -> None:
+        """ Register a CSV capture - or its Parquet version (same name, '.parquet'), if it was converted. """
+        parquet_path = os.path.splitext(os.path.expanduser(csv_path))[0] + ".parquet"
+        if os.path.exists(parquet_path):
+            self.register_parquet(name, parquet_path)
+        else:
+            self.register_csv(name, csv_path)
+
+    def register_channel(self, name: str, channel_store, t0: int, t1: int) -> None:
+        """
+        Register range [t0, t1) (epoch-ns) of a recorded stream ('py_dash_boards.store' channel) as view 'name',
+        w. columns 'time' (timestamp) and 'value'. NOTE: the range is held in memory - for full history, export
+        the channel to Parquet ('py_dash_boards.parquet_io.export_channel()') and use 'register_parquet()'.
+        """
+        import pandas as pd
+        #
+        ts, values = channel_store.range(t0, t1)
+        frame = pd.DataFrame({"time": pd.to_datetime(ts, unit="ns", utc=True), "value": values})
+        table_name = f"__{name}_frame"
+        self.con.register(table_name, frame)
+        self._create_view(name, f"SELECT * FROM {_ident(table_name)}", f"channel[{t0}, {t1})")
+
+    # ******************************* Queries *******************************
+
+    def query(self, sql: str, params: list=None):
+        """ Run SQL - returns result as pandas DataFrame. """
+        return self.con.execute(sql, params or []).fetchdf()
+
+    def columns(self, name: str) -> list:
+        return [row[0] for row in self.con.execute(f"DESCRIBE {_ident(name)}").fetchall()]
+
+    def count(self, name: str) -> int:
+        return int(self.con.execute(f"SELECT count(*) FROM {_ident(name)}").fetchone()[0])
+
+    def time_window(self, name: str, time_column: str, t0: object=None, t1: object=None, columns: list=None, limit: int=None):
+        """ Rows w. t0 <= time < t1 (pushed down to the scan), ordered by time. """
+        select = ", ".join(_ident(c) for c in columns) if columns else "*"
+        where, params = self._time_filter(time_column, t0, t1)
+        sql = f"SELECT {select} FROM {_ident(name)}{where} ORDER BY {_ident(time_column)}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql, params)
+
+    def downsample(self, name: str, time_column: str, value_column: str, bucket: float, t0: object=None, t1: object=None):
+        """
+        Aggregate into time-buckets of width 'bucket' (same unit as the time-column, numeric time only), w. min/max/mean/count
+        per bucket - e.g. 1 sample per pixel for an overview of a multi-GB capture.
+        """
+        t, v = _ident(time_column), _ident(value_column)
+        where, params = self._time_filter(time_column, t0, t1)
+        sql = (f"SELECT floor({t} / ?) * ? AS {t}, min({v}) AS min, max({v}) AS max, avg({v}) AS mean, count(*) AS count "
+               f"FROM {_ident(name)}{where} GROUP BY 1 ORDER BY 1")
+        return self.query(sql, [bucket, bucket] + params)
+
+    def rolling(self, name: str, order_column: str, value_column: str, window: int, t0: object=None, t1: object=None):
+        """
+        Rolling statistics over 'window' rows (SQL window functions) - the SQL equivalent of the pandas pipeline:
+            mean = value.rolling(window).mean();  residual = value - mean;  std = residual.rolling(window).std()
+        Rows w. incomplete windows get NULL, as in pandas.
+        """
+        o, v = _ident(order_column), _ident(value_column)
+        where, params = self._time_filter(order_column, t0, t1)
+        frame = f"OVER (ORDER BY {o} ROWS BETWEEN {int(window) - 1} PRECEDING AND CURRENT ROW)"
+        sql = (f"SELECT {o}, {v}, CASE WHEN count({v}) {frame} >= {int(window)} THEN avg({v}) {frame} END AS mean "
+               f"FROM {_ident(name)}{where}")
+        sql = f"SELECT *, {v} - mean AS residual FROM ({sql})"
+        sql = (f"SELECT *, CASE WHEN count(residual) {frame} >= {int(window)} THEN stddev_samp(residual) {frame} END AS std "
+               f"FROM ({sql}) ORDER BY {o}")
+        return self.query(sql, params)
+
+    @staticmethod
+    def _time_filter(time_column: str, t0: object, t1: object) -> tuple:
+        clauses, params = [], []
+        if t0 is not None:
+            clauses.append(f"{_ident(time_column)} >= ?")
+            params.append(t0)
+        if t1 is not None:
+            clauses.append(f"{_ident(time_column)} < ?")
+            params.append(t1)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def close(self) -> None:
+        self.con.close()
@@ -0,0 +1,44 @@
+"""
+@file raster.py
+
+@brief Optional server-side rasterization (Datashader) of HoloViews line-charts - for windows of 10^6+ samples.
+The curve is aggregated into a fixed-size image on the server, i.e. the browser payload is bounded by the pixels,
+NOT by the number of samples:
+    - zoom/pan re-aggregates the visible x/y-range at full resolution (HoloViews links a 'RangeXY' stream),
+    - each 'Buffer.send()' re-aggregates the bounded window - feed it from the 'RenderGovernor'-gated callback, the
+      governor then throttles the updates to the aggregation cost (see 'max_load').
+Datashader is an optional dependency ('pip install datashader'), only imported when rasterizing.
+
+Usage:
+    >>> dmap = hv.DynamicMap(lambda data: hv.Curve(data, kdims=["time"], vdims=["value"]), streams=[buffer])
+    >>> view = line_view(dmap, rasterize=setting("frontend.rasterize", False))
+"""
+
+
+RASTER_CMAP = "Blues"
+RASTER_LINE_WIDTH = 1           # [pixels] - anti-aliased lines, Datashader >= 0.14.
+
+
+def _datashader():
+    try:
+        import datashader      # NOTE: fail early here - HoloViews only imports it on first aggregation.
+        from holoviews.operation import datashader as hd
+    except ImportError as exc:
+        raise ImportError("Rasterized charts need 'datashader' - install w. 'pip install datashader'") from exc
+    return hd
+
+
+def line_view(element: object, rasterize: bool=False, width: int|None=None, height: int|None=None, cmap: str=RASTER_CMAP) -> object:
+    """
+    The line-chart as shown - 'element' (e.g. a 'DynamicMap' of Curves) itself, or its Datashader rasterization.
+
+    Args:
+        width, height: aggregation size [pixels], default: the plot's size (i.e. one bin per screen pixel).
+    """
+    if not rasterize:
+        return element
+    hd = _datashader()
+    size = {key: value for key, value in (("width", width), ("height", height)) if value is not None}
+    # Count of line-crossings per pixel, 'eq_hist' keeps sparse AND dense regions visible:
+    raster = hd.rasterize(element, aggregator="count", line_width=RASTER_LINE_WIDTH, dynamic=True, **size)
+    return raster.opts(cmap=cmap, cnorm="eq_hist", colorbar=False, responsive=True, min_height=400)
@@ -0,0 +1,108 @@
+"""
+@file reorder.py
+
+@brief Reordering stage for late and duplicate samples (QoS 1 redeliveries, reconnects, multi-broker setups).
+
+Samples are held back for a bounded lateness window, i.e. until the watermark (newest timestamp seen - 'lateness_ns')
+passes them, and then released in timestamp order. Charts thus only ever get APPEND-ONLY, sorted deltas - no zig-zags,
+no patching of already drawn data.
+    - in-order sample:  list-append, O(1) amortized (the common case)
+    - late sample:      binary-search insert into the pending samples, O(log n) + shift of the (few) newer ones
+    - duplicate:        same (topic, timestamp) as a pending or recently released sample - dropped
+    - too late:         older than what has already been released - dropped, and counted
+If the stream goes quiet, pending samples are released after 'idle_flush_ns' (default: 'lateness_ns') of receive-side,
+monotonic idle time - i.e. independent of the sender's clock.
+
+Usage:
+    >>> reorder = ReorderBuffer(lateness_ns=5 * NS_PER_S)
+    >>> reorder.push(msg.topic, ts_ns, (x, y, z))           # MQTT-thread.
+    >>> ts, points = reorder.drain()                        # GUI-thread - sorted, de-duplicated.
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+
+import numpy as np
+
+from py_dash_boards.metrics import REGISTRY, Registry
+
+
+class ReorderBuffer:
+    """
+    Bounded-lateness reorder + de-duplication buffer. Thread-safe (one or more producers, one consumer).
+    """
+    def __init__(self, lateness_ns: int, idle_flush_ns: int=None, name: str="default", registry: Registry=REGISTRY):
+        self.lateness_ns = lateness_ns
+        self.idle_flush_ns = lateness_ns if idle_flush_ns is None else idle_flush_ns
+        self._ts = []
+        self._values = []
+        self._keys = set()              # (topic, ts) of pending samples.
+        self._released = deque()        # (topic, ts) of released samples, kept for 'lateness_ns' - catches late duplicates.
+        self._released_keys = set()
+        self._released_ts = None        # Newest released timestamp - anything older is too late.
+        self._max_ts = None
+        self._last_push = time.monotonic_ns()
+        self._lock = threading.Lock()
+        labels = {"buffer": name}
+        self.reordered_counter = registry.counter("pdb_reorder_reordered_total", "Samples arrived out of order (re-sorted).", labels)
+        self.duplicate_counter = registry.counter("pdb_reorder_duplicates_total", "Duplicate samples dropped.", labels)
+        self.late_counter = registry.counter("pdb_reorder_late_total", "Samples dropped as later than the lateness window.", labels)
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    def push(self, topic: str, ts_ns: int, value: object) -> bool:
+        """ Add a sample - returns False if it was dropped (duplicate or too late). """
+        key = (topic, ts_ns)
+        with self._lock:
+            self._last_push = time.monotonic_ns()
+            if key in self._keys or key in self._released_keys:
+                self.duplicate_counter.inc()
+                return False
+            if self._released_ts is not None and ts_ns < self._released_ts:
+                self.late_counter.inc()
+                return False
+            self._keys.add(key)
+            if not self._ts or ts_ns >= self._ts[-1]:
+                self._ts.append(ts_ns)                  # In-order - the common, O(1) case.
+                self._values.append((topic, value))
+            else:
+                idx = bisect_right(self._ts, ts_ns)
+                self._ts.insert(idx, ts_ns)
+                self._values.insert(idx, (topic, value))
+                self.reordered_counter.inc()
+            if self._max_ts is None or ts_ns > self._max_ts:
+                self._max_ts = ts_ns
+            return True
+
+    def drain(self, flush: bool=False) -> tuple:
+        """
+        Release samples behind the watermark (all of them if 'flush' is set, or the stream has been idle 'idle_flush_ns').
+
+        Returns:
+            tuple: (ts[int64 array], values[list]) - sorted by timestamp, possibly empty.
+        """
+        with self._lock:
+            if not self._ts:
+                return np.zeros(0, dtype=np.int64), []
+            if flush or time.monotonic_ns() - self._last_push > self.idle_flush_ns:
+                n = len(self._ts)
+            else:
+                n = bisect_right(self._ts, self._max_ts - self.lateness_ns)
+            if 0 == n:
+                return np.zeros(0, dtype=np.int64), []
+            ts, self._ts = self._ts[:n], self._ts[n:]
+            released, self._values = self._values[:n], self._values[n:]
+            self._released_ts = ts[-1]
+            for t, (topic, _) in zip(ts, released):
+                key = (topic, t)
+                self._keys.discard(key)
+                self._released.append(key)
+                self._released_keys.add(key)
+            # Forget released keys outside the lateness window - older samples are rejected as 'too late' anyway:
+            horizon = self._released_ts - self.lateness_ns
+            while self._released and self._released[0][1] < horizon:
+                self._released_keys.discard(self._released.popleft())
+        return np.asarray(ts, dtype=np.int64), [value for _, value in released]
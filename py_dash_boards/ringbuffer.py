@@ -0,0 +1,144 @@
+"""
+@file ringbuffer.py
+
+@brief Fixed-capacity, typed (NumPy) ring buffer for plot data.
+Memory is allocated once, i.e. appending never re-allocates, and old samples are overwritten.
+"""
+
+import threading
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Single-column ring buffer.
+
+    NOTE: one writer (ingestion thread) and any number of readers is the intended use.
+    Readers always get COPIES, so they never see a half-written batch.
+    """
+    def __init__(self, capacity: int, dtype: object=np.float64):
+        if capacity < 1:
+            raise ValueError("'capacity' must be >= 1")
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(capacity, dtype=self.dtype)
+        self._total = 0             # Samples written since creation - also serves as 'version' for change-detection.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._total, self.capacity)
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def append(self, value: object) -> None:
+        with self._lock:
+            self._data[self._total % self.capacity] = value
+            self._total += 1
+
+    def extend(self, values: object) -> None:
+        """
+        Append a batch, e.g. a NumPy array decoded from one MQTT payload. At most two slice-copies, no per-sample work.
+        """
+        values = np.asarray(values, dtype=self.dtype)
+        n = len(values)
+        if 0 == n:
+            return
+        with self._lock:
+            if n >= self.capacity:
+                # Only the newest 'capacity' samples survive anyway:
+                values = values[-self.capacity:]
+                start = (self._total + n - self.capacity) % self.capacity
+                self._data[start:] = values[:self.capacity - start]
+                self._data[:start] = values[self.capacity - start:]
+            else:
+                start = self._total % self.capacity
+                first = min(n, self.capacity - start)
+                self._data[start:start + first] = values[:first]
+                self._data[:n - first] = values[first:]
+            self._total += n
+
+    def last(self, n: int=None) -> np.ndarray:
+        """
+        Get (a copy of) the newest 'n' samples in chronological order. Defaults to all stored samples.
+        """
+        with self._lock:
+            return self._last(n)
+
+    def _last(self, n: int|None) -> np.ndarray:
+        """ 'last()' - caller holds the lock. """
+        size = min(self._total, self.capacity)
+        n = size if n is None else min(n, size)
+        end = self._total % self.capacity
+        start = end - n
+        if start >= 0:
+            return self._data[start:end].copy()
+        return np.concatenate((self._data[start:], self._data[:end]))
+
+    def since(self, total: int) -> tuple:
+        """
+        Get samples written after 'total' (as returned by a previous call), for incremental consumers.
+
+        Returns:
+            tuple: (samples, new_total). If the consumer fell behind more than 'capacity', the oldest samples are lost.
+        """
+        with self._lock:
+            current = self._total         # NOTE: read under the SAME lock as the samples, i.e. matching window.
+            return self._last(current - total), current
+
+
+class TimedRingBuffer:
+    """
+    Ring buffer w. a parallel int64 timestamp column (epoch-ns, see 'py_dash_boards.timestamps').
+    Both columns are written and read under ONE lock, i.e. readers always get matching (ts, values) pairs.
+    """
+    def __init__(self, capacity: int, dtype: object=np.float64):
+        self._ts = RingBuffer(capacity, np.int64)
+        self._values = RingBuffer(capacity, dtype)
+        self.capacity = capacity
+        self.dtype = self._values.dtype
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def total(self) -> int:
+        return self._values.total
+
+    def latest_ts(self) -> int|None:
+        """ Timestamp of the newest sample, or None if empty. """
+        with self._lock:
+            return int(self._ts.last(1)[0]) if self._ts.total else None
+
+    def append(self, ts_ns: int, value: object) -> None:
+        with self._lock:
+            self._ts.append(ts_ns)
+            self._values.append(value)
+
+    def extend(self, ts_ns: object, values: object) -> None:
+        """ Append a batch, e.g. a decoded block w. 'Block.timestamps()'. """
+        with self._lock:
+            self._ts.extend(ts_ns)
+            self._values.extend(values)
+
+    def last(self, n: int=None) -> tuple:
+        """ (ts, values) copies of the newest 'n' samples (default: all), oldest first. """
+        with self._lock:
+            return self._ts.last(n), self._values.last(n)
+
+    def since(self, total: int) -> tuple:
+        """ (ts, values, new_total) written after 'total' - see 'RingBuffer.since()'. """
+        with self._lock:
+            current = self._values.total
+            return self._ts.last(current - total), self._values.last(current - total), current
+
+    def window(self, duration_ns: int) -> tuple:
+        """ (ts, values) of the samples within 'duration_ns' before the newest one - time-based retention for charts. """
+        ts, values = self.last()
+        if 0 == len(ts):
+            return ts, values
+        start = int(np.searchsorted(ts, ts[-1] - duration_ns, side="left"))
+        return ts[start:], values[start:]
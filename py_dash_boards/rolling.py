@@ -0,0 +1,192 @@
+"""
+@file rolling.py
+
+@brief Rolling statistics & outlier detection - incremental (O(1) per sample) for streams, cached for static frames.
+
+The outlier pipeline (as in Panel's 'occupancy' example):
+    mean     = value.rolling(window).mean()
+    residual = value - mean
+    std      = residual.rolling(window).std()
+    outlier  = |residual| > std * sigma
+
+Only the threshold depends on 'sigma', i.e. changing sigma only re-thresholds cached (residual, std) - w.o. recomputing them.
+
+Usage (stream):
+    >>> detector = RollingOutliers(window=30, sigma=3.0)
+    >>> detector.push(value)                                # Per sample, O(1).
+    >>> detector.outlier_count                              # Outliers among the last 'history' samples.
+Usage (frame):
+    >>> cache = RollingStatsCache(df)
+    >>> mask = cache.outliers("Temperature", window=30, sigma=10)
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class RollingWindow:
+    """
+    Rolling mean and (sample-)std over the last 'window' values, O(1) per update.
+    Running sums are re-computed exactly once per 'window' updates, so float-error never accumulates (amortized O(1)).
+    """
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("'window' must be >= 1")
+        self.window = window
+        self._values = np.zeros(window, dtype=np.float64)
+        self._n = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self._n >= self.window
+
+    def push(self, value: float) -> None:
+        idx = self._n % self.window
+        if self._n >= self.window:
+            old = self._values[idx]
+            self._sum -= old
+            self._sum_sq -= old * old
+        self._values[idx] = value
+        self._sum += value
+        self._sum_sq += value * value
+        self._n += 1
+        if 0 == idx and self._n > self.window:
+            self._sum = float(self._values.sum())
+            self._sum_sq = float(np.dot(self._values, self._values))
+
+    @property
+    def mean(self) -> float:
+        """ Mean of a FULL window - NaN before that (as pandas 'rolling(window).mean()'). """
+        return self._sum / self.window if self.full else math.nan
+
+    @property
+    def std(self) -> float:
+        """ Sample-std (ddof=1) of a FULL window - NaN before that (as pandas 'rolling(window).std()'). """
+        if not self.full or self.window < 2:
+            return math.nan
+        var = (self._sum_sq - self._sum * self._sum / self.window) / (self.window - 1)
+        return math.sqrt(var) if var > 0.0 else 0.0
+
+
+class RollingOutliers:
+    """
+    Streaming outlier detector. Keeps (residual, std) of the last 'history' samples, so 'outlier_count'
+    is maintained in O(1) per sample, and a new 'sigma' re-thresholds the history (vectorized) w.o. recomputing statistics.
+    """
+    def __init__(self, window: int, sigma: float, history: int=10000):
+        self._mean_window = RollingWindow(window)
+        self._residual_window = RollingWindow(window)
+        self._sigma = sigma
+        self.history = history
+        self._residual = np.full(history, np.nan)
+        self._std = np.full(history, np.nan)
+        self._flags = np.zeros(history, dtype=bool)
+        self._total = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def sigma(self) -> float:
+        return self._sigma
+
+    @sigma.setter
+    def sigma(self, sigma: float) -> None:
+        with self._lock:
+            self._sigma = sigma
+            with np.errstate(invalid="ignore"):
+                self._flags[:] = np.abs(self._residual) > self._std * sigma
+            self._count = int(self._flags.sum())
+
+    @property
+    def outlier_count(self) -> int:
+        return self._count
+
+    def push(self, value: float) -> bool:
+        """ Add sample - returns True if it is an outlier. """
+        self._mean_window.push(value)
+        residual = value - self._mean_window.mean
+        if not math.isnan(residual):
+            self._residual_window.push(residual)
+        std = self._residual_window.std
+        is_outlier = abs(residual) > std * self._sigma        # NOTE: False while NaN.
+        with self._lock:
+            idx = self._total % self.history
+            self._count += int(is_outlier) - int(self._flags[idx])
+            self._residual[idx] = residual
+            self._std[idx] = std
+            self._flags[idx] = is_outlier
+            self._total += 1
+        return is_outlier
+
+    def extend(self, values: object) -> int:
+        """ Add a batch - returns the number of outliers in it. """
+        return sum(self.push(float(v)) for v in values)
+
+
+# ********************************** Static Frames **************************************
+
+def rolling_stats(values: object, window: int) -> tuple:
+    """
+    Vectorized (cumulative-sum based, O(n)) rolling mean, residual and residual-std - NaN-semantics as pandas.
+
+    Returns:
+        tuple: (mean, residual, std) float64 arrays, same length as 'values'.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean = _rolling_mean(values, window)
+    residual = values - mean
+    valid = ~np.isnan(residual)
+    std = np.full(len(values), np.nan)
+    r = residual[valid]
+    if len(r) >= window >= 2:
+        r_mean = _rolling_mean(r, window)
+        r_sq = _rolling_mean(r * r, window)
+        var = np.maximum((r_sq - r_mean * r_mean) * window / (window - 1), 0.0)
+        std[valid] = np.sqrt(var)
+    return mean, residual, std
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    mean = np.full(len(values), np.nan)
+    if len(values) >= window:
+        csum = np.cumsum(np.concatenate(([0.0], values)))
+        mean[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return mean
+
+
+class RollingStatsCache:
+    """
+    LRU-cache of rolling statistics per (variable, window) for a (static) DataFrame - e.g. behind dashboard widgets.
+    """
+    def __init__(self, frame, maxsize: int=32):
+        self.frame = frame
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stats(self, variable: str, window: int) -> tuple:
+        """ (mean, residual, std) as pandas Series (indexed as the frame) - computed once per (variable, window). """
+        import pandas as pd
+        #
+        key = (variable, window)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        index = self.frame.index
+        result = tuple(pd.Series(arr, index=index, name=variable) for arr in rolling_stats(self.frame[variable].to_numpy(), window))
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return result
+
+    def outliers(self, variable: str, window: int, sigma: float):
+        """ Boolean outlier-mask - only the threshold is computed per call. """
+        _, residual, std = self.stats(variable, window)
+        return residual.abs() > std * sigma
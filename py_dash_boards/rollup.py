@@ -0,0 +1,271 @@
+"""
+@file rollup.py
+
+@brief Pre-aggregated rollup tiers (e.g. 1s/1m/1h buckets w. min/max/mean/count) for long-horizon charts.
+
+Rollups are maintained incrementally while ingesting, so a chart spanning a day or a week never re-scans raw samples.
+A query picks the COARSEST tier that still gives at least one bucket per pixel (and still retains the range's start),
+i.e. the cost of drawing is O(pixels) rather than O(samples). Ranges too short for any tier are answered from raw
+data by the caller (query returns None).
+The ingesting process persists the tiers ('save_async()'), other processes (e.g. a history chart) load them w.
+'open_rollups()' - which only catches up on the samples stored since the last save - and keep them current w. 'catch_up()'.
+
+Usage:
+    >>> rollups = Rollups()                                 # Default tiers: 1s, 1m, 1h.
+    >>> rollups.add(time.time_ns(), value)                  # Per sample, or 'extend(ts, values)' per batch.
+    >>> res = rollups.query(t0, t1, pixels=800)             # dict of arrays, or None.
+    >>> rollups.save_async(rollups_path(store_channel))     # Ingest-process, e.g. after flushing the store.
+    >>> rollups = open_rollups(store_channel)               # Any process - persisted tiers + stored tail.
+    >>> catch_up(rollups, store_channel)                    # Later - samples stored since (call 'reload()' on the store first).
+"""
+
+import os
+import threading
+
+import numpy as np
+
+
+NS_PER_S = 1_000_000_000
+DEFAULT_TIERS = (
+    (1 * NS_PER_S, 7 * 24 * 3600),          # 1 second buckets, one week.
+    (60 * NS_PER_S, 90 * 24 * 60),          # 1 minute buckets, 90 days.
+    (3600 * NS_PER_S, 5 * 365 * 24),        # 1 hour buckets, 5 years.
+)
+ROLLUPS_FILE = "rollups.npz"                # In the channel's store directory.
+CATCH_UP_CHUNK_S = 3600                     # Stored samples are rolled up one hour at a time (bounded memory).
+TIER_ARRAYS = ("start", "min", "max", "sum", "count")
+
+
+class RollupTier:
+    """
+    Fixed-capacity ring of buckets at ONE resolution. Only buckets containing samples are stored.
+    """
+    def __init__(self, resolution_ns: int, capacity: int):
+        self.resolution_ns = resolution_ns
+        self.capacity = capacity
+        self.start = np.zeros(capacity, dtype=np.int64)         # Bucket start-time [epoch-ns].
+        self.min = np.zeros(capacity, dtype=np.float64)
+        self.max = np.zeros(capacity, dtype=np.float64)
+        self.sum = np.zeros(capacity, dtype=np.float64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self._total = 0             # Buckets created since start; newest bucket is at (total - 1) % capacity.
+
+    def __len__(self) -> int:
+        return min(self._total, self.capacity)
+
+    def _newest_start(self) -> int|None:
+        return int(self.start[(self._total - 1) % self.capacity]) if self._total else None
+
+    def covers(self, t0: int) -> bool:
+        """ True if no bucket at/after 't0' has been evicted yet, i.e. the tier retains the range [t0, ...). """
+        if self._total <= self.capacity:
+            return True         # Nothing evicted.
+        return int(self.start[self._total % self.capacity]) <= t0 - t0 % self.resolution_ns
+
+    def extend(self, ts: np.ndarray, values: np.ndarray) -> None:
+        """ Add samples (non-decreasing timestamps). Late samples for a bucket older than the newest are dropped. """
+        if 0 == len(ts):
+            return
+        bucket_starts = ts - ts % self.resolution_ns
+        newest = self._newest_start()
+        if newest is not None:
+            keep = bucket_starts >= newest
+            if not keep.all():
+                bucket_starts, values = bucket_starts[keep], values[keep]
+                if 0 == len(values):
+                    return
+        # Group by bucket (input is sorted, so groups are contiguous):
+        edges = np.flatnonzero(np.diff(bucket_starts)) + 1
+        group_idx = np.concatenate(([0], edges))
+        g_start = bucket_starts[group_idx]
+        g_min = np.minimum.reduceat(values, group_idx)
+        g_max = np.maximum.reduceat(values, group_idx)
+        g_sum = np.add.reduceat(values, group_idx)
+        g_count = np.diff(np.concatenate((group_idx, [len(values)])))
+        # Merge first group into the current (open) bucket if it is the same one:
+        if newest is not None and g_start[0] == newest:
+            slot = (self._total - 1) % self.capacity
+            self.min[slot] = min(self.min[slot], g_min[0])
+            self.max[slot] = max(self.max[slot], g_max[0])
+            self.sum[slot] += g_sum[0]
+            self.count[slot] += g_count[0]
+            g_start, g_min, g_max, g_sum, g_count = g_start[1:], g_min[1:], g_max[1:], g_sum[1:], g_count[1:]
+        # Append new buckets:
+        n = len(g_start)
+        if 0 == n:
+            return
+        if n > self.capacity:
+            g_start, g_min, g_max, g_sum, g_count = (a[-self.capacity:] for a in (g_start, g_min, g_max, g_sum, g_count))
+            self._total += n - self.capacity
+            n = self.capacity
+        slots = (self._total + np.arange(n)) % self.capacity
+        self.start[slots] = g_start
+        self.min[slots] = g_min
+        self.max[slots] = g_max
+        self.sum[slots] = g_sum
+        self.count[slots] = g_count
+        self._total += n
+
+    def query(self, t0: int, t1: int) -> dict:
+        """ Buckets w. t0 <= start < t1, oldest first. """
+        size = len(self)
+        if 0 == size:
+            return _empty_result()
+        # Once wrapped, the ring is two sorted runs - [oldest:] and [:oldest]:
+        oldest = self._total % self.capacity if self._total > self.capacity else 0
+        runs = [(oldest, size)] if 0 == oldest else [(oldest, self.capacity), (0, oldest)]
+        parts = []
+        for lo, hi in runs:
+            i0 = lo + int(np.searchsorted(self.start[lo:hi], t0, side="left"))
+            i1 = lo + int(np.searchsorted(self.start[lo:hi], t1, side="left"))
+            if i1 > i0:
+                parts.append(slice(i0, i1))
+        result = {key: np.concatenate([getattr(self, key)[s] for s in parts]) if parts else np.zeros(0)
+                  for key in ("start", "min", "max", "sum", "count")}
+        result["mean"] = result["sum"] / np.maximum(result["count"], 1)
+        result["resolution_ns"] = self.resolution_ns
+        return result
+
+
+def _empty_result() -> dict:
+    result = {key: np.zeros(0) for key in ("start", "min", "max", "sum", "count", "mean")}
+    result["resolution_ns"] = 0
+    return result
+
+
+class Rollups:
+    """
+    Set of rollup tiers for one channel, all fed from the same samples.
+    """
+    def __init__(self, tiers: tuple=DEFAULT_TIERS):
+        self.tiers = [RollupTier(resolution_ns, capacity) for resolution_ns, capacity in sorted(tiers)]
+        self.last_ts = None         # Newest sample rolled up [epoch-ns].
+        self._lock = threading.Lock()
+        self._saver = None          # Background thread of 'save_async()'.
+
+    def add(self, ts: int, value: float) -> None:
+        self.extend(np.array([ts], dtype=np.int64), np.array([value], dtype=np.float64))
+
+    def extend(self, ts: object, values: object) -> None:
+        ts = np.asarray(ts, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if 0 == len(ts):
+            return
+        with self._lock:
+            for tier in self.tiers:
+                tier.extend(ts, values)
+            self.last_ts = int(ts[-1]) if self.last_ts is None else max(self.last_ts, int(ts[-1]))
+
+    def pick_tier(self, t0: int, t1: int, pixels: int) -> RollupTier|None:
+        """ Coarsest tier w. at least one bucket per pixel that retains 't0' - or None, if raw samples are needed. """
+        span = t1 - t0
+        best = None
+        with self._lock:
+            for tier in self.tiers:
+                if span / tier.resolution_ns >= pixels and tier.covers(t0):
+                    best = tier
+        return best
+
+    def query(self, t0: int, t1: int, pixels: int) -> dict|None:
+        """
+        Get aggregated data for a chart 'pixels' wide, covering [t0, t1).
+
+        Returns:
+            dict|None: arrays 'start', 'min', 'max', 'mean', 'count' (+ 'resolution_ns'), or None
+                       if the range is too short for any tier (i.e. use raw samples).
+        """
+        tier = self.pick_tier(t0, t1, pixels)
+        if tier is None:
+            return None
+        with self._lock:
+            return tier.query(t0, t1)
+
+    # ******************************* Persistence *******************************
+
+    def snapshot(self) -> dict:
+        """ Consistent COPY of all tiers (as saved) - only this copy is made w. the lock held, NOT the file-write. """
+        with self._lock:
+            arrays = {f"{i}_{key}": getattr(tier, key).copy() for i, tier in enumerate(self.tiers) for key in TIER_ARRAYS}
+            arrays["layout"] = np.array([(tier.resolution_ns, tier.capacity, tier._total) for tier in self.tiers], dtype=np.int64)
+            arrays["last_ts"] = np.array([-1 if self.last_ts is None else self.last_ts], dtype=np.int64)
+        return arrays
+
+    def save(self, path: str, arrays: dict=None) -> None:
+        """ Write all tiers (or a 'snapshot()') to 'path' (.npz) - atomic, i.e. readers never see a half-written file. """
+        arrays = self.snapshot() if arrays is None else arrays
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def save_async(self, path: str) -> bool:
+        """
+        Snapshot now, and write it from a background thread - i.e. ingestion and queries are NOT stalled by the file-write
+        (the default tiers are ~30 MB). Skipped (returns False) while the previous save is still running.
+        """
+        if self._saver is not None and self._saver.is_alive():
+            return False
+        self._saver = threading.Thread(target=self.save, args=(path, self.snapshot()), name="rollup-save", daemon=True)
+        self._saver.start()
+        return True
+
+    def wait_saved(self, timeout_s: float=None) -> None:
+        """ Wait for a running 'save_async()', e.g. before exit. """
+        if self._saver is not None:
+            self._saver.join(timeout_s)
+
+    @classmethod
+    def load(cls, path: str, tiers: tuple=DEFAULT_TIERS) -> "Rollups":
+        """ Rollups saved to 'path' - or empty ones, if there is no such file or it was saved w. other tiers. """
+        rollups = cls(tiers)
+        if not os.path.exists(path):
+            return rollups
+        with np.load(path) as data:
+            layout = data["layout"]
+            if [(tier.resolution_ns, tier.capacity) for tier in rollups.tiers] != [tuple(row[:2]) for row in layout.tolist()]:
+                print(f"WARN: ignoring rollups in '{path}' - saved w. different tiers.")
+                return rollups
+            for i, tier in enumerate(rollups.tiers):
+                for key in TIER_ARRAYS:
+                    getattr(tier, key)[:] = data[f"{i}_{key}"]
+                tier._total = int(layout[i, 2])
+            last_ts = int(data["last_ts"][0])
+            rollups.last_ts = None if 0 > last_ts else last_ts
+        return rollups
+
+
+def rollups_path(channel_store: object) -> str:
+    return os.path.join(channel_store.directory, ROLLUPS_FILE)
+
+
+def open_rollups(channel_store: object, tiers: tuple=DEFAULT_TIERS, t_end: int=None) -> Rollups:
+    """
+    Rollups of a stored channel ('store.ChannelStore'): the persisted tiers, caught up w. the samples stored since
+    they were saved (all stored samples, if never saved - i.e. ONE full scan).
+    """
+    rollups = Rollups.load(rollups_path(channel_store), tiers)
+    catch_up(rollups, channel_store, t_end)
+    return rollups
+
+
+def catch_up(rollups: Rollups, channel_store: object, t_end: int=None) -> int:
+    """
+    Roll up the samples stored after 'rollups.last_ts' (all stored samples, if None), up to 't_end' (default: newest).
+    NOTE: a store written by ANOTHER process must be 'reload()'-ed first, to see its new blocks.
+
+    Returns:
+        int: number of samples rolled up.
+    """
+    t0 = rollups.last_ts + 1 if rollups.last_ts is not None else channel_store.first_ts()
+    if t0 is None:
+        return 0                # Empty store.
+    if t_end is None:
+        newest, _ = channel_store.last(1)
+        t_end = int(newest[-1]) + 1 if len(newest) else t0
+    chunk_ns = CATCH_UP_CHUNK_S * NS_PER_S
+    n_samples = 0
+    for start in range(t0, t_end, chunk_ns):
+        ts, values = channel_store.range(start, min(start + chunk_ns, t_end))
+        rollups.extend(ts, values)
+        n_samples += len(ts)
+    return n_samples
@@ -0,0 +1,247 @@
+"""
+@file shm_ring.py
+
+@brief Multi-process ingest/render split: a shared-memory ring buffer written by ONE ingestion process,
+and read (zero-copy) by any number of dashboard processes, e.g. Bokeh 'num_procs' > 1 or Panel workers.
+
+Memory layout ('multiprocessing.shared_memory' block):
+    header:  8 x uint64 = [magic, capacity, n_columns, total(rows written), seq(seqlock), 0, 0, 0]
+    data:    capacity x n_columns float64, row-major
+
+Seqlock protocol - the writer increments 'seq' before (odd = write in progress) and after (even) each write.
+A reader notes 'seq', reads, and re-checks 'seq': if it changed (or was odd) the read raced a write and is retried.
+This way readers never block the writer, and the writer never waits for readers.
+
+Usage:
+    >>> proc = start_ingest_process("sine", broker_address, broker_port, topic)      # In main process, BEFORE forking workers.
+    >>> ring = SharedRing.attach("sine")                                              # In each dashboard process.
+    >>> rows, total = ring.since(prev_total)
+"""
+
+import multiprocessing
+import signal
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+MAGIC = 0x5044425249474E31          # 'PDBRIGN1'
+HEADER_WORDS = 8
+HEADER_BYTES = HEADER_WORDS * 8
+H_MAGIC, H_CAPACITY, H_COLUMNS, H_TOTAL, H_SEQ = range(5)
+
+READ_RETRIES = 100
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    """
+    Keep Python's resource-tracker from unlinking a block that this process merely ATTACHED to
+    (it would do so at exit - before Python 3.13 attaching is tracked as if the block was created).
+    """
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except (ImportError, AttributeError, KeyError):
+        pass
+
+
+class SharedRing:
+    """
+    Fixed-capacity ring of float64-rows in shared memory. Exactly ONE writer, any number of readers.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        self._header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf[:HEADER_BYTES])
+        if MAGIC != int(self._header[H_MAGIC]):
+            raise ValueError(f"Shared memory '{shm.name}' is not a ring buffer!")
+        self.capacity = int(self._header[H_CAPACITY])
+        self.n_columns = int(self._header[H_COLUMNS])
+        self._data = np.ndarray((self.capacity, self.n_columns), dtype=np.float64, buffer=shm.buf[HEADER_BYTES:])
+        if not owner:
+            self._data.flags.writeable = False
+
+    @classmethod
+    def create(cls, name: str, capacity: int, n_columns: int=2) -> "SharedRing":
+        """
+        Create (and own) a ring. NOTE: the owner unlinks it on 'close()'.
+        A block left over by a crashed writer (same name) is unlinked and replaced - there is only ONE writer per ring.
+        """
+        size = HEADER_BYTES + capacity * n_columns * 8
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            print(f"WARN: replacing stale shared memory '{name}' (left over by a previous run?)")
+            stale = shared_memory.SharedMemory(name=name, create=False)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf[:HEADER_BYTES])
+        header[:] = 0
+        header[H_CAPACITY] = capacity
+        header[H_COLUMNS] = n_columns
+        header[H_MAGIC] = MAGIC          # NOTE: written last, i.e. readers never see a half-initialized header.
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, timeout_s: float=10.0) -> "SharedRing":
+        """ Attach (read-only) to an existing ring, waiting up to 'timeout_s' for the writer to create (and initialize) it. """
+        t_end = time.monotonic() + timeout_s
+        while True:
+            try:
+                shm = shared_memory.SharedMemory(name=name, create=False)
+                _untrack(shm)
+                if len(shm.buf) >= HEADER_BYTES and MAGIC == int(np.frombuffer(shm.buf, dtype=np.uint64, count=1)[0]):
+                    return cls(shm, owner=False)
+                shm.close()         # NOTE: created, but header NOT written yet (magic is written last) - retry.
+                if time.monotonic() > t_end:
+                    raise ValueError(f"Shared memory '{name}' is not a ring buffer!")
+            except FileNotFoundError:
+                if time.monotonic() > t_end:
+                    raise
+            time.sleep(0.05)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def total(self) -> int:
+        return int(self._header[H_TOTAL])
+
+    # ******************************* Writer *******************************
+
+    def extend(self, rows: object) -> None:
+        """ Append rows (shape: n x n_columns). Owner only! """
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, self.n_columns)
+        n = len(rows)
+        if 0 == n:
+            return
+        if n > self.capacity:
+            rows = rows[-self.capacity:]
+        total = int(self._header[H_TOTAL])
+        self._header[H_SEQ] += 1                # Odd: write in progress.
+        start = (total + n - len(rows)) % self.capacity
+        first = min(len(rows), self.capacity - start)
+        self._data[start:start + first] = rows[:first]
+        self._data[:len(rows) - first] = rows[first:]
+        self._header[H_TOTAL] = total + n
+        self._header[H_SEQ] += 1                # Even: consistent again.
+
+    def append(self, *values: float) -> None:
+        self.extend(np.asarray(values, dtype=np.float64))
+
+    # ******************************* Readers *******************************
+
+    def begin_read(self) -> int:
+        """ Start of an optimistic read - returns sequence number to pass on to 'validate()'. """
+        for _ in range(READ_RETRIES):
+            seq = int(self._header[H_SEQ])
+            if 0 == seq % 2:
+                return seq
+            time.sleep(0)       # Writer is busy - yield.
+        raise TimeoutError("Ring buffer writer seems stuck in a write!")
+
+    def validate(self, seq: int) -> bool:
+        """ True if no write happened since 'begin_read()' returned 'seq', i.e. what was read is consistent. """
+        return int(self._header[H_SEQ]) == seq
+
+    def views(self, n: int, total: int) -> tuple:
+        """
+        Zero-copy access to the newest 'n' rows (as of 'total'), as one or two read-only array views
+        (two, when the rows wrap around the end of the ring). Must be used between 'begin_read()' and 'validate()'.
+        """
+        n = min(n, total, self.capacity)
+        end = total % self.capacity
+        start = end - n
+        if start >= 0:
+            return (self._data[start:end],)
+        return (self._data[start:], self._data[:end])
+
+    def last(self, n: int=None) -> np.ndarray:
+        """ Consistent COPY of the newest 'n' rows (default: all stored), oldest first. """
+        for _ in range(READ_RETRIES):
+            seq = self.begin_read()
+            total = int(self._header[H_TOTAL])
+            parts = self.views(self.capacity if n is None else n, total)
+            result = parts[0].copy() if 1 == len(parts) else np.concatenate(parts)
+            if self.validate(seq):
+                return result
+        raise TimeoutError("Could not get a consistent read - writer too fast for ring capacity?")
+
+    def since(self, total: int) -> tuple:
+        """
+        Rows written after 'total' (as returned by a previous call), for incremental consumers.
+
+        Returns:
+            tuple: (rows, new_total). If the reader fell behind more than 'capacity', the oldest rows are lost.
+        """
+        for _ in range(READ_RETRIES):
+            seq = self.begin_read()
+            current = int(self._header[H_TOTAL])
+            parts = self.views(current - total, current)
+            result = parts[0].copy() if 1 == len(parts) else np.concatenate(parts)
+            if self.validate(seq):
+                return result, current
+        raise TimeoutError("Could not get a consistent read - writer too fast for ring capacity?")
+
+    def close(self) -> None:
+        del self._header, self._data        # NOTE: views must be released before the mapping can be closed!
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+# ********************************** Ingestion Process **************************************
+
+def _ingest_main(ring_name: str, capacity: int, broker_address: str, broker_port: int, topic: str|list, parser: object, store_root: str) -> None:
+    """ Ingestion-process entry: subscribe, parse, and write (receive-time, value) rows into the ring (and optionally the store). """
+    from py_dash_boards.ingest import mqtt_setup
+    from py_dash_boards.store import TimeSeriesStore
+    #
+    # 'Process.terminate()' sends SIGTERM - exit via SystemExit, i.e. the 'finally' below unlinks the ring:
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    ring = SharedRing.create(ring_name, capacity, n_columns=2)
+    store = None
+
+    def on_message(client, userdata, msg):
+        try:
+            value = parser(msg.payload)
+        except (ValueError, TypeError, KeyError):
+            return
+        t_recv_ns = time.time_ns()
+        if isinstance(value, np.ndarray):
+            ring.extend(np.column_stack((np.full(len(value), t_recv_ns * 1e-9), value)))
+            if store is not None:
+                store.channel(msg.topic).extend(np.full(len(value), t_recv_ns), value)
+        else:
+            ring.append(t_recv_ns * 1e-9, value)
+            if store is not None:
+                store.channel(msg.topic).append(t_recv_ns, value)
+
+    # NOTE: ring is unlinked also if the (blocking) first connect fails - i.e. NO segment is left in '/dev/shm':
+    try:
+        store = TimeSeriesStore(store_root) if store_root else None
+        client = mqtt_setup(broker_address, broker_port, topic, msg_event_handler=on_message)
+        client.loop_forever()
+    finally:
+        ring.close()
+        if store is not None:
+            store.close()
+
+
+def start_ingest_process(ring_name: str, broker_address: str, broker_port: int, topic: str|list,
+                         capacity: int=100000, parser: object=float, store_root: str=None) -> multiprocessing.Process:
+    """
+    Start the ingestion process, which creates and owns ring 'ring_name' w. columns (receive-time[epoch s], value).
+    If 'store_root' is given, samples are also persisted in a 'py_dash_boards.store.TimeSeriesStore'.
+
+    NOTE: 'parser' must be picklable (i.e. a module-level function) on platforms using the 'spawn' start-method.
+    """
+    proc = multiprocessing.Process(target=_ingest_main, name=f"ingest-{ring_name}", daemon=True,
+                                   args=(ring_name, capacity, broker_address, broker_port, topic, parser, store_root))
+    proc.start()
+    return proc
@@ -0,0 +1,44 @@
+"""
+@file startup.py
+
+@brief Startup-time helpers - heavy framework imports (Panel, HoloViews, Taipy, Pandas ...) are pre-warmed in a
+background thread, while the main thread connects to the MQTT broker, i.e. import- and connect-time overlap.
+
+NOTE: import the pre-warmed modules in the main thread in the SAME order as given to 'prewarm()' - the main thread
+then just waits for the module(s) already being imported, and the module-locks are taken in a consistent order.
+
+Usage:
+    >>> prewarm("holoviews", "panel")                   # Before connecting.
+    >>> client = mqtt_setup(...)                        # Blocking network I/O - imports proceed meanwhile.
+    >>> def create_view():
+    >>>     import holoviews as hv                      # Already (or partly) imported.
+    >>>     import panel as pn
+"""
+
+import importlib
+import threading
+import time
+
+from py_dash_boards.metrics import REGISTRY, Registry
+
+
+def prewarm(*modules: str, registry: Registry=REGISTRY) -> threading.Thread:
+    """
+    Import modules in a daemon thread. Import-time of each is recorded as 'pdb_import_seconds{module=...}'.
+
+    Returns:
+        threading.Thread: the (started) import-thread - 'join()' it to wait for all imports.
+    """
+    def run():
+        for name in modules:
+            t_start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError as exc:
+                print(f"WARN: could NOT pre-warm '{name}': {exc}")     # NOTE: the main thread's own import reports it properly.
+                continue
+            registry.gauge("pdb_import_seconds", "Time spent importing a pre-warmed module.", {"module": name}).set(time.perf_counter() - t_start)
+    #
+    thread = threading.Thread(target=run, name="pdb-prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,103 @@
+"""
+@file stft.py
+
+@brief Streaming STFT (spectrogram) for block-wise sample feeds, e.g. vibration sensors, w. a rolling waterfall buffer.
+
+Samples are pushed in blocks of any size. Overlapping windows ('nfft' long, every 'hop' samples) are taken as a
+zero-copy strided view over the input buffer, and all windows completed by a block are transformed in ONE batched
+'numpy.fft.rfft' call - so the per-window Python overhead is nil, and kHz-rate feeds need a fraction of one core.
+
+New spectrogram columns go into a fixed-size waterfall (frequency x time), written twice ('i' and 'i + n_columns'),
+so the latest 'n_columns' columns are always one contiguous view - directly usable as Bokeh 'image' or Matplotlib 'imshow' data.
+
+Usage:
+    >>> stft = StreamingSTFT(fs=10000, nfft=1024, hop=256, n_columns=400)
+    >>> new_columns = stft.push(block)                  # Block of samples (any length) - returns (n_new, n_bins) [dB].
+    >>> ax.imshow(stft.waterfall(), origin="lower", aspect="auto", extent=stft.extent())
+"""
+
+import threading
+
+import numpy as np
+
+
+DB_FLOOR = -120.0           # Magnitude floor [dB] (avoids log(0)).
+
+
+class StreamingSTFT:
+    """
+    Incremental STFT over a sample stream.
+    """
+    def __init__(self, fs: float, nfft: int=1024, hop: int=256, n_columns: int=400, window: str="hann"):
+        if not 0 < hop <= nfft:
+            raise ValueError("'hop' must be in range 1..nfft")
+        self.fs = fs
+        self.nfft = nfft
+        self.hop = hop
+        self.n_columns = n_columns
+        self.n_bins = nfft // 2 + 1
+        self.window = np.hanning(nfft) if "hann" == window else np.ones(nfft)
+        self._scale = 2.0 / self.window.sum()          # Amplitude-correct: a sine of amplitude A peaks at ~A.
+        self.freqs = np.fft.rfftfreq(nfft, 1.0 / fs)
+        # Input: samples not yet consumed by a complete window (at most nfft - 1 + block):
+        self._buf = np.zeros(4 * nfft, dtype=np.float64)
+        self._n = 0
+        # Waterfall - each column written twice, see module doc:
+        self._waterfall = np.full((self.n_bins, 2 * n_columns), DB_FLOOR, dtype=np.float32)
+        self._total_columns = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_columns(self) -> int:
+        """ Columns computed since creation - also usable as 'version' for change-detection. """
+        return self._total_columns
+
+    def push(self, samples: object) -> np.ndarray:
+        """
+        Add a block of samples. Returns the new spectrogram columns as (n_new, n_bins) array of magnitudes [dB].
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        if self._n + len(samples) > len(self._buf):
+            grown = np.zeros(max(2 * len(self._buf), self._n + len(samples)), dtype=np.float64)
+            grown[:self._n] = self._buf[:self._n]
+            self._buf = grown
+        self._buf[self._n:self._n + len(samples)] = samples
+        self._n += len(samples)
+        if self._n < self.nfft:
+            return np.zeros((0, self.n_bins), dtype=np.float32)
+        # All complete windows, as ONE strided view (no copy) -> one batched FFT:
+        n_frames = 1 + (self._n - self.nfft) // self.hop
+        frames = np.lib.stride_tricks.sliding_window_view(self._buf[:self._n], self.nfft)[::self.hop][:n_frames]
+        spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1)) * self._scale
+        columns = (20.0 * np.log10(np.maximum(spectrum, 10 ** (DB_FLOOR / 20)))).astype(np.float32)
+        # Keep the overlap (samples needed by the next window):
+        consumed = n_frames * self.hop
+        remaining = self._n - consumed
+        self._buf[:remaining] = self._buf[consumed:self._n]
+        self._n = remaining
+        self._add_columns(columns)
+        return columns
+
+    def _add_columns(self, columns: np.ndarray) -> None:
+        with self._lock:
+            # NOTE: count ALL columns - also those pushed out of the waterfall right away (keeps time-extent and order):
+            self._total_columns += max(0, len(columns) - self.n_columns)
+            for column in columns[-self.n_columns:]:
+                idx = self._total_columns % self.n_columns
+                self._waterfall[:, idx] = column
+                self._waterfall[:, idx + self.n_columns] = column
+                self._total_columns += 1
+
+    def waterfall(self, copy: bool=False) -> np.ndarray:
+        """
+        Latest 'n_columns' columns, oldest first, as (n_bins, n_columns) array - i.e. frequency along y, time along x.
+        NOTE: a VIEW unless 'copy' is set - use 'copy=True' if 'push()' runs in another thread (e.g. the MQTT-thread).
+        """
+        with self._lock:
+            start = self._total_columns % self.n_columns
+            view = self._waterfall[:, start:start + self.n_columns]
+            return view.copy() if copy else view
+
+    def extent(self) -> tuple:
+        """ (x0, x1, y0, y1) for 'imshow(extent=...)': time [s] relative to the newest column, frequency [Hz]. """
+        return (-self.n_columns * self.hop / self.fs, 0.0, 0.0, self.fs / 2)
@@ -0,0 +1,315 @@
+"""
+@file store.py
+
+@brief Append-only on-disk time-series store for ingested channels, w. fast 'range(t0, t1)' and 'last(n)' queries.
+
+On-disk layout, one directory per channel:
+    <root>/<channel>/<seq:08d>.dat    segment: SEGMENT_BLOCKS fixed-size blocks, each block = BLOCK_ROWS int64 timestamps
+                                      followed by BLOCK_ROWS float64 values (i.e. columnar within the block)
+    <root>/<channel>/<seq:08d>.zdat   same, but sealed and compressed (zlib, per block) - if 'compress' is enabled
+    <root>/<channel>/<seq:08d>.idx    sparse index: per block (min_ts, max_ts, n_rows, offset, nbytes) as int64
+
+Timestamps are int64 epoch-nanoseconds and must be non-decreasing per channel (append-only).
+Queries only touch the segments (and within them, the blocks) overlapping the requested time-range:
+uncompressed segments are memory-mapped, compressed blocks are decompressed one by one.
+
+Usage:
+    >>> store = TimeSeriesStore("~/.py_dash_boards/store")
+    >>> ch = store.channel("1/testPoints/sinus")
+    >>> ch.append(time.time_ns(), 0.5)
+    >>> ts, values = ch.range(time.time_ns() - 3600 * 10**9, time.time_ns())      # Last hour.
+"""
+
+import os
+import threading
+import zlib
+
+import numpy as np
+
+
+BLOCK_ROWS = 4096
+SEGMENT_BLOCKS = 256                            # I.e. 1M rows / 16 MB per segment.
+BLOCK_BYTES = BLOCK_ROWS * (8 + 8)
+INDEX_COLUMNS = 5                               # min_ts, max_ts, n_rows, offset, nbytes
+I_MIN, I_MAX, I_ROWS, I_OFFSET, I_NBYTES = range(INDEX_COLUMNS)
+
+
+def _safe_name(channel: str) -> str:
+    """ Channel (e.g. MQTT topic) -> directory name. """
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in channel)
+
+
+class _Segment:
+    """ One segment file + its sparse index. """
+    def __init__(self, path_base: str, seq: int):
+        self.path_base = path_base
+        self.seq = seq
+        self.index = np.zeros((0, INDEX_COLUMNS), dtype=np.int64)
+        self.compressed = os.path.exists(path_base + ".zdat")
+        if os.path.exists(path_base + ".idx"):
+            self.index = np.fromfile(path_base + ".idx", dtype=np.int64).reshape(-1, INDEX_COLUMNS)
+        self._mmap = None
+
+    @property
+    def data_path(self) -> str:
+        return self.path_base + (".zdat" if self.compressed else ".dat")
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.index[:, I_ROWS].sum())
+
+    @property
+    def min_ts(self) -> int:
+        return int(self.index[0, I_MIN])
+
+    @property
+    def max_ts(self) -> int:
+        return int(self.index[-1, I_MAX])
+
+    def write_index(self, index: np.ndarray=None) -> None:
+        tmp_path = self.path_base + ".idx.tmp"
+        (self.index if index is None else index).tofile(tmp_path)
+        os.replace(tmp_path, self.path_base + ".idx")     # NOTE: atomic, i.e. readers never see a half-written index.
+
+    def raw_block(self, block_no: int, index: np.ndarray=None) -> np.ndarray:
+        """ Get one (fixed-size) block as bytes - a view into the memory-map if uncompressed. """
+        index = self.index if index is None else index
+        if self.compressed:
+            with open(self.data_path, "rb") as f:
+                f.seek(int(index[block_no, I_OFFSET]))
+                raw = zlib.decompress(f.read(int(index[block_no, I_NBYTES])))
+            return np.frombuffer(raw, dtype=np.uint8)
+        if self._mmap is None or len(self._mmap) < (block_no + 1) * BLOCK_BYTES:
+            self._mmap = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+        return self._mmap[block_no * BLOCK_BYTES:(block_no + 1) * BLOCK_BYTES]
+
+    def read_block(self, block_no: int, index: np.ndarray=None) -> tuple:
+        """ Get (timestamps, values) of one block - 'index' is a snapshot taken by a query (default: current index). """
+        index = self.index if index is None else index
+        n_rows = int(index[block_no, I_ROWS])
+        block = self.raw_block(block_no, index)
+        ts = block[:BLOCK_ROWS * 8].view(np.int64)[:n_rows]
+        values = block[BLOCK_ROWS * 8:].view(np.float64)[:n_rows]
+        return ts, values
+
+    def compress(self) -> None:
+        """ Rewrite a sealed (full) segment w. zlib-compressed blocks. """
+        offset = 0
+        tmp_path = self.path_base + ".zdat.tmp"
+        index = self.index.copy()
+        with open(tmp_path, "wb") as f:
+            for block_no in range(len(index)):
+                packed = zlib.compress(self.raw_block(block_no).tobytes(), 6)
+                f.write(packed)
+                index[block_no, I_OFFSET] = offset
+                index[block_no, I_NBYTES] = len(packed)
+                offset += len(packed)
+        self._mmap = None
+        os.replace(tmp_path, self.path_base + ".zdat")
+        self.index = index
+        self.compressed = True
+        self.write_index()
+        os.remove(self.path_base + ".dat")
+
+
+class ChannelStore:
+    """
+    Append-only storage of one channel. Single writer per channel; queries may run from any thread.
+    """
+    def __init__(self, directory: str, compress: bool=False):
+        self.directory = directory
+        self.compress = compress
+        os.makedirs(directory, exist_ok=True)
+        self._segments = self._load_segments()
+        # Write-block (tail), kept in memory until full or flushed:
+        self._ts = np.zeros(BLOCK_ROWS, dtype=np.int64)
+        self._values = np.zeros(BLOCK_ROWS, dtype=np.float64)
+        self._n = 0
+        self._lock = threading.RLock()
+        self._reopen_tail()
+
+    def _load_segments(self) -> list:
+        seqs = sorted({int(name.split(".")[0]) for name in os.listdir(self.directory) if name.endswith(".idx")})
+        segments = [_Segment(os.path.join(self.directory, f"{seq:08d}"), seq) for seq in seqs]
+        return [seg for seg in segments if len(seg.index)]
+
+    def reload(self) -> None:
+        """
+        Re-read the segment indexes - for READ-ONLY use of a channel written by another process (e.g. a history chart),
+        i.e. blocks flushed by the writer since become visible. NOT to be called on the writing store!
+        """
+        segments = self._load_segments()
+        with self._lock:
+            self._segments = segments
+            self._n = 0         # NOTE: a partial block re-opened at start is on disk, i.e. in 'segments' now.
+
+    def _reopen_tail(self) -> None:
+        """ Continue a partially filled last block (e.g. after restart), so blocks stay fixed-size and dense. """
+        if not self._segments:
+            return
+        seg = self._segments[-1]
+        if seg.compressed or BLOCK_ROWS <= int(seg.index[-1, I_ROWS]):
+            return
+        ts, values = seg.read_block(len(seg.index) - 1)
+        self._n = len(ts)
+        self._ts[:self._n] = ts
+        self._values[:self._n] = values
+        seg.index = seg.index[:-1]      # Block is re-written on next flush.
+        if 0 == len(seg.index):
+            self._segments.pop()        # NOTE: no complete block left - NO empty segments (queries rely on min_ts/max_ts).
+
+    def _tail_segment(self) -> _Segment:
+        if not self._segments or self._segments[-1].compressed or SEGMENT_BLOCKS <= len(self._segments[-1].index):
+            seq = self._segments[-1].seq + 1 if self._segments else 0
+            seg = _Segment(os.path.join(self.directory, f"{seq:08d}"), seq)
+            seg.index = seg.index[:0]       # NOTE: an index on disk can only hold the (re-opened) partial block, i.e. the tail.
+            self._segments.append(seg)
+        return self._segments[-1]
+
+    def _write_block(self, final: bool) -> None:
+        """ Write the tail block to disk (padded to fixed size). 'final' = block is full and will not be re-written. """
+        if 0 == self._n:
+            return
+        seg = self._tail_segment()
+        block_no = len(seg.index)
+        with open(seg.path_base + ".dat", "r+b" if os.path.exists(seg.path_base + ".dat") else "wb") as f:
+            f.seek(block_no * BLOCK_BYTES)
+            f.write(self._ts.tobytes())
+            f.write(self._values.tobytes())
+        row = np.array([[self._ts[0], self._ts[self._n - 1], self._n, block_no * BLOCK_BYTES, BLOCK_BYTES]], dtype=np.int64)
+        index = np.vstack((seg.index, row))
+        seg.write_index(index)
+        seg._mmap = None
+        if not final:
+            return          # In-memory: block still open, i.e. NOT part of the index for queries (it is in the tail).
+        seg.index = index   # NOTE: replaced, never modified in place - i.e. index-snapshots of running queries stay valid.
+        self._n = 0
+        if self.compress and SEGMENT_BLOCKS <= len(seg.index):
+            seg.compress()
+
+    def append(self, ts: int, value: float) -> None:
+        with self._lock:
+            self._ts[self._n] = ts
+            self._values[self._n] = value
+            self._n += 1
+            if BLOCK_ROWS == self._n:
+                self._write_block(final=True)
+
+    def extend(self, ts: object, values: object) -> None:
+        ts = np.asarray(ts, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            pos = 0
+            while pos < len(ts):
+                take = min(BLOCK_ROWS - self._n, len(ts) - pos)
+                self._ts[self._n:self._n + take] = ts[pos:pos + take]
+                self._values[self._n:self._n + take] = values[pos:pos + take]
+                self._n += take
+                pos += take
+                if BLOCK_ROWS == self._n:
+                    self._write_block(final=True)
+
+    def flush(self) -> None:
+        """ Persist the partially filled tail block (it stays open for further appends). """
+        with self._lock:
+            self._write_block(final=False)
+
+    # ******************************* Queries *******************************
+
+    def first_ts(self) -> int|None:
+        """ Timestamp of the oldest stored sample, or None if empty. """
+        with self._lock:
+            for seg in self._segments:
+                if len(seg.index):
+                    return seg.min_ts
+            return int(self._ts[0]) if self._n else None
+
+    def range(self, t0: int, t1: int) -> tuple:
+        """
+        Get all samples w. t0 <= timestamp < t1.
+
+        Returns:
+            tuple: (timestamps[int64 epoch-ns], values[float64]) arrays.
+        """
+        ts_parts = []
+        value_parts = []
+        with self._lock:
+            segments = [(seg, seg.index) for seg in self._segments]        # Index-snapshots, consistent w. the tail.
+            tail_ts = self._ts[:self._n].copy()
+            tail_values = self._values[:self._n].copy()
+        for seg, index in segments:
+            if 0 == len(index) or index[-1, I_MAX] < t0 or index[0, I_MIN] >= t1:
+                continue
+            # Sparse index -> first/last block overlapping [t0, t1):
+            first = int(np.searchsorted(index[:, I_MAX], t0, side="left"))
+            last = int(np.searchsorted(index[:, I_MIN], t1, side="left"))
+            for block_no in range(first, last):
+                ts, values = seg.read_block(block_no, index)
+                lo = int(np.searchsorted(ts, t0, side="left"))
+                hi = int(np.searchsorted(ts, t1, side="left"))
+                ts_parts.append(ts[lo:hi])
+                value_parts.append(values[lo:hi])
+        lo = int(np.searchsorted(tail_ts, t0, side="left"))
+        hi = int(np.searchsorted(tail_ts, t1, side="left"))
+        ts_parts.append(tail_ts[lo:hi])
+        value_parts.append(tail_values[lo:hi])
+        return np.concatenate(ts_parts), np.concatenate(value_parts)
+
+    def last(self, n: int) -> tuple:
+        """
+        Get the newest 'n' samples, oldest first.
+
+        Returns:
+            tuple: (timestamps[int64 epoch-ns], values[float64]) arrays.
+        """
+        with self._lock:
+            segments = [(seg, seg.index) for seg in self._segments]
+            ts_parts = [self._ts[:self._n].copy()]
+            value_parts = [self._values[:self._n].copy()]
+        remaining = n - len(ts_parts[0])
+        for seg, index in reversed(segments):
+            for block_no in range(len(index) - 1, -1, -1):
+                if remaining <= 0:
+                    break
+                ts, values = seg.read_block(block_no, index)
+                ts_parts.append(ts[-remaining:])
+                value_parts.append(values[-remaining:])
+                remaining -= len(ts)
+            if remaining <= 0:
+                break
+        ts = np.concatenate(ts_parts[::-1])
+        values = np.concatenate(value_parts[::-1])
+        return ts[-n:] if n else ts[:0], values[-n:] if n else values[:0]
+
+    def close(self) -> None:
+        self.flush()
+
+
+class TimeSeriesStore:
+    """
+    Collection of channel stores below one root-directory.
+    """
+    def __init__(self, root: str, compress: bool=False):
+        self.root = os.path.expanduser(root)
+        self.compress = compress
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def channel(self, name: str) -> ChannelStore:
+        with self._lock:
+            store = self._channels.get(name)
+            if store is None:
+                store = ChannelStore(os.path.join(self.root, _safe_name(name)), compress=self.compress)
+                self._channels[name] = store
+            return store
+
+    def channels(self) -> list:
+        return sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []
+
+    def flush(self) -> None:
+        for store in list(self._channels.values()):
+            store.flush()
+
+    def close(self) -> None:
+        for store in list(self._channels.values()):
+            store.close()
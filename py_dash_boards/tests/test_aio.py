@@ -0,0 +1,71 @@
+import asyncio
+import struct
+
+import pytest
+
+pytest.importorskip("paho.mqtt")
+
+from py_dash_boards import aio
+from py_dash_boards.aio import AsyncMqttIngest
+from py_dash_boards.metrics import Registry
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple:
+    """ (packet-type, body) of one MQTT packet. """
+    header = (await reader.readexactly(1))[0]
+    length, shift = 0, 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+    return header >> 4, await reader.readexactly(length)
+
+
+def publish_packet(topic: str, payload: bytes) -> bytes:
+    body = struct.pack("!H", len(topic)) + topic.encode() + payload
+    return bytes((0x30, len(body))) + body      # QoS 0, NOTE: short packets only (remaining length < 128).
+
+
+class FakeBroker:
+    """ Minimal MQTT 3.1.1 broker: CONNACK, SUBACK, then publishes one message per connection and hangs up. """
+    def __init__(self):
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        assert 1 == (await read_packet(reader))[0]                  # CONNECT
+        writer.write(b"\x20\x02\x00\x00")                           # CONNACK, accepted.
+        packet_type, body = await read_packet(reader)
+        assert 8 == packet_type                                     # SUBSCRIBE
+        writer.write(b"\x90\x03" + body[:2] + b"\x00")              # SUBACK, same packet-id.
+        writer.write(publish_packet("a/b", f"msg{self.connections}".encode()))
+        await writer.drain()
+        await asyncio.sleep(0.1)
+        writer.close()                                              # Connection lost - client has to reconnect.
+
+
+class TestAsyncMqttIngest:
+
+    def test_reconnect_and_iterate(self, monkeypatch):
+        monkeypatch.setattr(aio, "MISC_INTERVAL_S", 0.02)
+
+        async def run():
+            broker = FakeBroker()
+            server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            ingest = AsyncMqttIngest("127.0.0.1", port, "a/#", max_latency_s=0.01, min_backoff_s=0.05, registry=Registry())
+            await ingest.connect()
+            payloads = []
+            async for batch in ingest:
+                payloads += [payload for _, payload, _ in batch]
+                if 2 <= len(payloads):
+                    break
+            await ingest.close()
+            server.close()
+            return payloads, ingest.reconnect_counter.value
+
+        payloads, reconnects = asyncio.run(asyncio.wait_for(run(), timeout=10))
+        assert [b"msg1", b"msg2"] == payloads
+        assert 1 <= reconnects
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from py_dash_boards import backpressure as bp
+from py_dash_boards.metrics import Registry
+
+
+class TestBoundedChannel:
+
+    def test_drop_oldest(self):
+        channel = bp.BoundedChannel("t", maxlen=3, policy=bp.POLICY_DROP_OLDEST, registry=Registry())
+        for i in range(5):
+            assert channel.put(i)
+        assert channel.drain() == [2, 3, 4]
+        assert channel.dropped_counter.value == 2
+
+    def test_drop_newest(self):
+        channel = bp.BoundedChannel("t", maxlen=3, policy=bp.POLICY_DROP_NEWEST, registry=Registry())
+        results = [channel.put(i) for i in range(5)]
+        assert results == [True, True, True, False, False]
+        assert channel.drain() == [0, 1, 2]
+        assert channel.dropped_counter.value == 2
+
+    def test_decimate_keeps_span(self):
+        channel = bp.BoundedChannel("t", maxlen=8, policy=bp.POLICY_DECIMATE, decimate_factor=2, registry=Registry())
+        channel.put_many(range(20))
+        items = channel.drain()
+        assert len(items) <= 8
+        assert items == sorted(items)
+        assert items[-1] == 19
+        assert channel.decimated_counter.value == 20 - len(items)
+        assert channel.dropped_counter.value == 0
+
+    def test_decimate_minmax_keeps_peaks(self):
+        samples = [(i, v) for i, v in enumerate([0, 5, -5, 0, 1, 9, 0, -1])]
+        reduced = bp.decimate(samples, 4, bp.DECIMATE_MINMAX, value_key=lambda s: s[1])
+        assert reduced == [(1, 5), (2, -5), (5, 9), (7, -1)]
+
+    def test_block_until_drained(self):
+        channel = bp.BoundedChannel("t", maxlen=2, policy=bp.POLICY_BLOCK, block_timeout_s=5.0, registry=Registry())
+        channel.put_many([0, 1])
+        producer = threading.Thread(target=channel.put, args=(2,))
+        producer.start()
+        producer.join(0.1)
+        assert producer.is_alive()
+        assert channel.drain() == [0, 1]
+        producer.join(5.0)
+        assert channel.drain() == [2]
+
+    def test_block_timeout_drops(self):
+        channel = bp.BoundedChannel("t", maxlen=1, policy=bp.POLICY_BLOCK, block_timeout_s=0.01, registry=Registry())
+        assert channel.put(0)
+        assert not channel.put(1)
+        assert channel.dropped_counter.value == 1
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError):
+            bp.BoundedChannel("t", policy="nope", registry=Registry())
+
+    def test_decimate_fallback_counts_drop(self):
+        with pytest.raises(ValueError):
+            bp.BoundedChannel("t", policy=bp.POLICY_DECIMATE, decimate_factor=2, decimate_mode=bp.DECIMATE_MINMAX, registry=Registry())
+        # Too small to decimate - oldest sample is dropped (and counted as such):
+        channel = bp.BoundedChannel("t", maxlen=2, policy=bp.POLICY_DECIMATE, decimate_mode=bp.DECIMATE_MINMAX, registry=Registry())
+        channel.put_many([0, 1, 2])
+        assert channel.drain() == [1, 2]
+        assert 1 == channel.dropped_counter.value and 0 == channel.decimated_counter.value
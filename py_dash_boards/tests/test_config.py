@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from py_dash_boards.__main__ import FRONTENDS, REPO_ROOT, main
+from py_dash_boards.config import CONFIG_ENV, export_environment, load_config, lookup
+
+
+class TestConfig:
+
+    def test_shipped_config_and_lookup(self):
+        config = load_config(os.path.join(REPO_ROOT, "configs", "sine_bokeh.toml"))
+        assert lookup(config, "frontend.name") in FRONTENDS
+        assert 33 == lookup(config, "frontend.render_floor_ms")
+        assert 42 == lookup(config, "frontend.missing", 42)
+        assert 42 == lookup(config, "channel.topic.nested", 42)         # NOT a section.
+
+    def test_yaml_config(self):
+        pytest.importorskip("yaml")
+        config = load_config(os.path.join(REPO_ROOT, "configs", "iss_matplotlib.yaml"))
+        assert "Satellite/Iss" == lookup(config, "channel.topic")
+
+    def test_environment_overrides_config(self, tmp_path):
+        path = tmp_path / "test.toml"
+        path.write_text('[source]\nbroker = "broker.local"\nport = 1884\n')
+        environ = export_environment(load_config(str(path)), str(path), environ={"PDB_MQTT_PORT": "1999"})
+        assert "broker.local" == environ["PDB_MQTT_BROKER"] and "1999" == environ["PDB_MQTT_PORT"]
+        assert str(path) == environ[CONFIG_ENV]
+
+    def test_frontend_scripts_exist(self):
+        for spec in FRONTENDS.values():
+            assert os.path.isfile(os.path.join(REPO_ROOT, spec["script"]))
+
+    def test_unknown_frontend(self, tmp_path):
+        path = tmp_path / "test.toml"
+        path.write_text('[frontend]\nname = "nope"\n')
+        with pytest.raises(SystemExit):
+            main([str(path)])
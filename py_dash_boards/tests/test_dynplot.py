@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "matplotlib_ex"))
+from dynplot import dynplot
+from trajectory3d import TrackBuffer
+
+
+class TestDynplot:
+
+    def test_artists_updated_in_place(self):
+        dplt = dynplot(refresh_rate=0.0)
+        x = np.arange(10.0)
+        line, = dplt.plot(x, x)
+        image = dplt.imshow(np.zeros((4, 4)))[0]
+        dplt.scatter(x, x)
+        dplt.show()
+        # Following calls update the SAME artists - arrays are handed over as-is:
+        dplt.plot(x, 2 * x, color="red")
+        dplt.imshow(np.ones((4, 4)))
+        dplt.scatter(x[:3], x[:3], s=np.full(3, 5.0))
+        assert [line] == dplt.lines and 18.0 == line.get_ydata()[-1] and "red" == line.get_color()
+        assert 1.0 == image.get_array()[0, 0]
+        assert 3 == len(dplt._artists["scatter"][0].get_offsets())
+        # Setters are cached per artist class (NOT per 'id()', which may be reused after garbage-collection):
+        assert {(type(line), "color")} == set(dplt._setters)
+        matplotlib.pyplot.close(dplt.fig)
+
+    def test_3d_line(self):
+        dplt = dynplot(refresh_rate=0.0, projection="3d")
+        track = TrackBuffer(window=5)
+        track.store([(i, -i, 2 * i, None) for i in range(8)])
+        xyz = track.view()
+        line, = dplt.plot(xyz[0], xyz[1], xyz[2])
+        dplt.show()
+        track.store([(8, -8, 16, None)])
+        xyz = track.view()
+        dplt.plot(xyz[0], xyz[1], xyz[2])
+        assert np.array_equal(line.get_data_3d()[0], np.arange(4.0, 9.0))
+        matplotlib.pyplot.close(dplt.fig)
+
+    def test_run_updates_when_idle(self):
+        dplt = dynplot(refresh_rate=0.0)
+        stop = threading.Event()
+        calls = []
+
+        def update(d):
+            calls.append(d.frames_drawn)
+            if 3 == len(calls):
+                stop.set()
+            return 1 == len(calls)      # Only the first (idle) update changes anything.
+
+        dplt.run(threading.Event(), update, stop=stop, idle_update_s=0.01)      # NO data ever arrives.
+        assert [0, 1, 1] == calls
+        matplotlib.pyplot.close(dplt.fig)
+
+
+class TestTrackBuffer:
+
+    def test_wrap_is_contiguous_view(self):
+        track = TrackBuffer(window=4, max_gap_ns=10)
+        track.store([(i, 0, 0, 1000 + i) for i in range(6)])
+        xyz = track.view()
+        assert np.array_equal(xyz[0], [2, 3, 4, 5]) and np.shares_memory(xyz, track._xyz)
+        track.store([(6, 0, 0, 1100)])          # Gap > 'max_gap_ns' - line break (NaN) first.
+        assert np.isnan(track.view()[0, -2]) and 6 == track.view()[0, -1] and 1100 == track.latest_ts
@@ -0,0 +1,62 @@
+import urllib.request
+import urllib.error
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from py_dash_boards.frameserver import FrameRenderer, serve_frames
+from py_dash_boards.governor import RenderGovernor
+from py_dash_boards.metrics import Registry
+
+
+class TestFrameServer:
+
+    def test_shared_render_and_etag(self):
+        fig, ax = plt.subplots(figsize=(2, 2), dpi=50)
+        line, = ax.plot([0, 1], [0, 1])
+        updates = {"new_data": True}
+        renderer = FrameRenderer(fig, update=lambda i: updates["new_data"], registry=Registry())
+        assert renderer.render_once()
+        updates["new_data"] = False
+        assert not renderer.render_once()         # Nothing new - no draw, same frame.
+        server = serve_frames(renderer, port=0, address="127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/snapshot.png"
+            bodies = []
+            for _ in range(3):          # Several viewers - one encode.
+                with urllib.request.urlopen(url) as resp:
+                    etag = resp.headers["ETag"]
+                    bodies.append(resp.read())
+            assert bodies[0].startswith(b"\x89PNG") and bodies[0] == bodies[2]
+            assert 1 == renderer.encode_counter.value
+            request = urllib.request.Request(url, headers={"If-None-Match": etag})
+            try:
+                urllib.request.urlopen(request)
+                assert False, "expected '304 Not Modified'"
+            except urllib.error.HTTPError as exc:
+                assert 304 == exc.code
+        finally:
+            server.shutdown()
+            renderer.stop()
+            plt.close(fig)
+
+    def test_governed_render(self):
+        fig, ax = plt.subplots(figsize=(2, 2), dpi=50)
+        registry = Registry()
+        governor = RenderGovernor("test", floor_ms=1, ceiling_ms=10, max_load=100.0, registry=registry)    # NOTE: NO throttling by render-cost.
+        updates = {"new_data": True}
+        renderer = FrameRenderer(fig, update=lambda i: updates["new_data"], governor=governor, registry=registry)
+        try:
+            assert renderer.render_once()               # First frame - always.
+            assert not renderer.render_once()           # No arrivals - skipped w.o. calling 'update'.
+            assert 1 == renderer.frame_no
+            updates["new_data"] = False
+            governor.arrived()
+            assert not renderer.render_once()           # Due, but nothing to show yet - postponed.
+            updates["new_data"] = True
+            assert renderer.render_once()
+            assert 2 == renderer.render_counter.value
+        finally:
+            renderer.stop()
+            plt.close(fig)
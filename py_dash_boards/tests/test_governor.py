@@ -0,0 +1,42 @@
+from py_dash_boards.governor import RenderGovernor
+from py_dash_boards.metrics import Registry
+
+
+def run_ticks(governor: RenderGovernor, seconds: float, arrivals_per_tick: float, render_cost_s: float=0.001) -> int:
+    """ Simulate the periodic callback - returns the number of renders. """
+    renders, acc = 0, 0.0
+    for i in range(int(seconds / governor.floor_s)):
+        now = 1000.0 + i * governor.floor_s
+        acc += arrivals_per_tick
+        if 1 <= acc:
+            governor.arrived(int(acc))
+            acc -= int(acc)
+        if governor.should_render(now):
+            governor.rendered(now, render_cost_s)
+            renders += 1
+    return renders
+
+
+class TestRenderGovernor:
+
+    def test_idle_topic_is_skipped(self):
+        governor = RenderGovernor("test", floor_ms=33, ceiling_ms=1000, registry=Registry())
+        assert 0 == run_ticks(governor, 5.0, 0)
+        assert governor.skipped_counter.value > 100
+
+    def test_hot_topic_renders_at_floor_rate(self):
+        governor = RenderGovernor("test", floor_ms=33, ceiling_ms=1000, registry=Registry())
+        renders = run_ticks(governor, 10.0, 10)            # ~300 msg/s.
+        assert 28 <= renders / 10.0 <= 31
+        assert 28 <= governor.fps <= 31
+
+    def test_slow_topic_renders_per_arrival(self):
+        governor = RenderGovernor("test", floor_ms=33, ceiling_ms=1000, registry=Registry())
+        renders = run_ticks(governor, 10.0, 0.066)          # ~2 msg/s.
+        assert 18 <= renders <= 21
+
+    def test_expensive_render_is_throttled(self):
+        governor = RenderGovernor("test", floor_ms=33, ceiling_ms=1000, max_load=0.5, registry=Registry())
+        renders = run_ticks(governor, 10.0, 10, render_cost_s=0.1)     # Max. 50% load -> ~5 fps.
+        assert 4 <= renders / 10.0 <= 5.5
+        assert 0.19 <= governor.interval_s <= 0.21
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+pytest.importorskip("paho.mqtt")
+
+from py_dash_boards.ingest import ConnectionManager
+from py_dash_boards.metrics import Registry
+
+
+class FakeClient:
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe(self, topics):
+        self.subscriptions.append(topics)
+
+
+class TestConnectionManager:
+
+    def test_resubscribe_and_outage_bookkeeping(self):
+        manager = ConnectionManager("localhost", 1883, ["a/#", "b"], client_id="test", registry=Registry())
+        gaps = []
+        manager.add_gap_listener(lambda t0, t1: gaps.append((t0, t1)))
+        client = FakeClient()
+        manager._on_connect(client, None, {"session present": 0}, 0)          # First connect - no outage.
+        manager._on_disconnect(client, None, 1)
+        time.sleep(0.01)
+        assert 0 == manager.connected_gauge.value and manager.disconnected_seconds > 0
+        manager._on_connect(client, None, {"session present": 1}, 0)
+        assert client.subscriptions == [[("a/#", 1), ("b", 1)]] * 2            # Subscribed on EVERY connect.
+        assert 1 == manager.connected_gauge.value and 1 == manager.reconnect_counter.value
+        assert 1 == len(gaps) and gaps[0][0] < gaps[0][1]
+        assert manager.disconnected_counter.value == pytest.approx(manager.disconnected_seconds)
+        assert manager.disconnected_seconds > 0.005
+
+    def test_client_ids_per_process(self, monkeypatch):
+        monkeypatch.delenv("PDB_MQTT_CLIENT_ID", raising=False)
+        first, second = (ConnectionManager("localhost", 1883, "a", registry=Registry()) for _ in range(2))
+        # No stable id - paho's random (1.x) or broker-assigned (2.x, empty) id per client, and a clean session:
+        assert not first.client._client_id or first.client._client_id != second.client._client_id
+        assert first.clean_session and second.clean_session
+        # Stable id configured - persistent session:
+        monkeypatch.setenv("PDB_MQTT_CLIENT_ID", "kiosk-1")
+        stable = ConnectionManager("localhost", 1883, "a", registry=Registry())
+        assert b"kiosk-1" == stable.client._client_id and not stable.clean_session
@@ -0,0 +1,31 @@
+from py_dash_boards.memo import memoize
+
+
+class Dashboard:
+    def __init__(self):
+        self.cylinders = 4
+        self.mfr = ["ford", "audi"]
+        self.calls = 0
+
+    @memoize(maxsize=2, params=("cylinders", "mfr"))
+    def plot(self):
+        self.calls += 1
+        return (self.cylinders, tuple(self.mfr))
+
+
+class TestMemoize:
+
+    def test_lru_per_parameter_values(self):
+        dash = Dashboard()
+        first = dash.plot()
+        dash.cylinders = 6
+        dash.plot()
+        dash.cylinders = 4
+        assert dash.plot() is first         # Previously seen state - no recompute.
+        assert 2 == dash.calls
+        dash.mfr = ["honda"]
+        dash.plot()                         # Evicts 'cylinders=6' (least recently used).
+        dash.cylinders = 6
+        dash.plot()
+        assert 4 == dash.calls
+        assert 2 == Dashboard.plot.cache_info()["size"]
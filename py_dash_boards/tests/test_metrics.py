@@ -0,0 +1,60 @@
+import socket
+import urllib.request
+
+from py_dash_boards import metrics
+
+
+class TestMetrics:
+
+    def test_histogram_quantiles(self):
+        hist = metrics.Histogram("h", buckets=(0.001, 0.01, 0.1, 1.0))
+        for _ in range(98):
+            hist.observe(0.005)
+        hist.observe(0.5)
+        hist.observe(0.5)
+        assert hist.count == 100
+        assert 0.001 <= hist.quantile(0.5) <= 0.01
+        assert 0.1 <= hist.quantile(0.99) <= 1.0
+
+    def test_tracer_stages(self):
+        registry = metrics.Registry()
+        tracer = metrics.SampleTracer("test", registry=registry)
+        t_recv = tracer.received()
+        tracer.parsed(t_recv)
+        tracer.inserted(t_recv)
+        assert tracer.render_scheduled()
+        tracer.render_complete()
+        first_frame = tracer.first_frame_gauge.value
+        assert 0 < first_frame
+        # Nothing new -> nothing pending:
+        assert not tracer.render_scheduled()
+        tracer.render_complete()
+        assert first_frame == tracer.first_frame_gauge.value
+        summary = tracer.summary()
+        assert summary[metrics.STAGE_RENDER_COMPLETE]["count"] == 1
+        assert tracer.render_counter.value == 2
+        assert tracer.msg_counter.value == 1
+
+    def test_prometheus_endpoint(self):
+        registry = metrics.Registry()
+        registry.counter("pdb_test_total", "Test counter.", {"frontend": "x"}).inc(3)
+        server = metrics.start_http_server(0, "127.0.0.1", registry=registry)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as resp:
+                body = resp.read().decode("utf-8")
+        finally:
+            server.shutdown()
+        assert "# TYPE pdb_test_total counter" in body
+        assert 'pdb_test_total{frontend="x"} 3' in body
+
+    def test_http_server_once_per_port(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = metrics.start_http_server(port, "127.0.0.1", registry=metrics.Registry())
+        try:
+            assert server is metrics.start_http_server(port, "127.0.0.1")      # E.g. next 'panel serve'-session - NO 'Address in use'.
+        finally:
+            server.shutdown()
+            server.server_close()
+            metrics._http_servers.pop(("127.0.0.1", port))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from py_dash_boards import parquet_io
+from py_dash_boards.store import TimeSeriesStore
+
+
+class TestParquetIO:
+
+    def test_csv_pushdown(self, tmp_path):
+        csv_path = tmp_path / "capture.csv"
+        times = np.arange(100000) / 1000.0
+        np.savetxt(csv_path, np.column_stack((times, np.sin(times))), delimiter=",", header="Time,Amplitude", comments="")
+        pq_path = str(tmp_path / "capture.parquet")
+        assert 100000 == parquet_io.csv_to_parquet(str(csv_path), pq_path, time_column="Time", row_group_rows=10000)
+        # 10 second window -> only the one or two row-groups overlapping it:
+        assert [2, 3] == parquet_io.row_groups_for_range(pq_path, 25.0, 35.0, time_column="Time")
+        table = parquet_io.read_range(pq_path, 25.0, 35.0, time_column="Time")
+        assert 10000 == table.num_rows
+        assert 25.0 == table.column("Time")[0].as_py()
+
+    def test_channel_roundtrip(self, tmp_path):
+        store = TimeSeriesStore(str(tmp_path / "store"))
+        ts = 1_700_000_000 * 10**9 + np.arange(50000, dtype=np.int64) * 10**7        # 100 Hz.
+        values = np.cos(np.arange(50000) / 100.0)
+        store.channel("sinus").extend(ts, values)
+        pq_path = str(tmp_path / "sinus.parquet")
+        assert 50000 == parquet_io.export_channel(store.channel("sinus"), pq_path, t1=int(ts[-1]) + 1, row_group_rows=8192)
+        imported = TimeSeriesStore(str(tmp_path / "imported")).channel("sinus")
+        assert 1000 == parquet_io.import_channel(pq_path, imported, int(ts[20000]), int(ts[21000]))
+        r_ts, r_values = imported.range(0, int(ts[-1]) + 1)
+        assert np.array_equal(r_ts, ts[20000:21000])
+        assert np.array_equal(r_values, values[20000:21000])
+
+    def test_export_after_short_first_run(self, tmp_path):
+        store = TimeSeriesStore(str(tmp_path / "store"))
+        ts = 1_700_000_000 * 10**9 + np.arange(10, dtype=np.int64) * 10**7
+        store.channel("sinus").extend(ts, np.arange(10.0))
+        store.close()
+        channel = TimeSeriesStore(str(tmp_path / "store")).channel("sinus")       # Restart - only a partial block stored.
+        assert 10 == parquet_io.export_channel(channel, str(tmp_path / "sinus.parquet"), t1=int(ts[-1]) + 1)
@@ -0,0 +1,58 @@
+import sys
+
+import numpy as np
+import pytest
+
+from py_dash_boards.metrics import Registry
+from py_dash_boards.payload import decode_block, decode_values, pack_block
+from py_dash_boards.topics import ChannelRouter
+
+
+class TestPayload:
+
+    def test_binary_roundtrip_is_zero_copy(self):
+        samples = np.linspace(-1, 1, 1000)
+        for dtype in (np.float32, np.float64):
+            payload = pack_block(samples, channel=7, t0_ns=1_000_000_000, dt_ns=100_000.0, dtype=dtype)
+            block = decode_block(payload)
+            assert (block.channel, block.t0_ns, len(block)) == (7, 1_000_000_000, 1000)
+            assert block.values.dtype == np.dtype(dtype) and not block.values.flags.owndata
+            assert np.allclose(block.values, samples, atol=1e-6)
+            assert block.timestamps()[-1] == 1_000_000_000 + 999 * 100_000
+        with pytest.raises(ValueError):
+            decode_block(pack_block(samples)[:-4])
+
+    def test_text_payloads(self):
+        assert list(decode_values(b"0.5")) == [0.5]
+        assert list(decode_values("1,2.5, 3")) == [1.0, 2.5, 3.0]
+        with pytest.raises(ValueError):
+            decode_values(b"oops")
+
+    def test_router_ingests_blocks(self):
+        router = ChannelRouter(registry=Registry())
+        router.add_route("sensors/+/vibration", capacity=1500, dtype=np.float32, parser=decode_values)
+        for i in range(2):
+            router.dispatch("sensors/p1/vibration", pack_block(np.full(1000, i)))
+        router.dispatch("sensors/p1/vibration", b"\xff garbage")
+        channel = router.channel("sensors/p1/vibration")
+        assert channel.buffer.total == 2000 and channel.parse_errors.value == 1
+        assert channel.buffer.last(2).tolist() == [1.0, 1.0]
+
+    def test_msgpack_records(self):
+        pytest.importorskip("msgpack")
+        from py_dash_boards.payload import pack_msgpack
+        #
+        block = decode_block(pack_msgpack(np.arange(10), channel="pump1", t0_ns=5, dt_ns=2.0))
+        assert (block.channel, block.t0_ns, block.dt_ns) == ("pump1", 5, 2.0)
+        assert block.values.tolist() == list(range(10))
+
+    def test_stray_binary_wo_codecs(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "msgpack", None)         # I.e. not installed.
+        monkeypatch.setitem(sys.modules, "cbor2", None)
+        for payload in (b"\x85\x01\x02", b"\xde\x00", b"\xa3abc"):
+            with pytest.raises(ValueError):
+                decode_block(payload)
+        router = ChannelRouter(registry=Registry())
+        router.add_route("sensors/+/vibration", dtype=np.float32, parser=decode_values)
+        router.dispatch("sensors/p1/vibration", b"\x85\x01\x02")          # Counted as parse error - NOT raised.
+        assert 1 == router.channel("sensors/p1/vibration").parse_errors.value
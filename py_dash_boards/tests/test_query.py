@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from py_dash_boards.query import QueryLayer
+
+
+class TestQueryLayer:
+
+    def test_pushdown_matches_pandas(self, tmp_path):
+        csv_path = tmp_path / "capture.csv"
+        frame = pd.DataFrame({"Time": np.arange(5000) / 1000.0, "Amplitude": np.sin(np.arange(5000) / 50.0)})
+        frame.to_csv(csv_path, index=False)
+        ql = QueryLayer()
+        ql.register_csv("capture", str(csv_path))
+        assert 5000 == ql.count("capture")
+        assert 1000 == len(ql.time_window("capture", "Time", 1.0, 2.0))
+        assert 50 == len(ql.downsample("capture", "Time", "Amplitude", bucket=0.1))
+        rolled = ql.rolling("capture", "Time", "Amplitude", window=30)
+        mean = frame["Amplitude"].rolling(30).mean()
+        std = (frame["Amplitude"] - mean).rolling(30).std()
+        assert np.allclose(rolled["mean"].to_numpy(dtype=float), mean.to_numpy(), equal_nan=True)
+        assert np.allclose(rolled["std"].to_numpy(dtype=float), std.to_numpy(), equal_nan=True)
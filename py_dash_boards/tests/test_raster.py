@@ -0,0 +1,17 @@
+import importlib.util
+
+import pytest
+
+from py_dash_boards.raster import line_view
+
+
+class TestLineView:
+
+    def test_lines_unchanged(self):
+        element = object()
+        assert element is line_view(element)
+
+    @pytest.mark.skipif(importlib.util.find_spec("datashader") is not None, reason="datashader is installed")
+    def test_missing_datashader(self):
+        with pytest.raises(ImportError, match="pip install datashader"):
+            line_view(object(), rasterize=True)
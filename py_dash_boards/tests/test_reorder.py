@@ -0,0 +1,25 @@
+from py_dash_boards.metrics import Registry
+from py_dash_boards.reorder import ReorderBuffer
+
+
+class TestReorderBuffer:
+
+    def test_late_and_duplicate_samples(self):
+        reorder = ReorderBuffer(lateness_ns=3, idle_flush_ns=10**12, registry=Registry())
+        for ts in [1, 2, 4, 3, 5, 2, 6]:            # '3' late (within window), '2' redelivered.
+            reorder.push("iss", ts, ts * 10)
+        ts, values = reorder.drain()                # Watermark: 6 - 3 = 3.
+        assert list(ts) == [1, 2, 3] and values == [10, 20, 30]
+        assert not reorder.push("iss", 3, 30)       # Duplicate of a released sample.
+        assert not reorder.push("iss", 0, 0)        # Too late - already released beyond.
+        assert reorder.push("other", 4, 40)         # Same timestamp, other topic - NOT a duplicate.
+        ts, values = reorder.drain(flush=True)
+        assert list(ts) == [4, 4, 5, 6] and sorted(values) == [40, 40, 50, 60]
+        assert reorder.reordered_counter.value == 2
+        assert reorder.duplicate_counter.value == 2 and reorder.late_counter.value == 1
+
+    def test_idle_stream_is_released(self):
+        reorder = ReorderBuffer(lateness_ns=10**12, idle_flush_ns=0, registry=Registry())
+        reorder.push("iss", 10, 1.0)
+        ts, _ = reorder.drain()
+        assert list(ts) == [10] and 0 == len(reorder)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from py_dash_boards.rolling import RollingOutliers, RollingStatsCache, rolling_stats
+
+
+class TestRolling:
+
+    def reference(self, values: np.ndarray, window: int, sigma: float) -> tuple:
+        series = pd.Series(values)
+        mean = series.rolling(window).mean()
+        residual = series - mean
+        std = residual.rolling(window).std()
+        return mean.to_numpy(), residual.to_numpy(), std.to_numpy(), (residual.abs() > std * sigma).to_numpy()
+
+    def test_batch_and_stream_match_pandas(self):
+        rng = np.random.default_rng(1)
+        values = 20.0 + np.sin(np.arange(3000) / 40.0) + rng.normal(0, 0.05, 3000)
+        values[rng.integers(100, 3000, 20)] += 2.0
+        mean, residual, std, outliers = self.reference(values, 30, 3.0)
+        b_mean, b_residual, b_std = rolling_stats(values, 30)
+        assert np.allclose(b_mean, mean, equal_nan=True)
+        assert np.allclose(b_std, std, equal_nan=True)
+        detector = RollingOutliers(window=30, sigma=3.0, history=len(values))
+        flags = np.array([detector.push(v) for v in values])
+        assert np.array_equal(flags, outliers)
+        assert detector.outlier_count == outliers.sum()
+        # New sigma - re-threshold only:
+        detector.sigma = 5.0
+        assert detector.outlier_count == self.reference(values, 30, 5.0)[3].sum()
+
+    def test_cache_rethreshold(self):
+        frame = pd.DataFrame({"Temperature": np.cos(np.arange(500) / 10.0)})
+        cache = RollingStatsCache(frame, maxsize=2)
+        first = cache.stats("Temperature", 30)
+        cache.outliers("Temperature", 30, sigma=1)
+        assert cache.stats("Temperature", 30) is first
+        cache.stats("Temperature", 10)
+        cache.stats("Temperature", 20)
+        assert cache.stats("Temperature", 30) is not first        # Evicted (LRU).
@@ -0,0 +1,108 @@
+import numpy as np
+
+from py_dash_boards.rollup import Rollups, RollupTier, NS_PER_S, catch_up, open_rollups, rollups_path
+from py_dash_boards.store import TimeSeriesStore
+
+
+class TestRollups:
+
+    def test_incremental_matches_batch(self):
+        ts = np.arange(0, 600 * NS_PER_S, NS_PER_S // 10, dtype=np.int64)         # 10 minutes @ 10 Hz.
+        values = np.sin(np.arange(len(ts)) / 50.0)
+        batch = RollupTier(60 * NS_PER_S, 100)
+        batch.extend(ts, values)
+        incremental = RollupTier(60 * NS_PER_S, 100)
+        for chunk in np.array_split(np.arange(len(ts)), 37):
+            incremental.extend(ts[chunk], values[chunk])
+        a, b = batch.query(0, ts[-1] + 1), incremental.query(0, ts[-1] + 1)
+        assert 10 == len(a["start"])
+        for key in ("start", "min", "max", "count"):
+            assert np.array_equal(a[key], b[key])
+        assert np.allclose(a["mean"], b["mean"])
+        assert np.allclose(a["mean"][0], values[:600].mean())
+
+    def test_wrap_and_tier_choice(self):
+        rollups = Rollups(tiers=((NS_PER_S, 1000), (60 * NS_PER_S, 100)))
+        ts = np.arange(0, 3000 * NS_PER_S, NS_PER_S, dtype=np.int64)
+        rollups.extend(ts, np.arange(len(ts), dtype=np.float64))
+        # Finest tier wrapped - only the newest 1000 seconds are left:
+        res = rollups.query(2000 * NS_PER_S, 3000 * NS_PER_S, pixels=1000)
+        assert NS_PER_S == res["resolution_ns"]
+        assert np.array_equal(res["start"], ts[2000:])
+        # Starts before its retention, and the 1 m tier is too coarse - caller reads raw samples:
+        assert rollups.query(1500 * NS_PER_S, 3000 * NS_PER_S, pixels=1000) is None
+        # Wide range - coarsest tier still giving one bucket per pixel:
+        res = rollups.query(0, 3000 * NS_PER_S, pixels=50)
+        assert 60 * NS_PER_S == res["resolution_ns"]
+        assert 50 == len(res["start"])
+        # Too narrow for any tier - caller reads raw samples:
+        assert rollups.query(0, 10 * NS_PER_S, pixels=100) is None
+
+    def test_tier_retention(self):
+        rollups = Rollups(tiers=((NS_PER_S, 100), (60 * NS_PER_S, 100)))
+        ts = np.arange(0, 3600 * NS_PER_S, NS_PER_S, dtype=np.int64)
+        rollups.extend(ts, np.ones(len(ts)))
+        # Older than the 1 s tier's retention (newest 100 sec.) - the 1 m tier still has it:
+        res = rollups.query(600 * NS_PER_S, 1200 * NS_PER_S, pixels=10)
+        assert 60 * NS_PER_S == res["resolution_ns"] and 10 == len(res["start"])
+        # Within retention - finest tier:
+        assert NS_PER_S == rollups.query(3500 * NS_PER_S, 3600 * NS_PER_S, pixels=100)["resolution_ns"]
+
+    def test_persist_and_catch_up(self, tmp_path):
+        tiers = ((NS_PER_S, 1000), (60 * NS_PER_S, 100))
+        channel = TimeSeriesStore(str(tmp_path)).channel("sinus")
+        ts = np.arange(0, 600 * NS_PER_S, NS_PER_S // 10, dtype=np.int64)
+        values = np.sin(np.arange(len(ts)) / 50.0)
+        # Ingest - rollups saved half-way, the rest only reaches the store:
+        writer = Rollups(tiers)
+        half = len(ts) // 2
+        channel.extend(ts[:half], values[:half])
+        writer.extend(ts[:half], values[:half])
+        writer.save(rollups_path(channel))
+        channel.extend(ts[half:], values[half:])
+        channel.flush()
+        reader = open_rollups(channel, tiers)
+        expected = Rollups(tiers)
+        expected.extend(ts, values)
+        a, b = reader.query(0, ts[-1] + 1, pixels=10), expected.query(0, ts[-1] + 1, pixels=10)
+        for key in ("start", "min", "max", "count"):
+            assert np.array_equal(a[key], b[key])
+        assert reader.last_ts == ts[-1]
+
+    def test_open_after_short_first_run(self, tmp_path):
+        # First run: fewer samples than one store-block, stopped before the rollups were ever saved:
+        channel = TimeSeriesStore(str(tmp_path)).channel("sinus")
+        ts = np.arange(10, dtype=np.int64) * NS_PER_S
+        channel.extend(ts, np.arange(10.0))
+        channel.close()
+        channel = TimeSeriesStore(str(tmp_path)).channel("sinus")
+        rollups = open_rollups(channel, ((NS_PER_S, 100),))
+        assert rollups.last_ts == ts[-1]
+        assert np.array_equal(rollups.query(0, 10 * NS_PER_S, pixels=10)["mean"], np.arange(10.0))
+
+    def test_save_async_and_follow_writer(self, tmp_path):
+        tiers = ((NS_PER_S, 1000), (60 * NS_PER_S, 100))
+        writer_store = TimeSeriesStore(str(tmp_path)).channel("sinus")
+        writer = Rollups(tiers)
+        ts = np.arange(0, 300 * NS_PER_S, NS_PER_S // 10, dtype=np.int64)
+        values = np.cos(np.arange(len(ts)) / 30.0)
+        writer_store.extend(ts[:1000], values[:1000])
+        writer_store.flush()
+        writer.extend(ts[:1000], values[:1000])
+        assert writer.save_async(rollups_path(writer_store))
+        writer.extend(ts[1000:1500], values[1000:1500])        # NOT in the snapshot being written.
+        writer.wait_saved()
+        # Reader - e.g. a history chart in another process - follows the writer's store:
+        reader_store = TimeSeriesStore(str(tmp_path)).channel("sinus")
+        reader = open_rollups(reader_store, tiers)
+        assert reader.last_ts == ts[999]
+        writer_store.extend(ts[1000:], values[1000:])
+        writer_store.flush()
+        assert 0 == catch_up(reader, reader_store)                # Index NOT re-read yet.
+        reader_store.reload()
+        assert len(ts) - 1000 == catch_up(reader, reader_store)
+        expected = Rollups(tiers)
+        expected.extend(ts, values)
+        a, b = reader.query(0, ts[-1] + 1, pixels=100), expected.query(0, ts[-1] + 1, pixels=100)
+        for key in ("start", "min", "max", "count"):
+            assert np.array_equal(a[key], b[key])
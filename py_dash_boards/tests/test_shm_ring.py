@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+import socket
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from py_dash_boards.shm_ring import SharedRing
+
+N_ROWS = 200000
+
+
+def write_rows(name: str, attached: object, done: object) -> None:
+    """ Writer-process: rows (i, -i) in batches of varying size - a torn read would mix rows of two writes. """
+    ring = SharedRing.create(name, capacity=1000)
+    attached.wait(10)
+    i = 0
+    while i < N_ROWS:
+        n = min(1 + i % 97, N_ROWS - i)
+        rows = np.arange(i, i + n, dtype=np.float64)
+        ring.extend(np.column_stack((rows, -rows)))
+        i += n
+    done.wait(10)
+    ring.close()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs the 'fork' start-method")
+class TestSharedRing:
+
+    def test_seqlock_across_processes(self):
+        ctx = multiprocessing.get_context("fork")
+        name = f"pdb_test_{os.getpid()}"
+        attached, done = ctx.Event(), ctx.Event()
+        writer = ctx.Process(target=write_rows, args=(name, attached, done))
+        writer.start()
+        try:
+            ring = SharedRing.attach(name)
+            attached.set()
+            total, reads = 0, 0
+            while total < N_ROWS:
+                rows, total = ring.since(total)
+                if len(rows):
+                    reads += 1
+                    assert np.array_equal(rows[:, 1], -rows[:, 0])          # Consistent rows ...
+                    assert np.all(1 == np.diff(rows[:, 0]))                 # ... and consecutive.
+                    assert total - 1 == rows[-1, 0]                         # Matching the returned total.
+            assert 1 < reads
+            ring.close()
+        finally:
+            done.set()
+            writer.join(10)
+        assert 0 == writer.exitcode
+
+    def test_replaces_stale_block(self):
+        name = f"pdb_test_stale_{os.getpid()}"
+        stale = shared_memory.SharedMemory(name=name, create=True, size=64)     # E.g. left over by a crashed writer.
+        stale.close()
+        ring = SharedRing.create(name, capacity=10)
+        ring.append(1.0, 2.0)
+        reader = SharedRing.attach(name)
+        assert 1 == reader.total
+        reader.close()
+        ring.close()
+
+    def test_ring_unlinked_if_first_connect_fails(self):
+        pytest.importorskip("paho.mqtt")
+        from py_dash_boards.shm_ring import _ingest_main
+        #
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]        # Nothing listening - connect is refused.
+        name = f"pdb_test_noconn_{os.getpid()}"
+        proc = multiprocessing.get_context("fork").Process(target=_ingest_main, args=(name, 10, "127.0.0.1", port, "a", float, None))
+        proc.start()
+        proc.join(10)
+        assert 0 != proc.exitcode
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name, create=False)
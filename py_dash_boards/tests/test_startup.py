@@ -0,0 +1,12 @@
+from py_dash_boards.metrics import Registry
+from py_dash_boards.startup import prewarm
+
+
+class TestPrewarm:
+
+    def test_imports_in_background(self):
+        registry = Registry()
+        prewarm("colorsys", "no_such_module_xyz", registry=registry).join(timeout=10)
+        snapshot = registry.snapshot()
+        assert "pdb_import_seconds{module=colorsys}" in snapshot
+        assert not any("no_such_module_xyz" in key for key in snapshot)      # Failed import - skipped, NOT raised.
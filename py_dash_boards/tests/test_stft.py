@@ -0,0 +1,36 @@
+import numpy as np
+
+from py_dash_boards.stft import StreamingSTFT
+
+
+class TestStreamingSTFT:
+
+    def test_blocks_match_one_shot(self):
+        fs, f0 = 8000.0, 1000.0
+        signal = 0.5 * np.sin(2 * np.pi * f0 * np.arange(40000) / fs)
+        one_shot = StreamingSTFT(fs, nfft=512, hop=128, n_columns=100).push(signal)
+        streamed = StreamingSTFT(fs, nfft=512, hop=128, n_columns=100)
+        rng = np.random.default_rng(0)
+        columns = []
+        pos = 0
+        while pos < len(signal):
+            n = int(rng.integers(1, 3000))
+            columns.append(streamed.push(signal[pos:pos + n]))
+            pos += n
+        columns = np.concatenate(columns)
+        assert 1 + (len(signal) - 512) // 128 == len(columns) == len(one_shot)
+        assert np.allclose(columns, one_shot, atol=1e-3)
+        # Peak at f0 w. ~amplitude 0.5 (-6 dB):
+        peak_bin = int(np.argmax(columns[-1]))
+        assert abs(streamed.freqs[peak_bin] - f0) < fs / 512
+        assert abs(columns[-1][peak_bin] - 20 * np.log10(0.5)) < 0.5
+        # Waterfall holds the newest 100 columns, oldest first:
+        assert np.array_equal(streamed.waterfall().T, columns[-100:])
+
+    def test_oversized_push_counts_all_columns(self):
+        fs = 8000.0
+        signal = np.random.default_rng(1).normal(size=20000)
+        stft = StreamingSTFT(fs, nfft=256, hop=64, n_columns=50)
+        columns = stft.push(signal)
+        assert len(columns) > 50 and len(columns) == stft.total_columns
+        assert np.array_equal(stft.waterfall().T, columns[-50:])
@@ -0,0 +1,77 @@
+import threading
+
+import numpy as np
+
+from py_dash_boards import store as tss
+
+
+class TestTimeSeriesStore:
+
+    def fill(self, ch, n: int) -> tuple:
+        ts = np.arange(n, dtype=np.int64) * 1000
+        values = np.sin(np.arange(n) / 100.0)
+        ch.extend(ts[:n // 2], values[:n // 2])
+        for t, v in zip(ts[n // 2:], values[n // 2:]):
+            ch.append(int(t), float(v))
+        return ts, values
+
+    def test_range_and_last(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tss, "SEGMENT_BLOCKS", 4)
+        ch = tss.TimeSeriesStore(str(tmp_path)).channel("1/testPoints/sinus")
+        n = tss.BLOCK_ROWS * 9 + 123          # Several segments + a partial tail block.
+        ts, values = self.fill(ch, n)
+        t0, t1 = ts[5000], ts[30000]
+        r_ts, r_values = ch.range(int(t0), int(t1))
+        assert np.array_equal(r_ts, ts[5000:30000])
+        assert np.array_equal(r_values, values[5000:30000])
+        l_ts, l_values = ch.last(10000)
+        assert np.array_equal(l_ts, ts[-10000:])
+        assert np.array_equal(l_values, values[-10000:])
+
+    def test_reopen_and_compress(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tss, "SEGMENT_BLOCKS", 2)
+        ch = tss.TimeSeriesStore(str(tmp_path), compress=True).channel("vib")
+        n = tss.BLOCK_ROWS * 5 + 7
+        ts, values = self.fill(ch, n)
+        ch.close()
+        assert any(name.endswith(".zdat") for name in (tmp_path / "vib").iterdir() for name in [name.name])
+        # Restart - continue appending to the partial tail block:
+        ch = tss.TimeSeriesStore(str(tmp_path), compress=True).channel("vib")
+        ch.append(int(ts[-1]) + 1000, 42.0)
+        ch.flush()
+        r_ts, r_values = ch.range(0, int(ts[-1]) + 2000)
+        assert len(r_ts) == n + 1
+        assert np.array_equal(r_values[:-1], values)
+        assert r_values[-1] == 42.0
+
+    def test_restart_with_partial_block_only(self, tmp_path):
+        ch = tss.TimeSeriesStore(str(tmp_path)).channel("few")
+        ts, values = self.fill(ch, 10)          # Less than BLOCK_ROWS - only a partial block on disk.
+        ch.close()
+        ch = tss.TimeSeriesStore(str(tmp_path)).channel("few")
+        assert 0 == ch.first_ts()
+        assert np.array_equal(ch.range(0, 10**6)[1], values)
+        ch.extend(ts + 10**5, values)
+        ch.close()
+        ch = tss.TimeSeriesStore(str(tmp_path)).channel("few")
+        r_ts, _ = ch.range(0, 10**6)
+        assert np.array_equal(r_ts, np.concatenate((ts, ts + 10**5)))
+
+    def test_range_during_flush(self, tmp_path):
+        ch = tss.TimeSeriesStore(str(tmp_path)).channel("busy")
+        n = tss.BLOCK_ROWS * 2 + 100
+        self.fill(ch, n)
+        stop = threading.Event()
+
+        def flusher():
+            while not stop.is_set():
+                ch.flush()
+
+        thread = threading.Thread(target=flusher)
+        thread.start()
+        try:
+            for _ in range(200):
+                assert n == len(ch.range(0, 10**12)[0])           # The open block is NEVER counted twice.
+        finally:
+            stop.set()
+            thread.join()
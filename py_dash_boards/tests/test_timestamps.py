@@ -0,0 +1,37 @@
+import numpy as np
+
+from py_dash_boards.ringbuffer import TimedRingBuffer
+from py_dash_boards.timestamps import NS_PER_S, GapDetector, Timestamper, break_gaps, to_datetime64, to_epoch_ns
+
+
+class TestTimestamps:
+
+    def test_payload_units(self):
+        t_ns = 1706038908569 * 1_000_000
+        for value in (1706038908569, "1706038908569", 1706038908569000, t_ns):
+            assert to_epoch_ns(value) == t_ns
+        assert abs(to_epoch_ns(1706038908.569) - t_ns) < 1000        # Float seconds - exact to ~us only.
+        stamper = Timestamper()
+        assert stamper.stamp(1706038908569) == t_ns
+        assert stamper.stamp() <= stamper.stamp(None) and abs(stamper.now() - Timestamper(use_payload=False).stamp(1)) < NS_PER_S
+
+    def test_gaps(self):
+        ts = np.array([0, 1, 2, 10, 11, 30], dtype=np.int64) * NS_PER_S
+        values = np.arange(6.0)
+        gap_ts, gap_values = break_gaps(ts, values, max_gap_ns=5 * NS_PER_S)
+        assert np.isnan(gap_values).sum() == 2 and np.all(np.diff(gap_ts) > 0)
+        assert list(gap_values[~np.isnan(gap_values)]) == list(values)
+        detector = GapDetector()
+        assert [detector.push(t) for t in ts] == [False, False, False, True, False, True]
+        assert to_datetime64(ts)[3] == np.datetime64(10, "s")
+
+    def test_timed_ring(self):
+        ring = TimedRingBuffer(5)
+        ring.extend(np.arange(4) * NS_PER_S, [0.0, 1.0, 2.0, 3.0])
+        ring.append(10 * NS_PER_S, 10.0)
+        ring.append(11 * NS_PER_S, 11.0)
+        ts, values = ring.last()
+        assert list(values) == [1.0, 2.0, 3.0, 10.0, 11.0] and ts[-1] == ring.latest_ts() == 11 * NS_PER_S
+        assert list(ring.window(2 * NS_PER_S)[1]) == [10.0, 11.0]
+        ts, values, total = ring.since(4)
+        assert list(values) == [10.0, 11.0] and total == 6
@@ -0,0 +1,43 @@
+import pytest
+
+from py_dash_boards.metrics import Registry
+from py_dash_boards.topics import ChannelRouter, TopicTrie, topic_matches
+
+
+class TestTopics:
+
+    def test_trie_matches_like_mqtt(self):
+        patterns = ["a/b/c", "a/+/c", "a/#", "#", "+/b/+", "x/+"]
+        trie = TopicTrie()
+        for pattern in patterns:
+            trie.insert(pattern, pattern)
+        for topic in ["a/b/c", "a/x/c", "a", "a/b", "x/y", "x/y/z", "q/b/r", "$SYS/b/c"]:
+            expected = sorted(p for p in patterns if topic_matches(p, topic))
+            assert sorted(trie.match(topic)) == expected, topic
+
+    def test_invalid_patterns(self):
+        trie = TopicTrie()
+        for pattern in ["a/#/b", "a/b#", "a/x+"]:
+            with pytest.raises(ValueError):
+                trie.insert(pattern, None)
+
+    def test_router_creates_channel_per_topic(self):
+        router = ChannelRouter(registry=Registry())
+        router.add_route("sensors/+/vibration", capacity=4)
+        router.add_route("sensors/#", capacity=100)
+        created = []
+        router.add_listener(lambda ch: created.append(ch.topic))
+        for i in range(6):
+            router.dispatch("sensors/p1/vibration", str(i).encode())
+        router.dispatch("sensors/p2/vibration", b"1.5")
+        router.dispatch("sensors/p2/temp", b"20")
+        router.dispatch("sensors/p2/temp", b"oops")
+        assert not router.dispatch("other", b"1")
+        #
+        assert created == ["sensors/p1/vibration", "sensors/p2/vibration", "sensors/p2/temp"]
+        p1 = router.channel("sensors/p1/vibration")
+        assert p1.route.pattern == "sensors/+/vibration"
+        assert list(p1.buffer.last()) == [2.0, 3.0, 4.0, 5.0]
+        assert router.channel("sensors/p2/temp").route.pattern == "sensors/#"
+        assert router.channel("sensors/p2/temp").parse_errors.value == 1
+        assert sorted(router.channels("sensors/+/vibration")) == ["sensors/p1/vibration", "sensors/p2/vibration"]
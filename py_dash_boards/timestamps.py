@@ -0,0 +1,129 @@
+"""
+@file timestamps.py
+
+@brief Timestamping stage - every sample gets an int64 epoch-ns timestamp, kept in a parallel column (NOT per-sample
+'datetime'/'pd.Timestamp' objects), either the receive-time or the payload's own timestamp.
+
+Receive-time is taken from the monotonic 'time.perf_counter_ns()' clock (the one 'SampleTracer' and the asyncio
+ingestion stamp messages with), anchored ONCE to the wall-clock, i.e. it never jumps backwards (NTP-steps etc.).
+Gap detection and axis conversion are vectorized over the timestamp column.
+
+Usage:
+    >>> stamper = Timestamper()
+    >>> ts = stamper.stamp(json_data.get("timestamp"))          # Payload timestamp (s/ms/us/ns) if given, else receive-time.
+    >>> ring.append(ts, value)                                  # 'py_dash_boards.ringbuffer.TimedRingBuffer'
+    >>> ts, values = break_gaps(*ring.last(), max_gap_ns=5 * NS_PER_S)
+    >>> source.stream(dict(time=to_epoch_ms(ts), value=values))     # Bokeh 'datetime'-axis.
+"""
+
+import time
+
+import numpy as np
+
+
+NS_PER_US = 1000
+NS_PER_MS = 1000 * NS_PER_US
+NS_PER_S = 1000 * NS_PER_MS
+
+# Payload timestamps are accepted in s, ms, us or ns - the unit is told by the magnitude (valid for years ~1973..2200):
+_UNIT_LIMITS = ((1e11, NS_PER_S), (1e14, NS_PER_MS), (1e17, NS_PER_US))
+
+
+def to_epoch_ns(value: object) -> int:
+    """ Convert a payload timestamp (epoch s, ms, us or ns - int, float or numeric string) to epoch-ns. """
+    if isinstance(value, str):
+        value = float(value) if any(c in value for c in ".eE") else int(value)
+    for limit, scale in _UNIT_LIMITS:
+        if abs(value) < limit:
+            return int(value) * scale if isinstance(value, (int, np.integer)) else int(round(value * scale))
+    return int(value)           # NOTE: ints are converted exactly - a float64 can NOT hold epoch-ns to the ns.
+
+
+class Timestamper:
+    """
+    Source of int64 epoch-ns timestamps: payload-time if present (and 'use_payload' set), else receive-time.
+    """
+    def __init__(self, use_payload: bool=True):
+        self.use_payload = use_payload
+        self._anchor_ns = time.time_ns() - time.perf_counter_ns()
+
+    def now(self) -> int:
+        """ Receive-time [epoch-ns] - monotonic, anchored to the wall-clock at creation. """
+        return self._anchor_ns + time.perf_counter_ns()
+
+    def from_counter(self, counter_ns: int) -> int:
+        """ Epoch-ns of a 'time.perf_counter_ns()' reading, e.g. 't_recv' from 'SampleTracer.received()'. """
+        return self._anchor_ns + counter_ns
+
+    def stamp(self, payload_ts: object=None) -> int:
+        if payload_ts is not None and self.use_payload:
+            return to_epoch_ns(payload_ts)
+        return self.now()
+
+
+# ********************************** Column Helpers **************************************
+
+def to_epoch_ms(ts_ns: object) -> np.ndarray:
+    """ Epoch-ns -> float epoch-ms, the representation of Bokeh's 'datetime'-axis. """
+    return np.asarray(ts_ns, dtype=np.int64) / NS_PER_MS
+
+
+def to_datetime64(ts_ns: object) -> np.ndarray:
+    """ Epoch-ns -> 'datetime64[ns]' (zero-copy view) - for Matplotlib, Pandas and HoloViews datetime-axes. """
+    return np.asarray(ts_ns, dtype=np.int64).view("datetime64[ns]")
+
+
+def find_gaps(ts_ns: object, max_gap_ns: int) -> np.ndarray:
+    """ Indices 'i' where ts[i] - ts[i-1] exceeds 'max_gap_ns', i.e. a gap starts BEFORE sample 'i'. """
+    ts_ns = np.asarray(ts_ns, dtype=np.int64)
+    return np.flatnonzero(np.diff(ts_ns) > max_gap_ns) + 1
+
+
+def break_gaps(ts_ns: object, values: object, max_gap_ns: int) -> tuple:
+    """
+    Insert a NaN-sample into each gap, so line-charts show a break instead of a straight line across the gap.
+
+    Returns:
+        tuple: (ts_ns, values) - the inputs as-is if there are no gaps, else new arrays (values as float).
+    """
+    gaps = find_gaps(ts_ns, max_gap_ns)
+    if 0 == len(gaps):
+        return ts_ns, values
+    ts_ns = np.asarray(ts_ns, dtype=np.int64)
+    gap_ts = ts_ns[gaps - 1] + 1        # NOTE: just after the last sample before the gap - keeps the column sorted.
+    return np.insert(ts_ns, gaps, gap_ts), np.insert(np.asarray(values, dtype=np.float64), gaps, np.nan, axis=0)
+
+
+class GapDetector:
+    """
+    Incremental gap detection on a live stream: a gap is an interval above 'factor' x the (smoothed) typical interval,
+    or above 'max_gap_ns' if given. O(1) per sample.
+    """
+    def __init__(self, max_gap_ns: int=None, factor: float=5.0, smoothing: float=0.05):
+        self.max_gap_ns = max_gap_ns
+        self.factor = factor
+        self.smoothing = smoothing
+        self.typical_ns = None
+        self.last_ns = None
+        self.gaps = 0
+
+    def push(self, ts_ns: int) -> bool:
+        """ Returns True if a gap precedes this sample. """
+        last, self.last_ns = self.last_ns, ts_ns
+        if last is None:
+            return False
+        interval = ts_ns - last
+        if self.max_gap_ns is not None:
+            gap = interval > self.max_gap_ns
+        else:
+            gap = self.typical_ns is not None and interval > self.factor * self.typical_ns
+        if gap:
+            self.gaps += 1
+        elif interval > 0:
+            self.typical_ns = interval if self.typical_ns is None else self.typical_ns + self.smoothing * (interval - self.typical_ns)
+        return gap
+
+
+def to_iso(ts_ns: int, unit: str="s") -> str:
+    """ Epoch-ns -> ISO-8601 (UTC) string, e.g. for titles/labels - NOT meant for per-sample use. """
+    return str(np.datetime_as_string(np.datetime64(int(ts_ns), "ns"), unit=unit))
@@ -0,0 +1,218 @@
+"""
+@file topics.py
+
+@brief Multi-topic (wildcard) subscriptions, routed to one typed channel per concrete MQTT topic.
+
+Subscription patterns use MQTT wildcards, i.e. '+' (exactly one level) and '#' (all remaining levels).
+Patterns are compiled into a trie, so matching a topic costs O(depth) regardless of the number of patterns.
+The first message on a new concrete topic creates its channel, and later messages on that topic are
+dispatched via a plain dict-lookup.
+
+Usage:
+    >>> router = ChannelRouter()
+    >>> router.add_route("sensors/+/vibration", capacity=100000)
+    >>> router.add_route("1/testPoints/#", parser=float)
+    >>> client = mqtt_setup(broker_address, broker_port, router.patterns(), msg_event_handler=router.on_message)
+    >>> router.channel("sensors/pump1/vibration").buffer.last(500)
+"""
+
+import threading
+
+import numpy as np
+
+from py_dash_boards.metrics import REGISTRY, Registry
+from py_dash_boards.ringbuffer import RingBuffer
+
+
+# ********************************** Topic Matching **************************************
+
+def validate_pattern(pattern: str) -> None:
+    levels = pattern.split("/")
+    for idx, level in enumerate(levels):
+        if "#" in level and ("#" != level or idx != len(levels) - 1):
+            raise ValueError(f"Invalid pattern '{pattern}': '#' must be the last level, on its own.")
+        if "+" in level and "+" != level:
+            raise ValueError(f"Invalid pattern '{pattern}': '+' must occupy a whole level.")
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    """ Check a single topic against a single pattern (MQTT rules, incl. '$'-topics NOT matching leading wildcards). """
+    if topic.startswith("$") and pattern[:1] in ("+", "#"):
+        return False
+    p_levels = pattern.split("/")
+    t_levels = topic.split("/")
+    for idx, p_level in enumerate(p_levels):
+        if "#" == p_level:
+            return True
+        if idx >= len(t_levels) or ("+" != p_level and p_level != t_levels[idx]):
+            return False
+    return len(p_levels) == len(t_levels)
+
+
+class _TrieNode:
+    __slots__ = ("children", "plus", "hash_values", "values")
+
+    def __init__(self):
+        self.children = {}          # Literal level -> node.
+        self.plus = None            # '+' child.
+        self.hash_values = []       # Values of patterns ending in '#' at this node.
+        self.values = []            # Values of patterns ending exactly here.
+
+
+class TopicTrie:
+    """
+    Pattern -> value mapping, with lookup of all values whose pattern matches a concrete topic.
+    """
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def insert(self, pattern: str, value: object) -> None:
+        validate_pattern(pattern)
+        node = self._root
+        for level in pattern.split("/"):
+            if "#" == level:
+                node.hash_values.append(value)
+                return
+            if "+" == level:
+                if node.plus is None:
+                    node.plus = _TrieNode()
+                node = node.plus
+            else:
+                node = node.children.setdefault(level, _TrieNode())
+        node.values.append(value)
+
+    def match(self, topic: str) -> list:
+        """ Get values of all matching patterns (in no particular order). """
+        levels = topic.split("/")
+        result = []
+        nodes = [self._root]
+        for depth, level in enumerate(levels):
+            next_nodes = []
+            for node in nodes:
+                if node.hash_values and not (0 == depth and topic.startswith("$")):
+                    result.extend(node.hash_values)
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+                if node.plus is not None and not (0 == depth and topic.startswith("$")):
+                    next_nodes.append(node.plus)
+            if not next_nodes:
+                return result
+            nodes = next_nodes
+        for node in nodes:
+            result.extend(node.values)
+            result.extend(node.hash_values)       # NOTE: 'a/#' also matches 'a' itself (MQTT spec).
+        return result
+
+
+# ********************************** Channels **************************************
+
+class Route:
+    """ Per-pattern settings, applied to each channel created from that pattern. """
+    def __init__(self, pattern: str, capacity: int=10000, dtype: object=np.float64, parser: object=float):
+        self.pattern = pattern
+        self.capacity = capacity
+        self.dtype = dtype
+        self.parser = parser
+        # Literal levels beat '+', and '+' beats '#':
+        levels = pattern.split("/")
+        self.specificity = (sum(1 for level in levels if level not in ("+", "#")), len(levels), "#" != levels[-1])
+
+
+class Channel:
+    """
+    One concrete MQTT topic w. its own typed ring buffer.
+    'buffer.total' increments on every write, so dashboards can cheaply check for new data.
+    """
+    def __init__(self, topic: str, route: Route, registry: Registry=REGISTRY):
+        self.topic = topic
+        self.route = route
+        self.buffer = RingBuffer(route.capacity, route.dtype)
+        self.parse_errors = registry.counter("pdb_channel_parse_errors_total", "Payloads that could not be parsed.", {"channel": topic})
+
+    def ingest(self, payload: bytes) -> None:
+        try:
+            value = self.route.parser(payload)
+        except (ValueError, TypeError, KeyError):
+            self.parse_errors.inc()
+            return
+        if isinstance(value, np.ndarray):
+            self.buffer.extend(value)
+        else:
+            self.buffer.append(value)
+
+
+class ChannelRouter:
+    """
+    Routes MQTT messages to per-topic channels. Use 'on_message' as paho message-callback.
+    """
+    def __init__(self, registry: Registry=REGISTRY):
+        self.registry = registry
+        self._trie = TopicTrie()
+        self._routes = []
+        self._channels = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.unrouted_counter = registry.counter("pdb_router_unrouted_total", "Messages matching no route.")
+
+    def add_route(self, pattern: str, capacity: int=10000, dtype: object=np.float64, parser: object=float) -> Route:
+        route = Route(pattern, capacity, dtype, parser)
+        self._trie.insert(pattern, route)
+        self._routes.append(route)
+        return route
+
+    def patterns(self) -> list:
+        return [route.pattern for route in self._routes]
+
+    def subscribe(self, client: object, qos: int=0) -> None:
+        """ (Re-)subscribe all patterns, in ONE subscribe-request. """
+        if self._routes:
+            client.subscribe([(route.pattern, qos) for route in self._routes])
+
+    def add_listener(self, callback: object) -> None:
+        """ Get notified - callback(channel) - when a new channel is created, e.g. to update a selection-widget. """
+        self._listeners.append(callback)
+
+    def channel_for(self, topic: str) -> Channel|None:
+        """ Get (or create, if a route matches) the channel of a concrete topic. """
+        channel = self._channels.get(topic)
+        if channel is not None:
+            return channel
+        routes = self._trie.match(topic)
+        if not routes:
+            return None
+        with self._lock:
+            channel = self._channels.get(topic)
+            if channel is None:
+                channel = Channel(topic, max(routes, key=lambda r: r.specificity), self.registry)     # NOTE: most specific pattern wins!
+                self._channels[topic] = channel
+                created = True
+            else:
+                created = False
+        if created:
+            for callback in self._listeners:
+                callback(channel)
+        return channel
+
+    def dispatch(self, topic: str, payload: bytes) -> bool:
+        channel = self.channel_for(topic)
+        if channel is None:
+            self.unrouted_counter.inc()
+            return False
+        channel.ingest(payload)
+        return True
+
+    def on_message(self, client, userdata, msg):
+        self.dispatch(msg.topic, msg.payload)
+
+    def channel(self, topic: str) -> Channel|None:
+        return self._channels.get(topic)
+
+    def channels(self, pattern: str=None) -> dict:
+        """
+        Get existing channels, optionally filtered by an MQTT pattern - NO resubscription involved.
+        """
+        snapshot = dict(self._channels)
+        if pattern is None:
+            return snapshot
+        return {topic: ch for topic, ch in snapshot.items() if topic_matches(pattern, topic)}
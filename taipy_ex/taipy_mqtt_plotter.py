@@ -1,25 +1,43 @@
 import time
 from threading import Thread
-from taipy.gui import Gui, State, invoke_callback, get_state_id   # NOTE: 'State' class, and associated 'get_state_id()' function, are REQUIRED! (to keep track of GUI state)
-import numpy as np
-import pandas as pd
 
-import paho.mqtt.client as mqtt
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.startup import prewarm
+prewarm("pandas", "taipy.gui")      # NOTE: heavy GUI imports proceed while connecting - imported in this order in 'GUI stuff' below.
+from py_dash_boards.metrics import SampleTracer, start_http_server
+from py_dash_boards.ingest import mqtt_setup
+from py_dash_boards.config import setting
+from py_dash_boards.governor import RenderGovernor
 
 
 # Define the MQTT broker details
-broker_address = "test.mosquitto.org"
-broker_port = 1883
-topic = "1/testPoints/sinus"
+broker_address = os.environ.get("PDB_MQTT_BROKER", "test.mosquitto.org")      # NOTE: environment overrides are used by 'benchmarks/'!
+broker_port = int(os.environ.get("PDB_MQTT_PORT", 1883))
+topic = setting("channel.topic", "1/testPoints/sinus")
+
+# Animation:
+RENDER_FLOOR_MS = setting("frontend.render_floor_ms", 33)           # Min. interval between renders, i.e. max. ~30 fps.
+RENDER_CEILING_MS = setting("frontend.render_ceiling_ms", 1000)     # Max. interval between renders (w. new data).
+
+# Debug:
+DATA_STREAM_DEBUG = setting("frontend.debug", False)
+
+# Instrumentation - Prometheus scrape-port, or 'None' for in-process metrics only:
+METRICS_HTTP_PORT = int(os.environ["PDB_METRICS_PORT"]) if "PDB_METRICS_PORT" in os.environ else None
 
 # Globals:
 times = []
 mqtt_single_data = []
 current_sample_count = 0
-prev_sample_count = 0
 current_sample = 0.0
 
+tracer = SampleTracer("taipy")
+governor = RenderGovernor("taipy", floor_ms=RENDER_FLOOR_MS, ceiling_ms=RENDER_CEILING_MS)
+
 
 # ********************************** MQTT Helpers **************************************
 
@@ -46,65 +64,6 @@ def get_value_from_raw(raw_data: str) -> tuple:
     return f_val
 
 
-def mqtt_setup(broker_address: str, broker_port: int, topic: str, msg_event_handler: object=None, conn_event_handler: object=None) -> mqtt.Client:
-    """
-    Complete setup of MQTT-client, including connecting event-handlers to events.
-    
-    TODO: add handlers for 'on_disconnect' etc(??).
-
-    Args:
-        broker_address (str): _description_
-        broker_port (int): _description_
-        topic (str): _description_
-        msg_event_handler (object, optional): _description_. Defaults to None.
-        conn_event_handler (object, optional): _description_. Defaults to None.
-
-    Returns:
-        mqtt.Client: MQTT-client instance.
-    """
-    def default_msg_handler(client, userdata, msg):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        data = msg.payload.decode("utf-8")
-        print(f"Received data: {data}")
-    #
-    def default_connect_handler(client, userdata, flags, rc: int=0):
-        if client:
-            pass
-        #
-        if userdata:
-            pass
-        #
-        if flags:
-            pass
-        #
-        if rc == 0:
-            print("Connected to MQTT Broker!")
-        else:
-            print("ERROR: failed to connect, return code %d\n", rc)    
-
-    # Create an MQTT client and connect to the broker
-    client = mqtt.Client()
-    client.connect(broker_address, broker_port)
-    # Subscribe to the MQTT topic
-    client.subscribe(topic)
-    # Set the callback function for 'on_connected' event':
-    if conn_event_handler:
-        client.on_connect = conn_event_handler
-    else:
-        client.on_connect = default_connect_handler
-    # Set the callback function for incoming messages:
-    if msg_event_handler:
-        client.on_message = msg_event_handler
-    else:
-        client.on_message = default_msg_handler
-    #
-    return client
-
 # *********************************************************************************
 
 
@@ -120,27 +79,19 @@ def on_message(client, userdata, msg):
     if userdata:
         pass
     #
+    t_recv = tracer.received()
     data = msg.payload.decode("utf-8")
     sine_val = get_value_from_raw(data)
-    print(f"Received data for sample-count {current_sample_count}: {data}")
+    tracer.parsed(t_recv)
+    if DATA_STREAM_DEBUG:
+        print(f"Received data for sample-count {current_sample_count}: {data}")
     #
     current_sample_count += 1
     #
     current_sample = sine_val
+    tracer.inserted(t_recv)
 
 
-def new_data_received() -> bool:
-    global current_sample_count
-    global prev_sample_count
-    global current_sample
-    #
-    got_new_data = current_sample_count != prev_sample_count
-    #
-    if got_new_data:
-       prev_sample_count = current_sample_count
-    #
-    return got_new_data
-
 # ************************************************************************************
 
 # ************************** MQTT Setup ******************************************
@@ -150,6 +101,9 @@ mqtt_client.loop_start()
 # ********************************************************************************
 
 # **************************** GUI stuff *****************************************
+import pandas as pd
+from taipy.gui import Gui, State, invoke_callback, get_state_id   # NOTE: 'State' class, and associated 'get_state_id()' function, are REQUIRED! (to keep track of GUI state)
+
 line_data = pd.DataFrame({"Time": [], "Value": []})
 
 layout_line = {
@@ -175,12 +129,14 @@ def client_handler(gui: Gui, state_id_list: list):
     global current_sample_count
     # 
     while 100 > current_sample_count:
-        if new_data_received():
-            print(f"Data received: {current_sample}")
-            if hasattr(gui, "_server") and state_id_list:
+        governor.observe_total(current_sample_count)
+        if hasattr(gui, "_server") and state_id_list and governor.should_render():
+            if DATA_STREAM_DEBUG:
+                print(f"Data received: {current_sample} ({governor.fps:.0f} fps)")
+            with governor.frame():
+                tracer.render_scheduled()
                 invoke_callback(gui, state_id_list[0], update_value, current_sample)
-        else:
-            time.sleep(1)
+        time.sleep(governor.tick_ms / 1000)
     #
     print("I'm DONE -goodbye!")
         
@@ -211,6 +167,7 @@ def update_value(new_sample: float):
             "Value": mqtt_single_data,
         }
     )
+    tracer.render_complete()        # NOTE: Taipy callback done, i.e. state-update is queued for the browser(s).
 
 
 # Set up GUI(='page'):
@@ -219,6 +176,9 @@ page = """
 """
 gui = Gui(page=page)
 
+if METRICS_HTTP_PORT is not None:
+    start_http_server(METRICS_HTTP_PORT)
+
 t = Thread(
     target=client_handler,
     args=(gui, state_id_list),
@@ -1,10 +1,19 @@
 import vizro.plotly.express as px
 from vizro import Vizro
 import vizro.models as vm
-import pandas as pd
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))    # NOTE: makes 'py_dash_boards' importable when run from this folder!
+from py_dash_boards.parquet_io import capture_path, read_pandas
+
+# Capture - CSV (read in full), or its Parquet version if converted (see 'python -m py_dash_boards.parquet_io convert ...')
+# and pyarrow is installed - then read w. predicate pushdown:
+CAPTURE_PATH = capture_path(os.path.expanduser("~/Documents/div/7s/VV/test_data/vibration_test_data.csv"))
+T_START, T_END = None, None     # Time-window [s] to analyze, 'None' = all.
 
 # Read structured data:
-df = pd.read_csv("~/Documents/div/7s/VV/test_data/vibration_test_data.csv", dtype={"Time": float, "Amplitude": float})
+df = read_pandas(CAPTURE_PATH, T_START, T_END, time_column="Time", dtype={"Time": float, "Amplitude": float})
 
 print(df.columns)
 